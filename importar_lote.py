@@ -0,0 +1,202 @@
+"""
+importar_lote.py - Importação de balancetes em lote pela linha de comando
+
+Uso:
+    python importar_lote.py dados/2025            # pasta (convenção de nome)
+    python importar_lote.py manifesto.csv         # manifesto arquivo;empresa;mes;ano
+    python importar_lote.py dados/2025 --processos 8 --conexoes 4
+
+O processamento dos arquivos (leitura, limpeza e validação) roda em um
+pool de processos; a gravação usa no máximo --conexoes conexões simultâneas
+com o banco. A convenção de nome dos arquivos está em utils/ingestao.py.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait
+)
+
+from utils.ingestao import (
+    carregar_manifesto,
+    gravar_balancete,
+    listar_tarefas_diretorio,
+    processar_arquivo,
+    resolver_empresas
+)
+
+
+USUARIO_PADRAO = "importacao-lote"
+
+
+def importar_lote(tarefas, empresas, processos, conexoes, usuario):
+    """
+    Processa e grava as tarefas em paralelo
+
+    A quantidade de arquivos em andamento é limitada para que os DataFrames
+    processados não se acumulem em memória enquanto aguardam gravação.
+
+    Args:
+        tarefas: DataFrame com arquivo, empresa, mes e ano
+        empresas: dict identificador -> (razao_social, plano_contas_id)
+        processos: tamanho do pool de processamento
+        conexoes: máximo de gravações simultâneas
+        usuario: identificação gravada em user_importacao
+
+    Returns:
+        tuple (resultados: list de (arquivo, sucesso, mensagem), linhas: int)
+    """
+    total = len(tarefas)
+    limite_em_andamento = processos + 2 * conexoes
+    fila = iter(tarefas.itertuples(index=False))
+
+    resultados = []
+    linhas_gravadas = 0
+    inicio = time.perf_counter()
+
+    processando = {}
+    gravando = {}
+
+    with ProcessPoolExecutor(max_workers=processos) as pool_processos, \
+            ThreadPoolExecutor(max_workers=conexoes) as pool_gravacao:
+
+        def abastecer():
+            while len(processando) + len(gravando) < limite_em_andamento:
+                tarefa = next(fila, None)
+                if tarefa is None:
+                    return
+                futuro = pool_processos.submit(processar_arquivo, tarefa.arquivo)
+                processando[futuro] = tarefa
+
+        def registrar(tarefa, sucesso, mensagem):
+            resultados.append((tarefa.arquivo, sucesso, mensagem))
+            decorrido = max(time.perf_counter() - inicio, 1e-6)
+            print(
+                f"[{len(resultados)}/{total}] {'✅' if sucesso else '❌'} "
+                f"{os.path.basename(tarefa.arquivo)} | "
+                f"{len(resultados) / decorrido:.2f} arq/s | "
+                f"{linhas_gravadas / decorrido:,.0f} linhas/s"
+            )
+
+        abastecer()
+
+        while processando or gravando:
+            concluidos, _ = wait(
+                list(processando) + list(gravando), return_when=FIRST_COMPLETED)
+
+            for futuro in concluidos:
+                if futuro in processando:
+                    tarefa = processando.pop(futuro)
+                    try:
+                        sucesso, mensagem, df = futuro.result()
+                    except Exception as e:
+                        sucesso, mensagem, df = False, f"❌ Erro no processamento: {e}", None
+
+                    if not sucesso:
+                        registrar(tarefa, False, mensagem)
+                        continue
+
+                    futuro_gravacao = pool_gravacao.submit(
+                        gravar_balancete, empresas[tarefa.empresa],
+                        tarefa.mes, tarefa.ano, df, usuario)
+                    gravando[futuro_gravacao] = (tarefa, len(df))
+                else:
+                    tarefa, linhas = gravando.pop(futuro)
+                    try:
+                        sucesso, mensagem = futuro.result()
+                    except Exception as e:
+                        sucesso, mensagem = False, f"❌ Erro na gravação: {e}"
+
+                    if sucesso:
+                        linhas_gravadas += linhas
+                    registrar(tarefa, sucesso, mensagem)
+
+            abastecer()
+
+    return (resultados, linhas_gravadas)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Importa balancetes em lote a partir de uma pasta ou manifesto")
+    parser.add_argument(
+        "origem", help="pasta com os arquivos ou manifesto CSV (arquivo;empresa;mes;ano)")
+    parser.add_argument(
+        "--processos", type=int, default=os.cpu_count() or 2,
+        help="processos para ler e validar os arquivos (padrão: nº de CPUs)")
+    parser.add_argument(
+        "--conexoes", type=int, default=4,
+        help="máximo de conexões simultâneas gravando no banco (padrão: 4)")
+    parser.add_argument(
+        "--usuario", default=USUARIO_PADRAO,
+        help=f"identificação gravada na importação (padrão: {USUARIO_PADRAO})")
+    args = parser.parse_args()
+
+    # 1. Montar tarefas
+    if os.path.isdir(args.origem):
+        tarefas, ignorados = listar_tarefas_diretorio(args.origem)
+        for nome in ignorados:
+            print(f"⚠️ Ignorado (fora da convenção de nome): {nome}")
+    else:
+        sucesso, mensagem, tarefas = carregar_manifesto(args.origem)
+        print(mensagem)
+        if not sucesso:
+            return 1
+
+    # Mesmo período informado mais de uma vez: vale o último
+    duplicadas = tarefas.duplicated(subset=["empresa", "mes", "ano"], keep="last")
+    for tarefa in tarefas[duplicadas].itertuples(index=False):
+        print(f"⚠️ Período repetido, ignorado: {tarefa.arquivo}")
+    tarefas = tarefas[~duplicadas]
+
+    # 2. Resolver empresas (uma consulta para o lote inteiro)
+    empresas = resolver_empresas(tarefas["empresa"].tolist())
+
+    falhas = [
+        (tarefa.arquivo, False, f"❌ Empresa '{tarefa.empresa}' não encontrada")
+        for tarefa in tarefas.itertuples(index=False)
+        if tarefa.empresa not in empresas
+    ]
+    tarefas = tarefas[tarefas["empresa"].isin(list(empresas))]
+
+    if tarefas.empty:
+        print("❌ Nenhum arquivo para importar")
+        for arquivo, _, mensagem in falhas:
+            print(f"   {arquivo}: {mensagem}")
+        return 1
+
+    print(
+        f"🔄 Importando {len(tarefas)} arquivo(s) com {args.processos} processo(s) "
+        f"e {args.conexoes} conexão(ões)...")
+
+    # 3. Processar e gravar
+    inicio = time.perf_counter()
+    resultados, linhas = importar_lote(
+        tarefas, empresas, max(args.processos, 1), max(args.conexoes, 1), args.usuario)
+    decorrido = max(time.perf_counter() - inicio, 1e-6)
+
+    falhas += [r for r in resultados if not r[1]]
+    importados = sum(1 for r in resultados if r[1])
+
+    # 4. Resumo
+    print("\n" + "=" * 60)
+    print(f"✅ Importados: {importados} | ❌ Falhas: {len(falhas)}")
+    print(
+        f"⏱️ {decorrido:.1f}s | {importados / decorrido:.2f} arq/s | "
+        f"{linhas / decorrido:,.0f} linhas/s")
+
+    if falhas:
+        print("\n❌ Relatório de falhas:")
+        for arquivo, _, mensagem in falhas:
+            print(f"   {arquivo}: {mensagem}")
+
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
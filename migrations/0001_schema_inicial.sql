@@ -0,0 +1,54 @@
+-- 0001 - Schema inicial (empresa, balancete, balancete_itens, vw_empresa_balancete)
+-- Idempotente: em bancos já existentes apenas registra a versão.
+
+CREATE TABLE IF NOT EXISTS public.empresa (
+    id              bigserial PRIMARY KEY,
+    plano_contas_id integer,
+    abreviacao      text NOT NULL,
+    razao_social    text NOT NULL,
+    cnpj            varchar(14) NOT NULL,
+    cnpj_form       varchar(18),
+    fl_controladora boolean NOT NULL DEFAULT false,
+    fl_controlada   boolean NOT NULL DEFAULT false,
+    fl_operacional  boolean NOT NULL DEFAULT false,
+    fl_patrimonial  boolean NOT NULL DEFAULT false,
+    fl_ativa        boolean NOT NULL DEFAULT true,
+    fl_inativa      boolean NOT NULL DEFAULT false
+);
+
+CREATE TABLE IF NOT EXISTS public.balancete (
+    id              bigserial PRIMARY KEY,
+    empresa_id      bigint NOT NULL,
+    mes             smallint NOT NULL,
+    ano             smallint NOT NULL,
+    user_importacao text,
+    dt_importacao   timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.balancete_itens (
+    id             bigserial PRIMARY KEY,
+    balancete_id   bigint NOT NULL,
+    nivel          text,
+    conta          text NOT NULL,
+    descricao      text,
+    saldo_anterior numeric(18, 2) NOT NULL DEFAULT 0,
+    val_debito     numeric(18, 2) NOT NULL DEFAULT 0,
+    val_credito    numeric(18, 2) NOT NULL DEFAULT 0,
+    saldo_atual    numeric(18, 2) NOT NULL DEFAULT 0
+);
+
+DROP VIEW IF EXISTS public.vw_empresa_balancete;
+
+CREATE VIEW public.vw_empresa_balancete AS
+SELECT
+    e.id             AS empresa_id,
+    e.razao_social,
+    e.cnpj_form,
+    e.abreviacao,
+    b.id             AS balancete_id,
+    b.ano,
+    b.mes,
+    b.dt_importacao  AS balancete_dt_importacao,
+    b.user_importacao
+FROM public.balancete b
+JOIN public.empresa e ON e.id = b.empresa_id;
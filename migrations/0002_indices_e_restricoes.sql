@@ -0,0 +1,47 @@
+-- 0002 - Restrições e índices usados pelo fluxo de importação e pelas listagens
+
+-- Um único balancete por empresa + período: importar_balancete_completo
+-- deleta e regrava por (empresa_id, mes, ano). O índice único também
+-- atende ao filtro (empresa_id, ano, mes) das listagens e do delete.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'uq_balancete_empresa_periodo'
+    ) THEN
+        ALTER TABLE public.balancete
+            ADD CONSTRAINT uq_balancete_empresa_periodo UNIQUE (empresa_id, ano, mes);
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'ck_balancete_mes'
+    ) THEN
+        ALTER TABLE public.balancete
+            ADD CONSTRAINT ck_balancete_mes CHECK (mes BETWEEN 1 AND 12);
+    END IF;
+
+    -- Empresas são inativadas (soft delete), nunca removidas com balancetes
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE contype = 'f'
+          AND conrelid = 'public.balancete'::regclass
+          AND confrelid = 'public.empresa'::regclass
+    ) THEN
+        ALTER TABLE public.balancete
+            ADD CONSTRAINT fk_balancete_empresa FOREIGN KEY (empresa_id)
+            REFERENCES public.empresa (id) ON DELETE RESTRICT;
+    END IF;
+END $$;
+
+-- Ordenação padrão de listar_balancetes
+CREATE INDEX IF NOT EXISTS ix_balancete_dt_importacao
+    ON public.balancete (dt_importacao DESC);
+
+-- obter_empresa_id_por_razao_social / filtro por empresa
+CREATE INDEX IF NOT EXISTS ix_empresa_razao_social
+    ON public.empresa (razao_social);
+
+-- cadastrar_empresa / buscar_empresa_por_cnpj
+CREATE UNIQUE INDEX IF NOT EXISTS uq_empresa_cnpj
+    ON public.empresa (cnpj);
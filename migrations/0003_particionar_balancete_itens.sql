@@ -0,0 +1,88 @@
+-- 0003 - Particiona balancete_itens por ano (RANGE) e cria os índices dos itens
+--
+-- A coluna "ano" é copiada do cabeçalho para os itens porque a chave de
+-- partição precisa estar na própria tabela (e na chave primária).
+-- As partições anuais são criadas sob demanda por
+-- public.garantir_particao_balancete_itens(ano), chamada por inserir_balancete.
+
+CREATE OR REPLACE FUNCTION public.garantir_particao_balancete_itens(p_ano integer)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_particao text := format('balancete_itens_%s', p_ano);
+BEGIN
+    IF to_regclass(format('public.%I', v_particao)) IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    -- Serializa importações concorrentes do mesmo ano
+    PERFORM pg_advisory_xact_lock(hashtext('balancete_itens_particao'), p_ano);
+
+    IF to_regclass(format('public.%I', v_particao)) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.balancete_itens FOR VALUES FROM (%s) TO (%s)',
+            v_particao, p_ano, p_ano + 1
+        );
+    END IF;
+END $$;
+
+
+DO $$
+DECLARE
+    v_ano integer;
+BEGIN
+    IF (SELECT relkind FROM pg_class
+        WHERE oid = 'public.balancete_itens'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE public.balancete_itens RENAME TO balancete_itens_legado;
+
+    CREATE SEQUENCE IF NOT EXISTS public.seq_balancete_itens;
+
+    CREATE TABLE public.balancete_itens (
+        id             bigint NOT NULL DEFAULT nextval('public.seq_balancete_itens'),
+        balancete_id   bigint NOT NULL,
+        ano            smallint NOT NULL,
+        nivel          text,
+        conta          text NOT NULL,
+        descricao      text,
+        saldo_anterior numeric(18, 2) NOT NULL DEFAULT 0,
+        val_debito     numeric(18, 2) NOT NULL DEFAULT 0,
+        val_credito    numeric(18, 2) NOT NULL DEFAULT 0,
+        saldo_atual    numeric(18, 2) NOT NULL DEFAULT 0,
+        CONSTRAINT pk_balancete_itens PRIMARY KEY (ano, id),
+        CONSTRAINT fk_balancete_itens_balancete FOREIGN KEY (balancete_id)
+            REFERENCES public.balancete (id) ON DELETE CASCADE
+    ) PARTITION BY RANGE (ano);
+
+    ALTER SEQUENCE public.seq_balancete_itens OWNED BY public.balancete_itens.id;
+
+    FOR v_ano IN SELECT DISTINCT ano FROM public.balancete LOOP
+        PERFORM public.garantir_particao_balancete_itens(v_ano);
+    END LOOP;
+
+    INSERT INTO public.balancete_itens (
+        id, balancete_id, ano, nivel, conta, descricao,
+        saldo_anterior, val_debito, val_credito, saldo_atual
+    )
+    SELECT
+        i.id, i.balancete_id, b.ano, i.nivel, i.conta, i.descricao,
+        i.saldo_anterior, i.val_debito, i.val_credito, i.saldo_atual
+    FROM public.balancete_itens_legado i
+    JOIN public.balancete b ON b.id = i.balancete_id;
+
+    PERFORM setval(
+        'public.seq_balancete_itens',
+        COALESCE((SELECT max(id) FROM public.balancete_itens), 0) + 1,
+        false
+    );
+
+    DROP TABLE public.balancete_itens_legado;
+END $$;
+
+-- Itens de um balancete (delete em cascata, leitura por balancete) e
+-- alinhamento por conta dentro do balancete
+CREATE INDEX IF NOT EXISTS ix_balancete_itens_balancete_conta
+    ON public.balancete_itens (balancete_id, conta);
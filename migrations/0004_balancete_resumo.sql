@@ -0,0 +1,112 @@
+-- 0004 - Tabela materializada balancete_resumo (substitui vw_empresa_balancete
+-- nas listagens)
+--
+-- Uma linha por balancete com os dados da empresa desnormalizados, contagem
+-- de itens e totais. Mantida pelo fluxo de importação (inserir_balancete) e
+-- pelo CRUD de empresas (atualizar_empresa / deletar_empresa) através das
+-- funções abaixo; a remoção de um balancete remove o resumo em cascata.
+
+CREATE TABLE IF NOT EXISTS public.balancete_resumo (
+    balancete_id         bigint PRIMARY KEY
+        REFERENCES public.balancete (id) ON DELETE CASCADE,
+    empresa_id           bigint NOT NULL,
+    razao_social         text NOT NULL,
+    cnpj_form            varchar(18),
+    abreviacao           text,
+    fl_ativa             boolean NOT NULL DEFAULT true,
+    ano                  smallint NOT NULL,
+    mes                  smallint NOT NULL,
+    dt_importacao        timestamptz NOT NULL,
+    user_importacao      text,
+    qtd_itens            integer NOT NULL DEFAULT 0,
+    total_saldo_anterior numeric(18, 2) NOT NULL DEFAULT 0,
+    total_debito         numeric(18, 2) NOT NULL DEFAULT 0,
+    total_credito        numeric(18, 2) NOT NULL DEFAULT 0,
+    total_saldo_atual    numeric(18, 2) NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_balancete_resumo_dt_importacao
+    ON public.balancete_resumo (dt_importacao DESC);
+
+CREATE INDEX IF NOT EXISTS ix_balancete_resumo_razao_periodo
+    ON public.balancete_resumo (razao_social, ano, mes);
+
+CREATE INDEX IF NOT EXISTS ix_balancete_resumo_periodo
+    ON public.balancete_resumo (ano, mes);
+
+CREATE INDEX IF NOT EXISTS ix_balancete_resumo_empresa_periodo
+    ON public.balancete_resumo (empresa_id, ano, mes);
+
+
+-- Recalcula o resumo de um balancete (chamada após inserir os itens)
+CREATE OR REPLACE FUNCTION public.atualizar_resumo_balancete(p_balancete_id bigint)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO public.balancete_resumo (
+        balancete_id, empresa_id, razao_social, cnpj_form, abreviacao, fl_ativa,
+        ano, mes, dt_importacao, user_importacao,
+        qtd_itens, total_saldo_anterior, total_debito, total_credito, total_saldo_atual
+    )
+    SELECT
+        b.id, e.id, e.razao_social, e.cnpj_form, e.abreviacao, e.fl_ativa,
+        b.ano, b.mes, b.dt_importacao, b.user_importacao,
+        COALESCE(i.qtd_itens, 0),
+        COALESCE(i.total_saldo_anterior, 0),
+        COALESCE(i.total_debito, 0),
+        COALESCE(i.total_credito, 0),
+        COALESCE(i.total_saldo_atual, 0)
+    FROM public.balancete b
+    JOIN public.empresa e ON e.id = b.empresa_id
+    LEFT JOIN LATERAL (
+        SELECT
+            count(*)            AS qtd_itens,
+            sum(saldo_anterior) AS total_saldo_anterior,
+            sum(val_debito)     AS total_debito,
+            sum(val_credito)    AS total_credito,
+            sum(saldo_atual)    AS total_saldo_atual
+        FROM public.balancete_itens
+        WHERE balancete_id = b.id
+          AND ano = b.ano
+    ) i ON true
+    WHERE b.id = p_balancete_id
+    ON CONFLICT (balancete_id) DO UPDATE SET
+        empresa_id           = EXCLUDED.empresa_id,
+        razao_social         = EXCLUDED.razao_social,
+        cnpj_form            = EXCLUDED.cnpj_form,
+        abreviacao           = EXCLUDED.abreviacao,
+        fl_ativa             = EXCLUDED.fl_ativa,
+        ano                  = EXCLUDED.ano,
+        mes                  = EXCLUDED.mes,
+        dt_importacao        = EXCLUDED.dt_importacao,
+        user_importacao      = EXCLUDED.user_importacao,
+        qtd_itens            = EXCLUDED.qtd_itens,
+        total_saldo_anterior = EXCLUDED.total_saldo_anterior,
+        total_debito         = EXCLUDED.total_debito,
+        total_credito        = EXCLUDED.total_credito,
+        total_saldo_atual    = EXCLUDED.total_saldo_atual;
+$$;
+
+
+-- Propaga alterações cadastrais da empresa para os resumos
+CREATE OR REPLACE FUNCTION public.atualizar_resumo_empresa(p_empresa_id bigint)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE public.balancete_resumo r
+    SET razao_social = e.razao_social,
+        cnpj_form    = e.cnpj_form,
+        abreviacao   = e.abreviacao,
+        fl_ativa     = e.fl_ativa
+    FROM public.empresa e
+    WHERE e.id = p_empresa_id
+      AND r.empresa_id = e.id;
+$$;
+
+
+-- Carga inicial dos balancetes já importados
+SELECT public.atualizar_resumo_balancete(b.id)
+FROM public.balancete b
+WHERE NOT EXISTS (
+    SELECT 1 FROM public.balancete_resumo r WHERE r.balancete_id = b.id
+);
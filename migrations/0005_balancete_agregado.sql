@@ -0,0 +1,178 @@
+-- 0005 - Agregados por balancete calculados na importação
+--
+-- Gravados por inserir_balancete na mesma transação do cabeçalho e dos itens.
+-- Totais e saldos por grupo consideram apenas contas analíticas.
+
+CREATE TABLE IF NOT EXISTS public.balancete_agregado (
+    balancete_id         bigint PRIMARY KEY
+        REFERENCES public.balancete (id) ON DELETE CASCADE,
+    qtd_itens            integer NOT NULL DEFAULT 0,
+    qtd_ignorados        integer NOT NULL DEFAULT 0,
+    qtd_analiticas       integer NOT NULL DEFAULT 0,
+    total_saldo_anterior numeric(18, 2) NOT NULL DEFAULT 0,
+    total_debito         numeric(18, 2) NOT NULL DEFAULT 0,
+    total_credito        numeric(18, 2) NOT NULL DEFAULT 0,
+    total_saldo_atual    numeric(18, 2) NOT NULL DEFAULT 0,
+    saldo_ativo          numeric(18, 2) NOT NULL DEFAULT 0,
+    saldo_passivo        numeric(18, 2) NOT NULL DEFAULT 0,
+    saldo_pl             numeric(18, 2) NOT NULL DEFAULT 0,
+    saldo_receitas       numeric(18, 2) NOT NULL DEFAULT 0,
+    saldo_despesas       numeric(18, 2) NOT NULL DEFAULT 0
+);
+
+-- Saldos por grupo também no resumo (telas leem uma única tabela)
+ALTER TABLE public.balancete_resumo
+    ADD COLUMN IF NOT EXISTS saldo_ativo    numeric(18, 2),
+    ADD COLUMN IF NOT EXISTS saldo_passivo  numeric(18, 2),
+    ADD COLUMN IF NOT EXISTS saldo_pl       numeric(18, 2),
+    ADD COLUMN IF NOT EXISTS saldo_receitas numeric(18, 2),
+    ADD COLUMN IF NOT EXISTS saldo_despesas numeric(18, 2);
+
+
+-- O resumo passa a usar os agregados gravados na importação; balancetes
+-- antigos (sem agregado) continuam sendo totalizados a partir dos itens.
+CREATE OR REPLACE FUNCTION public.atualizar_resumo_balancete(p_balancete_id bigint)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO public.balancete_resumo (
+        balancete_id, empresa_id, razao_social, cnpj_form, abreviacao, fl_ativa,
+        ano, mes, dt_importacao, user_importacao,
+        qtd_itens, total_saldo_anterior, total_debito, total_credito, total_saldo_atual,
+        saldo_ativo, saldo_passivo, saldo_pl, saldo_receitas, saldo_despesas
+    )
+    SELECT
+        b.id, e.id, e.razao_social, e.cnpj_form, e.abreviacao, e.fl_ativa,
+        b.ano, b.mes, b.dt_importacao, b.user_importacao,
+        COALESCE(a.qtd_itens, i.qtd_itens, 0),
+        COALESCE(a.total_saldo_anterior, i.total_saldo_anterior, 0),
+        COALESCE(a.total_debito, i.total_debito, 0),
+        COALESCE(a.total_credito, i.total_credito, 0),
+        COALESCE(a.total_saldo_atual, i.total_saldo_atual, 0),
+        a.saldo_ativo, a.saldo_passivo, a.saldo_pl, a.saldo_receitas, a.saldo_despesas
+    FROM public.balancete b
+    JOIN public.empresa e ON e.id = b.empresa_id
+    LEFT JOIN public.balancete_agregado a ON a.balancete_id = b.id
+    LEFT JOIN LATERAL (
+        SELECT
+            count(*)            AS qtd_itens,
+            sum(saldo_anterior) AS total_saldo_anterior,
+            sum(val_debito)     AS total_debito,
+            sum(val_credito)    AS total_credito,
+            sum(saldo_atual)    AS total_saldo_atual
+        FROM public.balancete_itens
+        WHERE a.balancete_id IS NULL
+          AND balancete_id = b.id
+          AND ano = b.ano
+    ) i ON true
+    WHERE b.id = p_balancete_id
+    ON CONFLICT (balancete_id) DO UPDATE SET
+        empresa_id           = EXCLUDED.empresa_id,
+        razao_social         = EXCLUDED.razao_social,
+        cnpj_form            = EXCLUDED.cnpj_form,
+        abreviacao           = EXCLUDED.abreviacao,
+        fl_ativa             = EXCLUDED.fl_ativa,
+        ano                  = EXCLUDED.ano,
+        mes                  = EXCLUDED.mes,
+        dt_importacao        = EXCLUDED.dt_importacao,
+        user_importacao      = EXCLUDED.user_importacao,
+        qtd_itens            = EXCLUDED.qtd_itens,
+        total_saldo_anterior = EXCLUDED.total_saldo_anterior,
+        total_debito         = EXCLUDED.total_debito,
+        total_credito        = EXCLUDED.total_credito,
+        total_saldo_atual    = EXCLUDED.total_saldo_atual,
+        saldo_ativo          = EXCLUDED.saldo_ativo,
+        saldo_passivo        = EXCLUDED.saldo_passivo,
+        saldo_pl             = EXCLUDED.saldo_pl,
+        saldo_receitas       = EXCLUDED.saldo_receitas,
+        saldo_despesas       = EXCLUDED.saldo_despesas;
+$$;
+
+
+-- Carga dos agregados dos balancetes importados antes desta migração, com as
+-- mesmas regras de balancete_agregados.py:
+--   * analítica: conta sem filha no próprio balancete. Com os códigos em
+--     ordem binária, a sintética é seguida por uma filha (mesmo prefixo +
+--     separador, "." quando o balancete usa pontos);
+--   * grupo: prefixo mais longo por segmentos inteiros do código, sem zeros
+--     à esquerda ("2.3" = PL dentro do passivo "2"; cobre 2.03.01, mas não
+--     2.31 nem 23.1); códigos sem separador usam os dígitos ("23...").
+-- Os itens gravados são somente os com movimento, então qtd_ignorados fica 0.
+INSERT INTO public.balancete_agregado (
+    balancete_id, qtd_itens, qtd_ignorados, qtd_analiticas,
+    total_saldo_anterior, total_debito, total_credito, total_saldo_atual,
+    saldo_ativo, saldo_passivo, saldo_pl, saldo_receitas, saldo_despesas
+)
+WITH itens AS (
+    SELECT
+        i.balancete_id,
+        i.conta,
+        i.saldo_anterior,
+        i.val_debito,
+        i.val_credito,
+        i.saldo_atual,
+        regexp_replace(i.conta, '\D', '', 'g') AS digitos,
+        btrim(regexp_replace(
+            regexp_replace(btrim(i.conta), '(^|\D)0+(?=\d)', '\1', 'g'),
+            '\D+', '.', 'g'), '.') AS segmentos,
+        btrim(i.conta) !~ '\D' AS sem_separador,
+        CASE WHEN bool_or(strpos(i.conta, '.') > 0)
+                  OVER (PARTITION BY i.balancete_id)
+             THEN '.' ELSE '' END AS separador,
+        lead(i.conta) OVER (
+            PARTITION BY i.balancete_id ORDER BY i.conta COLLATE "C") AS proxima
+    FROM public.balancete_itens i
+    JOIN public.balancete b
+      ON b.id = i.balancete_id
+     AND b.ano = i.ano
+    WHERE NOT EXISTS (
+        SELECT 1 FROM public.balancete_agregado a WHERE a.balancete_id = b.id
+    )
+),
+classificados AS (
+    SELECT
+        balancete_id, saldo_anterior, val_debito, val_credito, saldo_atual,
+        NOT COALESCE(
+            left(proxima, length(conta) + length(separador)) = conta || separador
+            AND length(proxima) > length(conta),
+            false) AS analitica,
+        CASE
+            WHEN sem_separador THEN
+                CASE
+                    WHEN digitos LIKE '23%' THEN 'pl'
+                    WHEN digitos LIKE '1%'  THEN 'ativo'
+                    WHEN digitos LIKE '2%'  THEN 'passivo'
+                    WHEN digitos LIKE '3%'  THEN 'receitas'
+                    WHEN digitos LIKE '4%'  THEN 'despesas'
+                END
+            WHEN segmentos = '2.3' OR segmentos LIKE '2.3.%' THEN 'pl'
+            WHEN segmentos = '1'   OR segmentos LIKE '1.%'   THEN 'ativo'
+            WHEN segmentos = '2'   OR segmentos LIKE '2.%'   THEN 'passivo'
+            WHEN segmentos = '3'   OR segmentos LIKE '3.%'   THEN 'receitas'
+            WHEN segmentos = '4'   OR segmentos LIKE '4.%'   THEN 'despesas'
+        END AS grupo
+    FROM itens
+)
+SELECT
+    balancete_id,
+    count(*),
+    0,
+    count(*) FILTER (WHERE analitica),
+    COALESCE(sum(saldo_anterior) FILTER (WHERE analitica), 0),
+    COALESCE(sum(val_debito)     FILTER (WHERE analitica), 0),
+    COALESCE(sum(val_credito)    FILTER (WHERE analitica), 0),
+    COALESCE(sum(saldo_atual)    FILTER (WHERE analitica), 0),
+    COALESCE(sum(saldo_atual) FILTER (WHERE analitica AND grupo = 'ativo'), 0),
+    COALESCE(sum(saldo_atual) FILTER (WHERE analitica AND grupo = 'passivo'), 0),
+    COALESCE(sum(saldo_atual) FILTER (WHERE analitica AND grupo = 'pl'), 0),
+    COALESCE(sum(saldo_atual) FILTER (WHERE analitica AND grupo = 'receitas'), 0),
+    COALESCE(sum(saldo_atual) FILTER (WHERE analitica AND grupo = 'despesas'), 0)
+FROM classificados
+GROUP BY balancete_id;
+
+-- Resumo dos balancetes antigos passa a usar os agregados (totais e saldos
+-- por grupo somente das contas analíticas, como nas novas importações)
+SELECT public.atualizar_resumo_balancete(a.balancete_id)
+FROM public.balancete_agregado a
+JOIN public.balancete_resumo r ON r.balancete_id = a.balancete_id
+WHERE r.saldo_ativo IS NULL;
@@ -0,0 +1,24 @@
+-- 0006 - Grupos econômicos e regras de eliminação para consolidação
+--
+-- empresa.controladora_id liga cada controlada à sua controladora.
+-- regra_eliminacao define os prefixos de conta (saldos intercompany)
+-- eliminados na consolidação; controladora_id NULL vale para todos os grupos.
+
+ALTER TABLE public.empresa
+    ADD COLUMN IF NOT EXISTS controladora_id bigint
+        REFERENCES public.empresa (id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS ix_empresa_controladora
+    ON public.empresa (controladora_id)
+    WHERE controladora_id IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS public.regra_eliminacao (
+    id              bigserial PRIMARY KEY,
+    controladora_id bigint REFERENCES public.empresa (id) ON DELETE CASCADE,
+    conta_prefixo   text NOT NULL,
+    descricao       text,
+    fl_ativa        boolean NOT NULL DEFAULT true
+);
+
+CREATE INDEX IF NOT EXISTS ix_regra_eliminacao_controladora
+    ON public.regra_eliminacao (controladora_id);
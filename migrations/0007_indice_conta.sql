@@ -0,0 +1,8 @@
+-- 0007 - Índice por conta em balancete_itens (séries temporais de uma conta)
+--
+-- Permite ler somente as linhas de uma conta em todos os períodos e
+-- empresas; os valores incluídos evitam acesso ao heap das partições.
+
+CREATE INDEX IF NOT EXISTS ix_balancete_itens_conta
+    ON public.balancete_itens (conta, balancete_id)
+    INCLUDE (saldo_anterior, val_debito, val_credito, saldo_atual);
@@ -0,0 +1,41 @@
+-- 0008 - Histórico incremental por conta e anomalias de movimento
+--
+-- conta_estatistica guarda, por (empresa, conta), o movimento de cada
+-- período pontuado em um jsonb {"AAAAMM": [val_debito, val_credito]}. Os
+-- períodos do histórico são os balancetes da empresa com
+-- fl_estatistica = true; meses em que a conta não aparece contam como zero.
+-- Um balancete reimportado sai do histórico com a remoção da sua chave.
+
+ALTER TABLE public.balancete
+    ADD COLUMN IF NOT EXISTS fl_estatistica boolean NOT NULL DEFAULT false;
+
+CREATE TABLE IF NOT EXISTS public.conta_estatistica (
+    empresa_id bigint NOT NULL
+        REFERENCES public.empresa (id) ON DELETE CASCADE,
+    conta      text NOT NULL,
+    historico  jsonb NOT NULL DEFAULT '{}'::jsonb,
+    PRIMARY KEY (empresa_id, conta)
+);
+
+CREATE TABLE IF NOT EXISTS public.balancete_anomalia (
+    id           bigserial PRIMARY KEY,
+    balancete_id bigint NOT NULL
+        REFERENCES public.balancete (id) ON DELETE CASCADE,
+    empresa_id   bigint NOT NULL,
+    ano          smallint NOT NULL,
+    mes          smallint NOT NULL,
+    conta        text NOT NULL,
+    descricao    text,
+    campo        text NOT NULL,
+    valor        double precision NOT NULL,
+    mediana      double precision NOT NULL,
+    desvio       double precision NOT NULL,
+    z_score      double precision NOT NULL,
+    dt_registro  timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_balancete_anomalia_balancete
+    ON public.balancete_anomalia (balancete_id);
+
+CREATE INDEX IF NOT EXISTS ix_balancete_anomalia_periodo
+    ON public.balancete_anomalia (ano, mes);
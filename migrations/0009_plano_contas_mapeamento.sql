@@ -0,0 +1,21 @@
+-- 0009 - Mapeamento do plano de contas da empresa para o plano padrão
+--
+-- Cada plano_contas_id (empresa.plano_contas_id) mapeia seus códigos de
+-- conta para uma conta do plano padrão. O mapeamento é aplicado na
+-- importação e gravado em balancete_itens.conta_padrao, permitindo agrupar
+-- empresas diferentes pela conta padrão sem joins na consulta.
+
+CREATE TABLE IF NOT EXISTS public.plano_contas_mapeamento (
+    plano_contas_id  integer NOT NULL,
+    conta            text NOT NULL,
+    conta_padrao     text NOT NULL,
+    descricao_padrao text,
+    PRIMARY KEY (plano_contas_id, conta)
+);
+
+ALTER TABLE public.balancete_itens
+    ADD COLUMN IF NOT EXISTS conta_padrao text;
+
+CREATE INDEX IF NOT EXISTS ix_balancete_itens_conta_padrao
+    ON public.balancete_itens (conta_padrao, balancete_id)
+    WHERE conta_padrao IS NOT NULL;
@@ -0,0 +1,17 @@
+-- 0010 - Índices de busca em balancete_itens (conta e descrição)
+--
+-- text_pattern_ops atende buscas por prefixo do código da conta
+-- (conta LIKE '1.1.02%') independente da collation do banco. Os índices
+-- GIN de trigramas atendem ILIKE '%termo%' em descricao e conta sem
+-- varrer as partições inteiras.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS ix_balancete_itens_conta_prefixo
+    ON public.balancete_itens (conta text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS ix_balancete_itens_conta_trgm
+    ON public.balancete_itens USING gin (conta gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS ix_balancete_itens_descricao_trgm
+    ON public.balancete_itens USING gin (descricao gin_trgm_ops);
@@ -0,0 +1,40 @@
+-- 0011 - Log de eventos de auditoria (somente inserção)
+--
+-- Cada importação, exclusão de balancete e alteração de empresa grava um
+-- evento na mesma transação da operação. A timeline é lida por paginação
+-- keyset sobre (dt_evento, id), então o custo de uma página não cresce com
+-- o tamanho da tabela.
+
+CREATE TABLE IF NOT EXISTS public.evento_auditoria (
+    id           bigserial PRIMARY KEY,
+    dt_evento    timestamptz NOT NULL DEFAULT now(),
+    tipo         text NOT NULL,
+    usuario      text,
+    empresa_id   bigint,
+    balancete_id bigint,
+    descricao    text NOT NULL,
+    detalhes     jsonb
+);
+
+-- Sem chaves estrangeiras: o evento continua legível depois que o
+-- balancete referenciado é excluído/reimportado
+
+CREATE INDEX IF NOT EXISTS ix_evento_auditoria_dt_evento
+    ON public.evento_auditoria (dt_evento, id);
+
+-- Somente inserção: alterações e exclusões são rejeitadas
+CREATE OR REPLACE FUNCTION public.bloquear_alteracao_evento_auditoria()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RAISE EXCEPTION 'evento_auditoria é somente inserção (% não permitido)', TG_OP;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS tg_evento_auditoria_somente_insercao
+    ON public.evento_auditoria;
+
+CREATE TRIGGER tg_evento_auditoria_somente_insercao
+    BEFORE UPDATE OR DELETE ON public.evento_auditoria
+    FOR EACH ROW EXECUTE FUNCTION public.bloquear_alteracao_evento_auditoria();
@@ -0,0 +1,255 @@
+"""
+monitorar_pasta.py - Serviço de importação automática da pasta de dados
+
+Uso:
+    python monitorar_pasta.py                    # pasta PASTA_DADOS (padrão: dados)
+    python monitorar_pasta.py dados --workers 2
+
+Arquivos que chegam na pasta são identificados pelo arquivo lateral
+<arquivo>.json ou pela convenção de nome de utils/ingestao.py, aguardam o
+tamanho estabilizar (cópias em andamento) e entram numa fila consumida por
+um pool pequeno de workers. Após a importação o arquivo (e o lateral) vai
+para done/ ou failed/; em failed/ fica também <arquivo>.erro.txt com o motivo.
+"""
+
+import argparse
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from utils.ingestao import (
+    EXTENSAO_ARQUIVO_LATERAL,
+    EXTENSOES_BALANCETE,
+    gravar_balancete,
+    identificar_arquivo,
+    obter_pasta_dados,
+    processar_arquivo,
+    resolver_empresas
+)
+
+
+USUARIO_MONITOR = "monitor-pasta"
+
+PASTA_SUCESSO = "done"
+PASTA_FALHA = "failed"
+
+# Segundos sem alteração de tamanho/data para considerar o arquivo completo
+SEGUNDOS_ESTABILIDADE = 5.0
+
+# Intervalo da verificação de estabilidade
+INTERVALO_VERIFICACAO = 1.0
+
+
+class MonitorPasta(FileSystemEventHandler):
+    """
+    Recebe os eventos da pasta e entrega à fila os arquivos já estáveis
+    """
+
+    def __init__(self, pasta):
+        super().__init__()
+        self.pasta = pasta
+        self.fila = queue.Queue()
+        self.pendentes = {}   # caminho -> (tamanho, mtime, instante da última mudança)
+        self.enfileirados = set()
+        self.lock = threading.Lock()
+
+    def registrar(self, caminho):
+        """Registra (ou renova) um arquivo candidato à importação"""
+        if os.path.dirname(os.path.abspath(caminho)) != os.path.abspath(self.pasta):
+            return
+        if not caminho.lower().endswith(EXTENSOES_BALANCETE):
+            return
+
+        with self.lock:
+            if caminho not in self.enfileirados:
+                self.pendentes[caminho] = (None, None, time.monotonic())
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.registrar(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.registrar(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.registrar(event.dest_path)
+
+    def verificar_estabilidade(self):
+        """Move para a fila os arquivos sem alteração há SEGUNDOS_ESTABILIDADE"""
+        agora = time.monotonic()
+
+        with self.lock:
+            for caminho, (tamanho, mtime, desde) in list(self.pendentes.items()):
+                try:
+                    estado = os.stat(caminho)
+                except FileNotFoundError:
+                    del self.pendentes[caminho]
+                    continue
+
+                if (estado.st_size, estado.st_mtime) != (tamanho, mtime):
+                    self.pendentes[caminho] = (estado.st_size, estado.st_mtime, agora)
+                elif estado.st_size > 0 and agora - desde >= SEGUNDOS_ESTABILIDADE:
+                    del self.pendentes[caminho]
+                    self.enfileirados.add(caminho)
+                    self.fila.put(caminho)
+
+    def concluir(self, caminho):
+        """Libera o caminho para uma nova chegada com o mesmo nome"""
+        with self.lock:
+            self.enfileirados.discard(caminho)
+
+
+def mover_arquivo(caminho, subpasta, erro=None):
+    """
+    Move o arquivo (e o lateral .json) para done/ ou failed/
+
+    Args:
+        caminho: caminho do arquivo importado
+        subpasta: PASTA_SUCESSO ou PASTA_FALHA
+        erro: mensagem gravada em <arquivo>.erro.txt (somente falhas)
+    """
+    destino = os.path.join(os.path.dirname(caminho), subpasta)
+    os.makedirs(destino, exist_ok=True)
+
+    nome = os.path.basename(caminho)
+    if os.path.exists(os.path.join(destino, nome)):
+        base, extensao = os.path.splitext(nome)
+        nome = f"{base}_{datetime.now():%Y%m%d%H%M%S}{extensao}"
+
+    shutil.move(caminho, os.path.join(destino, nome))
+
+    caminho_lateral = caminho + EXTENSAO_ARQUIVO_LATERAL
+    if os.path.isfile(caminho_lateral):
+        shutil.move(caminho_lateral, os.path.join(
+            destino, nome + EXTENSAO_ARQUIVO_LATERAL))
+
+    if erro:
+        with open(os.path.join(destino, nome + ".erro.txt"), "w", encoding="utf-8") as arquivo:
+            arquivo.write(erro + "\n")
+
+
+def importar_arquivo(caminho, usuario):
+    """
+    Identifica, processa e grava um arquivo da pasta monitorada
+
+    Args:
+        caminho: caminho do arquivo
+        usuario: identificação gravada em user_importacao
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str)
+    """
+    identificacao = identificar_arquivo(caminho)
+    if identificacao is None:
+        return (False, "❌ Empresa/mês/ano não identificados (nome fora da convenção e sem arquivo .json)")
+
+    empresa, mes, ano = identificacao
+
+    empresas = resolver_empresas([empresa])
+    if empresa not in empresas:
+        return (False, f"❌ Empresa '{empresa}' não encontrada")
+
+    sucesso, mensagem, df = processar_arquivo(caminho)
+    if not sucesso:
+        return (False, mensagem)
+
+    return gravar_balancete(empresas[empresa], mes, ano, df, usuario)
+
+
+def consumir_fila(monitor, usuario):
+    """
+    Worker: importa os arquivos da fila até receber None
+
+    Args:
+        monitor: instância de MonitorPasta
+        usuario: identificação gravada em user_importacao
+    """
+    while True:
+        caminho = monitor.fila.get()
+        if caminho is None:
+            return
+
+        inicio = time.perf_counter()
+        try:
+            sucesso, mensagem = importar_arquivo(caminho, usuario)
+        except Exception as e:
+            sucesso, mensagem = False, f"❌ Erro inesperado: {e}"
+
+        try:
+            mover_arquivo(caminho, PASTA_SUCESSO if sucesso else PASTA_FALHA,
+                          None if sucesso else mensagem)
+        except OSError as e:
+            print(f"❌ Erro ao mover {caminho}: {e}")
+
+        monitor.concluir(caminho)
+        print(
+            f"{'✅' if sucesso else '❌'} {os.path.basename(caminho)} "
+            f"({time.perf_counter() - inicio:.1f}s): {mensagem}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Monitora a pasta de dados e importa os balancetes que chegarem")
+    parser.add_argument(
+        "pasta", nargs="?", default=None,
+        help="pasta monitorada (padrão: PASTA_DADOS do secrets.toml ou 'dados')")
+    parser.add_argument(
+        "--workers", type=int, default=2,
+        help="importações simultâneas (padrão: 2)")
+    parser.add_argument(
+        "--usuario", default=USUARIO_MONITOR,
+        help=f"identificação gravada na importação (padrão: {USUARIO_MONITOR})")
+    args = parser.parse_args()
+
+    pasta = args.pasta or obter_pasta_dados()
+    if not os.path.isdir(pasta):
+        print(f"❌ Pasta não encontrada: {pasta}")
+        return 1
+
+    monitor = MonitorPasta(pasta)
+
+    # Arquivos que já estavam na pasta entram pela mesma verificação
+    for nome in sorted(os.listdir(pasta)):
+        caminho = os.path.join(pasta, nome)
+        if os.path.isfile(caminho):
+            monitor.registrar(caminho)
+
+    observer = Observer()
+    observer.schedule(monitor, pasta, recursive=False)
+    observer.start()
+
+    workers = max(args.workers, 1)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    for _ in range(workers):
+        pool.submit(consumir_fila, monitor, args.usuario)
+
+    print(f"👀 Monitorando {os.path.abspath(pasta)} com {workers} worker(s) (Ctrl+C para sair)")
+
+    try:
+        while True:
+            monitor.verificar_estabilidade()
+            time.sleep(INTERVALO_VERIFICACAO)
+    except KeyboardInterrupt:
+        print("🛑 Encerrando (aguardando importações em andamento)...")
+    finally:
+        observer.stop()
+        observer.join()
+        for _ in range(workers):
+            monitor.fila.put(None)
+        pool.shutdown(wait=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+import math
+
+import streamlit as st
+from utils.auth import require_authentication, get_current_user
+from utils.dashboard_db import (
+    carregar_resumos,
+    carregar_catalogo_empresas,
+    carregar_matriz_completude,
+    carregar_anomalias,
+    limpar_cache_dashboard,
+    calcular_cobertura,
+    totais_por_mes,
+    variacao_mensal,
+    meses_sem_agregado,
+    periodo_anterior
+)
+
+# Configuração da página
+st.set_page_config(
+    page_title="Dashboard - Audit MC",
+    page_icon="📊",
+    layout="wide"
+)
+
+# Verificar autenticação
+require_authentication()
+
+# Obter usuário atual
+user = get_current_user()
+
+# Header
+st.title("📊 Dashboard")
+st.markdown(f"**Usuário:** {user['nome']}")
+st.markdown("---")
+
+# Dados pré-agregados (cache de curta duração)
+with st.spinner("Carregando indicadores..."):
+    sucesso_resumos, msg_resumos, df_resumos = carregar_resumos()
+    sucesso_empresas, msg_empresas, df_empresas = carregar_catalogo_empresas()
+
+if not sucesso_resumos or not sucesso_empresas:
+    st.error(msg_resumos if not sucesso_resumos else msg_empresas)
+    st.stop()
+
+if df_resumos.empty:
+    st.warning("⚠️ Nenhum balancete importado até o momento.")
+    st.stop()
+
+# Filtros
+anos = sorted(df_resumos["ano"].unique().tolist(), reverse=True)
+
+col1, col2, col3 = st.columns([2, 2, 2])
+
+with col1:
+    ano = st.selectbox("Ano", anos, key="dashboard_ano")
+
+meses_com_dados = sorted(
+    df_resumos.loc[df_resumos["ano"] == ano, "mes"].unique().tolist())
+
+with col2:
+    mes = st.selectbox(
+        "Mês",
+        list(range(1, 13)),
+        index=meses_com_dados[-1] - 1,
+        format_func=lambda m: str(m).zfill(2),
+        key="dashboard_mes"
+    )
+
+with col3:
+    st.markdown("<br>", unsafe_allow_html=True)
+    if st.button("🔄 Atualizar", width="stretch"):
+        limpar_cache_dashboard()
+        st.rerun()
+
+st.markdown("---")
+
+# Cobertura de importação
+st.subheader(f"📥 Cobertura de Importação - {str(mes).zfill(2)}/{ano}")
+
+cobertura = calcular_cobertura(df_resumos, df_empresas, ano, mes)
+ano_ant, mes_ant = periodo_anterior(ano, mes)
+cobertura_ant = calcular_cobertura(df_resumos, df_empresas, ano_ant, mes_ant)
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Empresas Ativas", cobertura["empresas_ativas"])
+col2.metric(
+    "Balancetes Importados",
+    cobertura["importadas"],
+    delta=cobertura["importadas"] - cobertura_ant["importadas"]
+)
+col3.metric("Pendentes", cobertura["pendentes"], delta_color="inverse")
+col4.metric("Cobertura", f"{cobertura['percentual']:.1f}%")
+
+st.progress(min(cobertura["percentual"] / 100, 1.0))
+
+st.markdown("---")
+
+# Totais por grupo e variação mensal
+st.subheader("💰 Totais por Grupo (todas as empresas)")
+
+df_variacao = variacao_mensal(df_resumos, ano, mes)
+
+colunas = st.columns(len(df_variacao))
+for coluna, (_, linha) in zip(colunas, df_variacao.iterrows()):
+    coluna.metric(
+        linha["Grupo"],
+        "sem agregado" if math.isnan(linha["Atual"]) else
+        f"R$ {linha['Atual']:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."),
+        delta=None if math.isnan(linha["Variação %"]) else f"{linha['Variação %']:.1f}%"
+    )
+
+periodos_sem_agregado = [
+    f"{str(m).zfill(2)}/{a}" for a, m in ((ano, mes), (ano_ant, mes_ant))
+    if m in meses_sem_agregado(df_resumos, a)
+]
+if periodos_sem_agregado:
+    st.caption(
+        f"ℹ️ {', '.join(periodos_sem_agregado)}: há balancetes sem agregado "
+        "(saldos por grupo não calculados), então o período fica fora dos "
+        "totais e das variações.")
+
+st.dataframe(
+    df_variacao,
+    width="stretch",
+    hide_index=True,
+    column_config={
+        "Atual": st.column_config.NumberColumn("Atual", format="%.2f"),
+        "Anterior": st.column_config.NumberColumn(
+            f"Anterior ({str(mes_ant).zfill(2)}/{ano_ant})", format="%.2f"),
+        "Variação": st.column_config.NumberColumn("Variação", format="%.2f"),
+        "Variação %": st.column_config.NumberColumn("Variação %", format="%.1f%%"),
+    }
+)
+
+st.markdown("---")
+
+# Anomalias de movimento do período
+st.subheader(f"🚨 Movimentos Atípicos - {str(mes).zfill(2)}/{ano}")
+
+sucesso_anomalias, msg_anomalias, df_anomalias = carregar_anomalias(ano, mes)
+
+if not sucesso_anomalias:
+    st.error(msg_anomalias)
+elif df_anomalias.empty:
+    st.success("✅ Nenhuma conta sinalizada no período.")
+else:
+    st.warning(
+        f"⚠️ **{len(df_anomalias)}** movimento(s) atípico(s) em "
+        f"**{df_anomalias['Empresa'].nunique()}** empresa(s)")
+    st.dataframe(
+        df_anomalias.head(50),
+        width="stretch",
+        hide_index=True,
+        column_config={
+            "Valor": st.column_config.NumberColumn("Valor", format="%.2f"),
+            "Mediana": st.column_config.NumberColumn("Mediana", format="%.2f"),
+            "Desvio": st.column_config.NumberColumn("Desvio (MAD)", format="%.2f"),
+            "Z-Score": st.column_config.NumberColumn("Z-Score", format="%.1f"),
+        }
+    )
+
+st.markdown("---")
+
+# Evolução mensal
+st.subheader(f"📈 Evolução Mensal - {ano}")
+
+df_mensal = totais_por_mes(df_resumos, ano)
+df_mensal.index = [str(m).zfill(2) for m in df_mensal.index]
+st.line_chart(df_mensal)
+
+# Balancetes importados por mês
+st.subheader("🗂️ Balancetes Importados por Mês")
+
+qtd_por_mes = (
+    df_resumos[df_resumos["ano"] == ano]
+    .groupby("mes")["empresa_id"]
+    .nunique()
+    .reindex(range(1, 13), fill_value=0)
+)
+qtd_por_mes.index = [str(m).zfill(2) for m in qtd_por_mes.index]
+st.bar_chart(qtd_por_mes)
+
+st.markdown("---")
+
+# Matriz de completude (empresas ativas × meses)
+st.subheader(f"🧩 Completude de Importação - {ano}")
+
+with st.spinner("Montando matriz de completude..."):
+    sucesso_matriz, msg_matriz, df_matriz = carregar_matriz_completude(ano)
+
+if not sucesso_matriz:
+    st.error(msg_matriz)
+elif df_matriz.empty:
+    st.info("ℹ️ Nenhuma empresa ativa cadastrada.")
+else:
+    somente_pendentes = st.checkbox(
+        "Mostrar somente empresas com meses pendentes", value=True,
+        key="dashboard_somente_pendentes")
+
+    meses_ate = st.slider(
+        "Considerar meses até", 1, 12, mes, key="dashboard_meses_ate")
+
+    colunas_meses = [str(m).zfill(2) for m in range(1, meses_ate + 1)]
+    df_exibir = df_matriz[["Razão Social"] + colunas_meses].copy()
+    df_exibir["Pendentes"] = (~df_exibir[colunas_meses]).sum(axis=1)
+
+    if somente_pendentes:
+        df_exibir = df_exibir[df_exibir["Pendentes"] > 0]
+
+    total_pendencias = int(df_exibir["Pendentes"].sum())
+    st.info(
+        f"📌 **{len(df_exibir)}** empresa(s) com **{total_pendencias}** mês(es) pendente(s) até {str(meses_ate).zfill(2)}/{ano}")
+
+    df_exibir[colunas_meses] = df_exibir[colunas_meses].replace(
+        {True: "✅", False: "❌"})
+
+    st.dataframe(df_exibir, width="stretch")
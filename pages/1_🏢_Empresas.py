@@ -1,11 +1,7 @@
+from functools import partial
+
 import streamlit as st
 from utils.auth import require_authentication, get_current_user
-from utils.empresa_db import (
-    listar_empresas,
-    buscar_empresas,
-    cadastrar_empresa,
-    buscar_empresa_por_cnpj
-)
 
 # Configuração da página
 st.set_page_config(
@@ -25,12 +21,24 @@ st.title("🏢 Gestão de Empresas")
 st.markdown(f"**Usuário:** {user['nome']}")
 st.markdown("---")
 
-# Abas
-tab1, tab2, tab3 = st.tabs(
-    ["📋 Lista de Empresas", "➕ Nova Empresa", "🔍 Buscar"])
+# Abas: somente a aba ativa é executada (st.tabs executaria todas a cada
+# rerun) e cada aba importa somente os módulos que usa
+ABAS = ["📋 Lista de Empresas", "➕ Nova Empresa", "🔍 Buscar", "🗂️ Plano de Contas"]
+
+aba_ativa = st.segmented_control(
+    "Aba", ABAS, default=ABAS[0], key="aba_empresas",
+    label_visibility="collapsed") or ABAS[0]
+
 
 # Tab 1: Lista de Empresas
-with tab1:
+def aba_lista():
+    from utils.empresa_db import listar_empresas, atualizar_empresa
+    from utils.exportacao import (
+        FORMATOS_EXPORTACAO,
+        gerar_exportacao,
+        nome_arquivo_exportacao
+    )
+
     st.subheader("📋 Empresas Cadastradas")
 
     # Filtros
@@ -72,6 +80,7 @@ with tab1:
                 "CNPJ": st.column_config.TextColumn("CNPJ", width="medium"),
                 "Controladora": st.column_config.TextColumn("Controladora", width="small"),
                 "Controlada": st.column_config.TextColumn("Controlada", width="small"),
+                "Controladora do Grupo": st.column_config.TextColumn("Controladora do Grupo", width="medium"),
                 "Operacional": st.column_config.TextColumn("Operacional", width="small"),
                 "Patrimonial": st.column_config.TextColumn("Patrimonial", width="small"),
                 "Ativa": st.column_config.TextColumn("Ativa", width="small")
@@ -80,17 +89,85 @@ with tab1:
 
         st.info(f"📊 **Total de empresas:** {len(df_empresas)}")
 
-        # Botões de ação
+        # Botões de ação (o arquivo é gerado no clique, direto do banco)
+        filtros_exportacao = {
+            "status": {"Ativas": "ativa", "Inativas": "inativa"}.get(filtro_status)}
+
         col1, col2, col3 = st.columns([1, 1, 4])
         with col1:
-            st.button("📥 Exportar Excel", width="stretch")
+            st.download_button(
+                "📥 Exportar Excel",
+                data=partial(gerar_exportacao, "empresas", filtros_exportacao, "Excel"),
+                file_name=nome_arquivo_exportacao("empresas", "Excel"),
+                mime=FORMATOS_EXPORTACAO["Excel"][1],
+                width="stretch")
         with col2:
-            st.button("📄 Exportar PDF", width="stretch")
+            st.download_button(
+                "📄 Exportar CSV",
+                data=partial(gerar_exportacao, "empresas", filtros_exportacao, "CSV"),
+                file_name=nome_arquivo_exportacao("empresas", "CSV"),
+                mime=FORMATOS_EXPORTACAO["CSV"][1],
+                width="stretch")
+
+        # Vínculo da controlada com a controladora (usado na consolidação)
+        with st.expander("🔗 Controladora do Grupo"):
+            df_todas = df_empresas if filtro_status == "Todas" else listar_empresas()
+            df_controladas = df_todas[df_todas["Controlada"] == "✅ Sim"]
+            df_controladoras = df_todas[df_todas["Controladora"] == "✅ Sim"]
+            controladoras = dict(zip(
+                df_controladoras["Razão Social"], df_controladoras["ID"]))
+
+            if df_controladas.empty:
+                st.info("ℹ️ Nenhuma empresa marcada como controlada.")
+            else:
+                col1, col2, col3 = st.columns([2, 2, 1])
+
+                with col1:
+                    empresa_vinculo = st.selectbox(
+                        "Controlada", df_controladas["Razão Social"].tolist(),
+                        key="vinculo_empresa")
+
+                linha_vinculo = df_controladas[
+                    df_controladas["Razão Social"] == empresa_vinculo].iloc[0]
+                opcoes_vinculo = ["Nenhuma"] + [
+                    razao for razao in controladoras if razao != empresa_vinculo]
+                atual = linha_vinculo["Controladora do Grupo"]
+
+                with col2:
+                    controladora_vinculo = st.selectbox(
+                        "Controladora do Grupo",
+                        opcoes_vinculo,
+                        index=opcoes_vinculo.index(atual) if atual in opcoes_vinculo else 0,
+                        key=f"vinculo_controladora_{linha_vinculo['ID']}")
+
+                with col3:
+                    st.markdown("<br>", unsafe_allow_html=True)
+                    salvar_vinculo = st.button(
+                        "💾 Salvar Vínculo", width="stretch", key="vinculo_salvar")
+
+                if salvar_vinculo:
+                    sucesso, mensagem = atualizar_empresa(
+                        int(linha_vinculo["ID"]),
+                        {'controladora_id': int(controladoras[controladora_vinculo])
+                         if controladora_vinculo != "Nenhuma" else None},
+                        usuario=user.get('email') if user else None)
+
+                    if sucesso:
+                        st.success(mensagem)
+                    else:
+                        st.error(mensagem)
     else:
         st.warning("⚠️ Nenhuma empresa encontrada.")
 
+
 # Tab 2: Nova Empresa
-with tab2:
+def aba_nova_empresa():
+    from utils.empresa_db import (
+        listar_empresas,
+        cadastrar_empresa,
+        buscar_empresa_por_cnpj
+    )
+
     st.subheader("➕ Cadastrar Nova Empresa")
 
     with st.form("form_nova_empresa", clear_on_submit=True):
@@ -123,6 +200,18 @@ with tab2:
 
             fl_controladora = st.checkbox("✅ Controladora", value=False)
             fl_controlada = st.checkbox("✅ Controlada", value=False)
+
+            # Controladora do grupo (usada na consolidação)
+            df_controladoras = listar_empresas()
+            controladoras = {} if df_controladoras.empty else dict(zip(
+                df_controladoras.loc[df_controladoras["Controladora"] == "✅ Sim", "Razão Social"],
+                df_controladoras.loc[df_controladoras["Controladora"] == "✅ Sim", "ID"]
+            ))
+            controladora = st.selectbox(
+                "Controladora do Grupo",
+                ["Nenhuma"] + list(controladoras.keys()),
+                help="Informe para empresas controladas"
+            )
             fl_operacional = st.checkbox("✅ Operacional", value=False)
             fl_patrimonial = st.checkbox("✅ Patrimonial", value=False)
 
@@ -138,7 +227,7 @@ with tab2:
             submit = st.form_submit_button(
                 "💾 Cadastrar", width="stretch", type="primary")
         with col2:
-            cancel = st.form_submit_button(
+            st.form_submit_button(
                 "🚫 Limpar", width="stretch")
 
         if submit:
@@ -170,13 +259,14 @@ with tab2:
                             'fl_operacional': fl_operacional,
                             'fl_patrimonial': fl_patrimonial,
                             'fl_ativa': fl_ativa,
-                            'fl_inativa': fl_inativa
+                            'fl_inativa': fl_inativa,
+                            'controladora_id': int(controladoras[controladora]) if controladora != "Nenhuma" else None
                         }
 
                         # Cadastrar
                         with st.spinner("Cadastrando empresa..."):
                             sucesso, mensagem, id_empresa = cadastrar_empresa(
-                                dados)
+                                dados, usuario=user.get('email') if user else None)
 
                             if sucesso:
                                 st.success(mensagem)
@@ -185,8 +275,11 @@ with tab2:
                             else:
                                 st.error(mensagem)
 
+
 # Tab 3: Buscar
-with tab3:
+def aba_buscar():
+    from utils.empresa_db import buscar_empresas
+
     st.subheader("🔍 Buscar Empresa")
 
     col1, col2 = st.columns([2, 3])
@@ -233,3 +326,61 @@ with tab3:
                     )
                 else:
                     st.warning("⚠️ Nenhum resultado encontrado.")
+
+
+# Tab 4: Mapeamento do plano de contas
+def aba_plano_contas():
+    import pandas as pd
+    from utils.plano_contas import (
+        COLUNAS_ARQUIVO_MAPEAMENTO,
+        importar_mapeamento
+    )
+
+    st.subheader("🗂️ Mapeamento para o Plano Padrão")
+    st.caption(
+        "Arquivo CSV separado por ';' com as colunas "
+        f"{'; '.join(COLUNAS_ARQUIVO_MAPEAMENTO)}. "
+        "O mapeamento anterior do plano é substituído.")
+
+    col1, col2 = st.columns([1, 3])
+
+    with col1:
+        plano_contas_id = st.number_input(
+            "ID do Plano de Contas *", min_value=1, step=1,
+            key="mapeamento_plano_id")
+
+    with col2:
+        arquivo_mapeamento = st.file_uploader(
+            "Arquivo de mapeamento", type=["csv"], key="mapeamento_arquivo")
+
+    df_mapeamento = None
+    if arquivo_mapeamento is not None:
+        try:
+            df_mapeamento = pd.read_csv(
+                arquivo_mapeamento, sep=";", dtype=str, encoding="utf-8-sig")
+        except ValueError as e:
+            st.error(f"❌ Arquivo de mapeamento inválido: {str(e)}")
+
+    if df_mapeamento is not None:
+        st.dataframe(df_mapeamento.head(20), width="stretch", hide_index=True)
+        st.caption(f"{len(df_mapeamento)} linha(s) no arquivo")
+
+        if st.button("💾 Gravar Mapeamento", type="primary", key="mapeamento_gravar"):
+            with st.spinner("Gravando mapeamento..."):
+                sucesso, mensagem = importar_mapeamento(
+                    int(plano_contas_id), df_mapeamento)
+
+            if sucesso:
+                st.success(mensagem)
+            else:
+                st.error(mensagem)
+
+
+if aba_ativa == ABAS[0]:
+    aba_lista()
+elif aba_ativa == ABAS[1]:
+    aba_nova_empresa()
+elif aba_ativa == ABAS[2]:
+    aba_buscar()
+else:
+    aba_plano_contas()
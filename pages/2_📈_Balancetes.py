@@ -1,13 +1,9 @@
 import streamlit as st
 from utils.auth import require_authentication, get_current_user
-from utils.balancete_processor import processar_balancete
-from utils.empresa_db import listar_empresas
-from utils.balancete_db import importar_balancete_completo
-from utils.balancete_db import listar_balancetes
 
-import pandas as pd
+import math
 from datetime import datetime
-import sys
+from functools import partial
 
 import warnings
 warnings.filterwarnings('ignore')
@@ -30,12 +26,102 @@ st.title("📈 Gestão de Balancetes")
 st.markdown(f"**Usuário:** {user['nome']}")
 st.markdown("---")
 
-# Abas
-tab1, tab2, tab3 = st.tabs(
-    ["📊 Balancetes Processados", "📤 Upload de Balancetes", "📋 Histórico"])
+# Intervalo de atualização do painel de jobs em segundo plano
+INTERVALO_ATUALIZACAO_JOBS = "2s"
+
+# Exportações em segundo plano desta sessão (IDs dos jobs)
+if 'jobs_exportacao' not in st.session_state:
+    st.session_state.jobs_exportacao = []
+
+# Abas: somente a aba ativa é executada (st.tabs executaria todas a cada
+# rerun) e cada aba é um fragmento, então interações dentro dela não
+# reexecutam as consultas das outras
+ABAS = ["📊 Balancetes Processados", "📤 Upload de Balancetes", "📋 Histórico"]
+
+aba_ativa = st.segmented_control(
+    "Aba", ABAS, default=ABAS[0], key="aba_balancetes",
+    label_visibility="collapsed") or ABAS[0]
+
+
+def painel_jobs(chave_sessao):
+    """
+    Exibe os jobs em segundo plano cuja lista de IDs está em
+    st.session_state[chave_sessao] (atualização periódica enquanto há
+    jobs ativos; exportações concluídas ganham o botão de download)
+    """
+    from utils.jobs import (
+        STATUS_CONCLUIDO,
+        STATUS_ERRO,
+        consultar_jobs,
+        existem_jobs_ativos
+    )
+    from utils.exportacao import ler_arquivo_exportado
+
+    acompanhar = existem_jobs_ativos(st.session_state[chave_sessao])
+
+    @st.fragment(run_every=INTERVALO_ATUALIZACAO_JOBS if acompanhar else None)
+    def painel():
+        jobs = consultar_jobs(st.session_state[chave_sessao])
+
+        for job in reversed(jobs):
+            with st.container(border=True):
+                col1, col2 = st.columns([3, 2])
+                with col1:
+                    st.markdown(
+                        f"**{job['descricao']}** | {job['empresa']} | {job['periodo']}")
+                with col2:
+                    st.caption(
+                        f"🕒 {job['criado_em']:%d/%m/%Y %H:%M:%S} | {job['etapa']}")
+
+                if job["status"] == STATUS_CONCLUIDO:
+                    st.success(job["mensagem"])
+                    if job.get("arquivo"):
+                        st.download_button(
+                            "💾 Baixar arquivo",
+                            data=partial(ler_arquivo_exportado, job["arquivo"]),
+                            file_name=job["nome_arquivo"], mime=job["mime"],
+                            key=f"baixar_{job['id']}")
+                elif job["status"] == STATUS_ERRO:
+                    st.error(job["mensagem"])
+                else:
+                    st.progress(job["progresso"] or 0.0, text=job["etapa"])
+
+        # Todos finalizados: rerun completo para parar a atualização periódica
+        if acompanhar and not existem_jobs_ativos(st.session_state[chave_sessao]):
+            st.rerun()
+
+    painel()
+
+    if not acompanhar and st.button("🧹 Limpar Lista", key=f"limpar_{chave_sessao}"):
+        st.session_state[chave_sessao] = []
+        st.rerun()
+
 
 # Tab 1: Processados
-with tab1:
+@st.fragment
+def aba_processados():
+    import numpy as np
+    import pandas as pd
+    from utils.empresa_db import listar_empresas
+    from utils.balancete_db import listar_balancetes, listar_anos_balancetes
+    from utils.jobs import submeter_exportacao
+    from utils.exportacao import (
+        CONTEUDOS_EXPORTACAO,
+        FORMATOS_EXPORTACAO,
+        LIMITE_EXPORTACAO_IMEDIATA,
+        contar_linhas,
+        exportar,
+        ler_arquivo_exportado,
+        nome_arquivo_exportacao
+    )
+    from utils.continuidade import verificar_continuidade
+    from utils.analise_comparativa import (
+        METRICAS,
+        carregar_matriz_periodos,
+        tabela_valores,
+        tabela_variacoes
+    )
+
     st.subheader("📊 Balancetes Processados")
 
     # Buscar empresas e anos únicos para os filtros
@@ -46,10 +132,8 @@ with tab1:
         empresas_lista = [
             "Todas"] + sorted(df_empresas["Razão Social"].tolist()) if not df_empresas.empty else ["Todas"]
 
-        # Buscar todos os balancetes para extrair anos únicos
-        df_todos = listar_balancetes()
-        anos_unicos = ["Todos"] + sorted(df_todos["Ano"].unique(
-        ).tolist(), reverse=True) if not df_todos.empty else ["Todos"]
+        # Buscar anos com balancetes importados (sem carregar a listagem toda)
+        anos_unicos = ["Todos"] + listar_anos_balancetes()
 
     # Filtros
     col1, col2, col3 = st.columns(3)
@@ -97,326 +181,433 @@ with tab1:
         # Exibir tabela
         st.dataframe(df_balancetes, width="stretch", hide_index=True)
 
-        # Botões de ação
-        col1, col2 = st.columns([1, 5])
+        # Exportação (lista ou itens dos balancetes filtrados)
+        col1, col2, col3 = st.columns([2, 1, 3])
         with col1:
-            st.button("📥 Exportar", width="stretch")
-
-# Tab 2: Upload
-with tab2:
-    st.subheader("📤 Upload de Balancetes")
+            conteudo_exportacao = st.selectbox(
+                "Conteúdo", ["balancetes", "itens"],
+                format_func=CONTEUDOS_EXPORTACAO.get, key="exportacao_conteudo")
+        with col2:
+            formato_exportacao = st.selectbox(
+                "Formato", list(FORMATOS_EXPORTACAO), key="exportacao_formato")
+
+        filtros_exportacao = {"empresa": filtro_empresa, "ano": filtro_ano, "mes": filtro_mes}
+        chave_exportacao = (conteudo_exportacao, formato_exportacao, filtro_empresa, filtro_ano, filtro_mes)
+
+        if st.button("📥 Exportar", key="exportar_balancetes"):
+            qtd_linhas = contar_linhas(conteudo_exportacao, filtros_exportacao)
+
+            if qtd_linhas > LIMITE_EXPORTACAO_IMEDIATA:
+                # Exportação grande: segue em segundo plano
+                st.session_state.jobs_exportacao.append(submeter_exportacao(
+                    conteudo_exportacao, filtros_exportacao, formato_exportacao,
+                    user.get('email') if user else None))
+                st.session_state.exportacao_pronta = None
+            else:
+                with st.spinner("Exportando..."):
+                    sucesso, mensagem, caminho = exportar(
+                        conteudo_exportacao, filtros_exportacao, formato_exportacao)
+                st.session_state.exportacao_pronta = {
+                    "chave": chave_exportacao,
+                    "sucesso": sucesso,
+                    "mensagem": mensagem,
+                    "arquivo": caminho,
+                    "nome_arquivo": nome_arquivo_exportacao(conteudo_exportacao, formato_exportacao),
+                    "mime": FORMATOS_EXPORTACAO[formato_exportacao][1],
+                }
+
+        # Arquivo pronto somente enquanto filtros/formato não mudarem
+        exportacao_pronta = st.session_state.get("exportacao_pronta")
+        if exportacao_pronta and exportacao_pronta["chave"] == chave_exportacao:
+            if exportacao_pronta["sucesso"]:
+                st.success(exportacao_pronta["mensagem"])
+                st.download_button(
+                    "💾 Baixar arquivo",
+                    data=partial(ler_arquivo_exportado, exportacao_pronta["arquivo"]),
+                    file_name=exportacao_pronta["nome_arquivo"],
+                    mime=exportacao_pronta["mime"], key="baixar_exportacao")
+            else:
+                st.error(exportacao_pronta["mensagem"])
+
+        if st.session_state.jobs_exportacao:
+            st.caption(
+                f"Exportações com mais de {LIMITE_EXPORTACAO_IMEDIATA} linhas rodam em segundo plano")
+            painel_jobs("jobs_exportacao")
 
-    # Inicializar session_state para armazenar dados processados
-    if 'df_processado' not in st.session_state:
-        st.session_state.df_processado = None
-        st.session_state.empresa_selecionada = None
-        st.session_state.mes_selecionado = None
-        st.session_state.ano_selecionado = None
-        st.session_state.arquivo_processado = None
-        # ← NOVO: contador para resetar file_uploader
-        st.session_state.file_uploader_key = 0
+    st.markdown("---")
 
-    # Buscar empresas do banco
-    with st.spinner("Carregando empresas..."):
-        df_empresas = listar_empresas()
+    # Análise comparativa entre períodos (matriz contas × períodos em cache)
+    st.subheader("🔬 Análise Comparativa")
 
-    if df_empresas.empty:
-        st.warning("⚠️ Nenhuma empresa cadastrada. Cadastre empresas primeiro.")
-    else:
-        # Extrair apenas razões sociais
-        empresas_lista = df_empresas["Razão Social"].tolist()
+    exibir_analise = st.checkbox(
+        "Exibir análise comparativa de uma empresa", key="exibir_analise")
 
+    if exibir_analise and not df_empresas.empty and len(anos_unicos) > 1:
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
-            empresa = st.selectbox("Selecione a Empresa *", empresas_lista)
+            empresa_analise = st.selectbox(
+                "Empresa", sorted(df_empresas["Razão Social"].tolist()), key="analise_empresa")
 
         with col2:
-            ano_ref = st.selectbox("Ano de Referência *",
-                                   ["2025", "2024", "2023", "2022"])
+            ano_analise = st.selectbox(
+                "Ano", anos_unicos[1:], key="analise_ano")
 
         with col3:
-            mes_ref = st.selectbox(
-                "Mês de Referência *", ["01", "02", "03", "04",
-                                        "05", "06", "07", "08", "09", "10", "11", "12"])
+            metrica_analise = st.selectbox(
+                "Métrica", list(METRICAS.keys()),
+                format_func=lambda m: METRICAS[m], key="analise_metrica")
 
         with col4:
-            formato = st.selectbox(
-                "Formato do Arquivo *", ["CSV (.csv)", "Excel (.xlsx)", "PDF (.pdf)"])
+            tipo_analise = st.selectbox(
+                "Visão", ["Valores", "Variação MoM", "Variação YoY"], key="analise_tipo")
 
-        st.markdown("---")
+        col1, col2 = st.columns(2)
+        with col1:
+            percentual = st.toggle(
+                "Variação em %", value=False, key="analise_percentual",
+                disabled=tipo_analise == "Valores")
+        with col2:
+            somente_com_variacao = st.toggle(
+                "Somente contas com variação", value=True, key="analise_somente_variacao",
+                disabled=tipo_analise == "Valores")
+
+        empresa_id_analise = int(df_empresas.loc[
+            df_empresas["Razão Social"] == empresa_analise, "ID"].iloc[0])
+
+        with st.spinner("Carregando períodos..."):
+            sucesso_analise, msg_analise, dados_analise = carregar_matriz_periodos(
+                empresa_id_analise, int(ano_analise))
+
+        if not sucesso_analise:
+            st.error(msg_analise)
+        elif dados_analise is None:
+            st.warning("⚠️ Nenhum item importado para a empresa no período.")
+        else:
+            if tipo_analise == "Valores":
+                df_analise = tabela_valores(
+                    dados_analise, metrica_analise, ano=int(ano_analise))
+            else:
+                df_analise = tabela_variacoes(
+                    dados_analise,
+                    metrica_analise,
+                    tipo="YoY" if tipo_analise == "Variação YoY" else "MoM",
+                    percentual=percentual,
+                    ano=int(ano_analise)
+                )
+
+                if somente_com_variacao:
+                    valores = df_analise.iloc[:, 2:].to_numpy(dtype=float)
+                    df_analise = df_analise[
+                        (np.nan_to_num(valores) != 0).any(axis=1)]
 
-        # st.write(
-        #    f"🔑 DEBUG — key atual do uploader: file_uploader_{st.session_state.file_uploader_key}")
-        # st.write(
-        #    f"🧮 DEBUG — session_state keys: {list(st.session_state.keys())}")
-        # st.write(f"🧮 DEBUG — session_state: {list(st.session_state.values())}")
-
-        # Upload de arquivo
-        uploaded_file = st.file_uploader(
-            "Selecione o arquivo do balancete",
-            type=["xlsx", "xls", "csv", "txt", "pdf"],
-            help="Formatos aceitos: Excel, CSV, TXT, PDF",
-            # ← NOVO: key dinâmica
-            key=f"file_uploader_{st.session_state.file_uploader_key}"
-        )
+            st.info(
+                f"📊 **{len(df_analise)}** conta(s) × **{df_analise.shape[1] - 2}** período(s)")
+            st.dataframe(df_analise, width="stretch", hide_index=True)
+
+    st.markdown("---")
 
-        # if uploaded_file is not None:
-        #    st.write(f"🧮 DEBUG — uploaded_file: {uploaded_file.__dict__}")
+    # Continuidade de saldos (Saldo Anterior do mês × Saldo Atual do mês anterior)
+    st.subheader("🔗 Continuidade de Saldos")
 
-        # CRÍTICO: Limpar dados processados se contexto mudou
-        # Comparar SOMENTE empresa/mês/ano (não arquivo, pois ele vira None no reload do botão)
-        if st.session_state.df_processado is not None:
-            contexto_mudou = (
-                st.session_state.empresa_selecionada != empresa or
-                st.session_state.mes_selecionado != int(mes_ref) or
-                st.session_state.ano_selecionado != int(ano_ref)
+    exibir_continuidade = st.checkbox(
+        "Verificar continuidade entre meses consecutivos", key="exibir_continuidade")
+
+    if exibir_continuidade:
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            empresa_cont = st.selectbox(
+                "Empresa", empresas_lista, key="continuidade_empresa")
+
+        with col2:
+            ano_cont = st.selectbox(
+                "Ano", anos_unicos, key="continuidade_ano")
+
+        with col3:
+            mes_cont = st.selectbox(
+                "Mês", ["Todos"] + [str(m).zfill(2) for m in range(1, 13)],
+                key="continuidade_mes")
+
+        empresa_id_cont = None
+        if empresa_cont != "Todas":
+            empresa_id_cont = int(df_empresas.loc[
+                df_empresas["Razão Social"] == empresa_cont, "ID"].iloc[0])
+
+        with st.spinner("Verificando continuidade..."):
+            sucesso_cont, msg_cont, df_quebras = verificar_continuidade(
+                empresa_id=empresa_id_cont,
+                ano=None if ano_cont == "Todos" else int(ano_cont),
+                mes=None if mes_cont == "Todos" else int(mes_cont)
             )
 
-            if contexto_mudou:
-                st.session_state.df_processado = None
-                st.session_state.empresa_selecionada = None
-                st.session_state.mes_selecionado = None
-                st.session_state.ano_selecionado = None
-                st.session_state.arquivo_processado = None
+        if not sucesso_cont:
+            st.error(msg_cont)
+        elif df_quebras.empty:
+            st.success("✅ Nenhuma quebra de continuidade encontrada.")
+        else:
+            st.warning(
+                f"⚠️ **{len(df_quebras)}** quebra(s) em "
+                f"**{df_quebras.groupby(['Empresa', 'Ano', 'Mês']).ngroups}** balancete(s)")
+            st.dataframe(df_quebras, width="stretch", hide_index=True)
 
-        # NOVO: Limpar se não há arquivo uploaded mas há dados processados
-        # Isso acontece quando usuário entra na página pela primeira vez
-        # ou quando navega entre páginas/abas
-        if uploaded_file is None and st.session_state.df_processado is not None:
-            st.session_state.df_processado = None
-            st.session_state.empresa_selecionada = None
-            st.session_state.mes_selecionado = None
-            st.session_state.ano_selecionado = None
-            st.session_state.arquivo_processado = None
-
-        if uploaded_file:
-            st.success(
-                f"✅ Arquivo **{uploaded_file.name}** carregado com sucesso!")
-
-            # Mostrar informações selecionadas
-            st.info(
-                f"📊 **Empresa:** {empresa} | **Período:** {mes_ref}/{ano_ref}")
 
-            col1, col2 = st.columns([1, 5])
+# Tab 2: Upload
+@st.fragment
+def aba_upload():
+    import pandas as pd
+    from utils.balancete_processor import processar_balancete
+    from utils.plano_contas import obter_plano_contas_id
+    from utils.empresa_db import listar_empresas
+    from utils.ingestao import extrair_arquivos_upload, processar_conteudos
+    from utils.armazenamento_temporario import (
+        remover_dataframe,
+        salvar_dataframe
+    )
+    from utils.previa_balancete import (
+        LINHAS_POR_PAGINA_PREVIA,
+        carregar_pagina_previa,
+        resumir_processado
+    )
+    from utils.jobs import submeter_importacao
+
+    st.subheader("📤 Upload de Balancetes")
+
+    # Inicializar session_state para armazenar dados processados
+    # (o DataFrame processado fica em arquivo temporário; a sessão guarda o ID)
+    if 'processado_id' not in st.session_state:
+        st.session_state.processado_id = None
+        st.session_state.empresa_selecionada = None
+        st.session_state.mes_selecionado = None
+        st.session_state.ano_selecionado = None
+        st.session_state.arquivo_processado = None
+        # ← NOVO: contador para resetar file_uploader
+        st.session_state.file_uploader_key = 0
+
+    # IDs das importações em segundo plano (utils/jobs.py)
+    if 'jobs_importacao' not in st.session_state:
+        st.session_state.jobs_importacao = []
+
+    modo_upload = st.radio(
+        "Modo de envio",
+        ["📄 Arquivo único", "🗂️ Vários arquivos / ZIP"],
+        horizontal=True,
+        key="modo_upload",
+        label_visibility="collapsed"
+    )
+
+    if modo_upload == "📄 Arquivo único":
+        # Buscar empresas do banco
+        with st.spinner("Carregando empresas..."):
+            df_empresas = listar_empresas()
+
+        if df_empresas.empty:
+            st.warning("⚠️ Nenhuma empresa cadastrada. Cadastre empresas primeiro.")
+        else:
+            # Extrair apenas razões sociais
+            empresas_lista = df_empresas["Razão Social"].tolist()
+
+            col1, col2, col3, col4 = st.columns(4)
+
             with col1:
-                if st.button("🚀 Processar", width="stretch", type="primary", key="processar_balancete"):
-                    print(f"🔍 [BOTÃO PROCESSAR CLICADO]")
-                    with st.spinner("Processando balancete..."):
-
-                        # Processar arquivo (validar, limpar, converter)
-                        sucesso, mensagem, df_processado = processar_balancete(
-                            uploaded_file)
-
-                        if not sucesso:
-                            st.error(mensagem)
-                            st.session_state.df_processado = None
-                        else:
-                            st.success(mensagem)
-                            # Armazenar dados processados no session_state
-                            st.session_state.df_processado = df_processado
-                            st.session_state.empresa_selecionada = empresa
-                            st.session_state.mes_selecionado = int(mes_ref)
-                            st.session_state.ano_selecionado = int(ano_ref)
-                            st.session_state.arquivo_processado = uploaded_file.name
-
-                            # st.write(
-                            #    f"🧮 DEBUG — session_state keys: {list(st.session_state.keys())}")
-                            # st.write(
-                            #    f"🧮 DEBUG — session_state: {list(st.session_state.values())}")
-
-        # CRÍTICO: Mostrar dados processados FORA do if uploaded_file
-        # Isso permite que o botão seja renderizado mesmo quando uploaded_file = None
-        if st.session_state.df_processado is not None:
-            st.markdown("---")
-            st.subheader("📊 Dados Processados - Prévia")
+                empresa = st.selectbox("Selecione a Empresa *", empresas_lista)
 
-            st.dataframe(
-                st.session_state.df_processado,
-                width="stretch",
-                hide_index=True
-            )
+            with col2:
+                ano_ref = st.selectbox("Ano de Referência *",
+                                       ["2025", "2024", "2023", "2022"])
 
-            st.info(
-                f"📈 **Total de registros:** {len(st.session_state.df_processado)}")
+            with col3:
+                mes_ref = st.selectbox(
+                    "Mês de Referência *", ["01", "02", "03", "04",
+                                            "05", "06", "07", "08", "09", "10", "11", "12"])
+
+            with col4:
+                formato = st.selectbox(
+                    "Formato do Arquivo *", ["CSV (.csv)", "Excel (.xlsx)", "PDF (.pdf)"])
 
             st.markdown("---")
 
-            # Botão para gravar no banco
-            col1, col2 = st.columns([1, 5])
-            with col1:
-                botao_gravar_clicado = st.button(
-                    "💾 Gravar Dados", width="stretch", type="primary", key="gravar_balancete")
+            # st.write(
+            #    f"🔑 DEBUG — key atual do uploader: file_uploader_{st.session_state.file_uploader_key}")
+            # st.write(
+            #    f"🧮 DEBUG — session_state keys: {list(st.session_state.keys())}")
+            # st.write(f"🧮 DEBUG — session_state: {list(st.session_state.values())}")
+
+            # Upload de arquivo
+            uploaded_file = st.file_uploader(
+                "Selecione o arquivo do balancete",
+                type=["xlsx", "xls", "csv", "txt", "pdf"],
+                help="Formatos aceitos: Excel, CSV, TXT, PDF",
+                # ← NOVO: key dinâmica
+                key=f"file_uploader_{st.session_state.file_uploader_key}"
+            )
 
-            # FORA das colunas - ocupa largura total
-            if botao_gravar_clicado:
-                print(f"🔍 ===== BOTÃO GRAVAR CLICADO =====")
+            # if uploaded_file is not None:
+            #    st.write(f"🧮 DEBUG — uploaded_file: {uploaded_file.__dict__}")
+
+            # CRÍTICO: Limpar dados processados se contexto mudou
+            # Comparar SOMENTE empresa/mês/ano (não arquivo, pois ele vira None no reload do botão)
+            if st.session_state.processado_id is not None:
+                contexto_mudou = (
+                    st.session_state.empresa_selecionada != empresa or
+                    st.session_state.mes_selecionado != int(mes_ref) or
+                    st.session_state.ano_selecionado != int(ano_ref)
+                )
+
+                if contexto_mudou:
+                    remover_dataframe(st.session_state.processado_id)
+                    st.session_state.processado_id = None
+                    st.session_state.empresa_selecionada = None
+                    st.session_state.mes_selecionado = None
+                    st.session_state.ano_selecionado = None
+                    st.session_state.arquivo_processado = None
 
-                with st.spinner("Gravando no banco de dados..."):
+            # NOVO: Limpar se não há arquivo uploaded mas há dados processados
+            # Isso acontece quando usuário entra na página pela primeira vez
+            # ou quando navega entre páginas/abas
+            if uploaded_file is None and st.session_state.processado_id is not None:
+                remover_dataframe(st.session_state.processado_id)
+                st.session_state.processado_id = None
+                st.session_state.empresa_selecionada = None
+                st.session_state.mes_selecionado = None
+                st.session_state.ano_selecionado = None
+                st.session_state.arquivo_processado = None
 
-                    # Obter email do usuário logado
+            if uploaded_file:
+                st.success(
+                    f"✅ Arquivo **{uploaded_file.name}** carregado com sucesso!")
+
+                # Mostrar informações selecionadas
+                st.info(
+                    f"📊 **Empresa:** {empresa} | **Período:** {mes_ref}/{ano_ref}")
+
+                col1, col2 = st.columns([1, 5])
+                with col1:
+                    if st.button("🚀 Processar", width="stretch", type="primary", key="processar_balancete"):
+                        print(f"🔍 [BOTÃO PROCESSAR CLICADO]")
+                        with st.spinner("Processando balancete..."):
+
+                            # Processar arquivo (validar, limpar, converter, mapear)
+                            sucesso, mensagem, df_processado = processar_balancete(
+                                uploaded_file,
+                                plano_contas_id=obter_plano_contas_id(empresa))
+
+                            if not sucesso:
+                                st.error(mensagem)
+                                remover_dataframe(st.session_state.processado_id)
+                                st.session_state.processado_id = None
+                            else:
+                                st.success(mensagem)
+                                # Armazenar dados processados no session_state
+                                remover_dataframe(st.session_state.processado_id)
+                                st.session_state.processado_id = salvar_dataframe(
+                                    df_processado)
+                                del df_processado
+                                st.session_state.empresa_selecionada = empresa
+                                st.session_state.mes_selecionado = int(mes_ref)
+                                st.session_state.ano_selecionado = int(ano_ref)
+                                st.session_state.arquivo_processado = uploaded_file.name
+
+                                # st.write(
+                                #    f"🧮 DEBUG — session_state keys: {list(st.session_state.keys())}")
+                                # st.write(
+                                #    f"🧮 DEBUG — session_state: {list(st.session_state.values())}")
+
+            # CRÍTICO: Mostrar dados processados FORA do if uploaded_file
+            # Isso permite que o botão seja renderizado mesmo quando uploaded_file = None
+            resumo = None
+            if st.session_state.processado_id is not None:
+                resumo = resumir_processado(st.session_state.processado_id)
+                if resumo is None:
+                    st.warning("⚠️ Os dados processados expiraram. Processe o arquivo novamente.")
+                    st.session_state.processado_id = None
+
+            if resumo is not None:
+                st.markdown("---")
+                st.subheader("📊 Dados Processados - Prévia")
+
+                agregados = resumo["agregados"]
+
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Registros", f"{resumo['qtd_linhas']:,}".replace(",", "."))
+                col2.metric("Com movimento", f"{agregados['qtd_itens']:,}".replace(",", "."))
+                col3.metric("Sem movimento (ignoradas)", f"{agregados['qtd_ignorados']:,}".replace(",", "."))
+                col4.metric("Contas analíticas", f"{agregados['qtd_analiticas']:,}".replace(",", "."))
+
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Saldo Anterior", f"{agregados['total_saldo_anterior']:,.2f}")
+                col2.metric("Val. Débito", f"{agregados['total_debito']:,.2f}")
+                col3.metric("Val. Crédito", f"{agregados['total_credito']:,.2f}")
+                col4.metric("Saldo Atual", f"{agregados['total_saldo_atual']:,.2f}")
+                st.caption("Totais somam somente as contas analíticas.")
+
+                # Verificações
+                if not resumo["alertas"]:
+                    st.success("✅ Nenhuma inconsistência encontrada")
+                for nivel, alerta in resumo["alertas"]:
+                    if nivel == "erro":
+                        st.error(f"❌ {alerta}")
+                    else:
+                        st.warning(f"⚠️ {alerta}")
+
+                with st.expander("🏆 Contas com maior movimento"):
+                    st.dataframe(resumo["contas_destaque"], width="stretch", hide_index=True)
+
+                df_nao_mapeadas = resumo["contas_nao_mapeadas"]
+                if df_nao_mapeadas is not None and not df_nao_mapeadas.empty:
+                    with st.expander(f"⚠️ {len(df_nao_mapeadas)} conta(s) sem mapeamento no plano padrão"):
+                        st.dataframe(df_nao_mapeadas, width="stretch", hide_index=True)
+
+                # Somente a página exibida é lida do arquivo processado
+                @st.fragment
+                def tabela_previa(processado_id, qtd_linhas):
+                    total_paginas = max(math.ceil(qtd_linhas / LINHAS_POR_PAGINA_PREVIA), 1)
+
+                    col1, col2 = st.columns([1, 5])
+                    with col1:
+                        pagina = st.number_input(
+                            "Página", min_value=1, max_value=total_paginas, value=1,
+                            key=f"previa_pagina_{processado_id}")
+                    with col2:
+                        st.markdown("<br>", unsafe_allow_html=True)
+                        st.caption(f"Página {pagina} de {total_paginas} | {LINHAS_POR_PAGINA_PREVIA} linhas por página")
+
+                    st.dataframe(
+                        carregar_pagina_previa(processado_id, pagina),
+                        width="stretch",
+                        hide_index=True
+                    )
+
+                tabela_previa(st.session_state.processado_id, resumo["qtd_linhas"])
+
+                st.markdown("---")
+
+                # Botão para gravar no banco
+                col1, col2 = st.columns([1, 5])
+                with col1:
+                    botao_gravar_clicado = st.button(
+                        "💾 Gravar Dados", width="stretch", type="primary", key="gravar_balancete")
+
+                # FORA das colunas - ocupa largura total
+                if botao_gravar_clicado:
                     user = get_current_user()
                     user_email = user.get(
                         'email', 'sem_email@unknown.com') if user else 'sem_email@unknown.com'
 
-                    print(f"🔍 Gravando para: {user_email}")
-
-                    try:
-                        sucesso_import, msg_import = importar_balancete_completo(
-                            razao_social=st.session_state.empresa_selecionada,
-                            mes=st.session_state.mes_selecionado,
-                            ano=st.session_state.ano_selecionado,
-                            df_itens=st.session_state.df_processado,
-                            user_email=user_email
-                        )
-
-                        print(f"🔍 Resultado: sucesso={sucesso_import}")
-
-                        if sucesso_import:
-                            # Layout profissional de sucesso
-                            st.markdown("---")
-
-                            # Card de sucesso customizado
-                            st.markdown(f"""
-                                <div style="
-                                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                                    padding: 30px;
-                                    border-radius: 12px;
-                                    text-align: center;
-                                    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                                    margin: 20px 0;
-                                ">
-                                    <h1 style="color: white; margin: 0 0 10px 0; font-size: 48px;">
-                                        ✅
-                                    </h1>
-                                    <h2 style="color: white; margin: 0 0 20px 0;">
-                                        Importação Concluída com Sucesso!
-                                    </h2>
-                                    <p style="color: #f0f0f0; font-size: 18px; margin: 0;">
-                                        {msg_import}
-                                    </p>
-                                </div>
-                            """, unsafe_allow_html=True)
-
-                            # Informações adicionais
-                            col_info1, col_info2, col_info3 = st.columns(3)
-
-                            with col_info1:
-                                st.markdown(f"""
-                                    <div style="
-                                        background-color: #f8f9fa;
-                                        padding: 20px;
-                                        border-radius: 8px;
-                                        text-align: center;
-                                        border: 1px solid #dee2e6;
-                                    ">
-                                        <p style="color: #6c757d; margin: 0; font-size: 14px;">EMPRESA</p>
-                                        <p style="color: #212529; margin: 5px 0 0 0; font-size: 16px; font-weight: bold;">
-                                            {st.session_state.empresa_selecionada}
-                                        </p>
-                                    </div>
-                                """, unsafe_allow_html=True)
-
-                            with col_info2:
-                                st.markdown(f"""
-                                    <div style="
-                                        background-color: #f8f9fa;
-                                        padding: 20px;
-                                        border-radius: 8px;
-                                        text-align: center;
-                                        border: 1px solid #dee2e6;
-                                    ">
-                                        <p style="color: #6c757d; margin: 0; font-size: 14px;">PERÍODO</p>
-                                        <p style="color: #212529; margin: 5px 0 0 0; font-size: 16px; font-weight: bold;">
-                                            {str(st.session_state.mes_selecionado).zfill(2)}/{st.session_state.ano_selecionado}
-                                        </p>
-                                    </div>
-                                """, unsafe_allow_html=True)
-
-                            with col_info3:
-                                st.markdown(f"""
-                                    <div style="
-                                        background-color: #f8f9fa;
-                                        padding: 20px;
-                                        border-radius: 8px;
-                                        text-align: center;
-                                        border: 1px solid #dee2e6;
-                                    ">
-                                        <p style="color: #6c757d; margin: 0; font-size: 14px;">IMPORTADO POR</p>
-                                        <p style="color: #212529; margin: 5px 0 0 0; font-size: 16px; font-weight: bold;">
-                                            👤 {user_email}
-                                        </p>
-                                    </div>
-                                """, unsafe_allow_html=True)
-
-                            st.balloons()
-
-                            st.markdown("<br>", unsafe_allow_html=True)
-
-                            # st.write(
-                            #    "DEBUG — AQUI DEVERIA RENDERIZAR O BOTÃO DE NOVA IMPORTAÇÃO")
-
-                            # Botão "Nova Importação" grande e centralizado
-                            col_btn1, col_btn2, col_btn3 = st.columns(
-                                [1, 1, 1])
-                            with col_btn2:
-
-                                botao_nova_importacao = st.button(
-                                    "🔄 Nova Importação", width="stretch", type="primary", key="nova_importacao")
-
-                                if botao_nova_importacao:
-                                    print("\n\n===== DEBUG RESET START =====")
-                                    print("Antes de resetar:")
-                                    print("file_uploader_key =",
-                                          st.session_state.file_uploader_key)
-                                    print("session_state keys =", list(
-                                        st.session_state.keys()))
-
-                                    key_atual = f"file_uploader_{st.session_state.file_uploader_key}"
-                                    print("key_atual =", key_atual)
-                                    print("key existe?",
-                                          key_atual in st.session_state)
-
-                                    # Zera estados internos da aplicação
-                                    st.session_state.df_processado = None
-                                    st.session_state.empresa_selecionada = None
-                                    st.session_state.mes_selecionado = None
-                                    st.session_state.ano_selecionado = None
-                                    st.session_state.arquivo_processado = None
-
-                                    # ====== RESET REAL DO FILE UPLOADER ======
-                                    # 1. Remove estado interno do uploader
-                                    key_atual = f"file_uploader_{st.session_state.file_uploader_key}"
-                                    if key_atual in st.session_state:
-                                        del st.session_state[key_atual]
-
-                                    # 2. Gera nova key para recriar o widget
-                                    st.session_state.file_uploader_key += 1
-
-                                    print("\nDepois de resetar:")
-                                    print("file_uploader_key =",
-                                          st.session_state.file_uploader_key)
-                                    print("session_state keys =", list(
-                                        st.session_state.keys()))
-                                    print("===== DEBUG RESET END =====\n\n")
-
-                                    # 3. Recarrega página
-                                    # sys.stdout.flush()
-                                    # st.rerun()
-
-                            # st.write(
-                            #    "DEBUG — SAIU DO IF DO BOTÃO DE NOVA IMPORTAÇÃO")
-
-                        else:
-                            st.error(msg_import)
-                    except Exception as e:
-                        print(f"❌ EXCEÇÃO: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        st.error(f"❌ Erro: {str(e)}")
-
-                if uploaded_file is not None and st.session_state.df_processado is not None:
-                    st.session_state.df_processado = None
+                    # Gravação em segundo plano (o mapeamento já foi aplicado no processamento)
+                    job_id = submeter_importacao(
+                        empresa=(st.session_state.empresa_selecionada, None),
+                        mes=st.session_state.mes_selecionado,
+                        ano=st.session_state.ano_selecionado,
+                        processado_id=st.session_state.processado_id,
+                        user_email=user_email,
+                        descricao=st.session_state.arquivo_processado
+                    )
+                    st.session_state.jobs_importacao.append(job_id)
+
+                    # Liberar a prévia (o arquivo temporário passa a ser do job)
+                    # e recriar o uploader para uma nova importação
+                    st.session_state.processado_id = None
                     st.session_state.empresa_selecionada = None
                     st.session_state.mes_selecionado = None
                     st.session_state.ano_selecionado = None
@@ -425,42 +616,157 @@ with tab2:
                     key_atual = f"file_uploader_{st.session_state.file_uploader_key}"
                     if key_atual in st.session_state:
                         del st.session_state[key_atual]
-
-                    # 2. Gera nova key para recriar o widget
                     st.session_state.file_uploader_key += 1
 
+                    st.rerun()
+
+    else:
+        st.caption(
+            "Envie arquivos .csv/.txt/.xlsx/.xls/.pdf ou pacotes .zip com arquivos nomeados como "
+            "<EMPRESA>_<AAAA>-<MM>.csv (abreviação, CNPJ ou razão social).")
+
+        if 'lote_resultados' not in st.session_state:
+            st.session_state.lote_resultados = None
+            st.session_state.lote_uploader_key = 0
+
+        arquivos_lote = st.file_uploader(
+            "Selecione os arquivos ou pacotes ZIP",
+            type=["csv", "txt", "xlsx", "xls", "pdf", "zip"],
+            accept_multiple_files=True,
+            key=f"lote_uploader_{st.session_state.lote_uploader_key}"
+        )
+
+        def descartar_lote():
+            """Apaga os arquivos temporários do lote processado e não gravado"""
+            for r in st.session_state.lote_resultados or []:
+                remover_dataframe(r["processado_id"])
+            st.session_state.lote_resultados = None
+
+        if arquivos_lote and st.button("🚀 Processar Arquivos", type="primary", key="processar_lote"):
+            descartar_lote()
+            with st.spinner("Processando arquivos..."):
+                ignorados = []
+                st.session_state.lote_resultados = processar_conteudos(
+                    extrair_arquivos_upload(arquivos_lote, ignorados))
+
+            for nome in ignorados:
+                st.warning(f"⚠️ Ignorado: {nome}")
+
+        if not arquivos_lote and st.session_state.lote_resultados:
+            descartar_lote()
+
+        resultados_lote = st.session_state.lote_resultados
+
+        if resultados_lote:
+            st.markdown("---")
+            st.subheader("📊 Resultado do Processamento")
+
+            df_resultado_lote = pd.DataFrame([{
+                "Status": "✅" if r["sucesso"] else "❌",
+                "Arquivo": r["arquivo"],
+                "Empresa": r["empresa_resolvida"][0] if r["empresa_resolvida"] else r["empresa"],
+                "Período": f"{r['mes']:02d}/{r['ano']}" if r["mes"] else "",
+                "Registros": r["registros"],
+                "Mensagem": r["mensagem"],
+            } for r in resultados_lote])
+
+            st.dataframe(df_resultado_lote, width="stretch", hide_index=True)
+
+            validos = [r for r in resultados_lote if r["sucesso"]]
+            st.info(
+                f"📈 **{len(validos)}** de **{len(resultados_lote)}** arquivo(s) válidos")
+
+            if validos and st.button(
+                    f"💾 Gravar {len(validos)} Balancete(s)", type="primary", key="gravar_lote"):
+                user = get_current_user()
+                user_email = user.get(
+                    'email', 'sem_email@unknown.com') if user else 'sem_email@unknown.com'
+
+                for r in validos:
+                    st.session_state.jobs_importacao.append(submeter_importacao(
+                        r["empresa_resolvida"], r["mes"], r["ano"], r["processado_id"],
+                        user_email, descricao=r["arquivo"]))
+
+                # Recriar o uploader para um novo lote (os arquivos
+                # temporários passam a ser dos jobs)
+                st.session_state.lote_resultados = None
+                st.session_state.lote_uploader_key += 1
+                st.rerun()
+
+    # Importações em segundo plano desta sessão
+    if st.session_state.jobs_importacao:
+        st.markdown("---")
+        st.subheader("⏳ Importações")
+        painel_jobs("jobs_importacao")
+
 
 # Tab 3: Histórico
-with tab3:
+@st.fragment
+def aba_historico():
+    from utils.auditoria import ROTULOS_EVENTOS, listar_eventos
+
     st.subheader("📋 Histórico Completo")
 
-    # Filtro de data
-    col1, col2 = st.columns(2)
+    # Filtros de data e tipo de evento
+    col1, col2, col3 = st.columns([1, 1, 2])
     with col1:
         data_inicio = st.date_input("Data Início", datetime(2025, 1, 1))
     with col2:
         data_fim = st.date_input("Data Fim", datetime.now())
+    with col3:
+        tipos = st.multiselect(
+            "Eventos", list(ROTULOS_EVENTOS), format_func=ROTULOS_EVENTOS.get,
+            placeholder="Todos")
+
+    if data_fim < data_inicio:
+        st.warning("⚠️ A data final deve ser posterior à data inicial.")
+        return
+
+    # Paginação keyset: pilha com o cursor de início de cada página visitada
+    chave_historico = (data_inicio, data_fim, tuple(tipos))
+    if st.session_state.get("historico_chave") != chave_historico:
+        st.session_state.historico_chave = chave_historico
+        st.session_state.historico_cursores = [None]
+
+    cursores = st.session_state.historico_cursores
+    eventos, proximo = listar_eventos(data_inicio, data_fim, tipos or None, cursores[-1])
 
     st.markdown("---")
 
     # Timeline de atividades
     st.markdown("### 📅 Timeline de Atividades")
 
-    activities = [
-        {"data": "22/01/2025 14:30", "acao": "Upload de balancete",
-            "empresa": "Empresa A", "usuario": "admin@empresa.com"},
-        {"data": "21/01/2025 10:15", "acao": "Aprovação de balancete",
-            "empresa": "Empresa B", "usuario": "admin@empresa.com"},
-        {"data": "20/01/2025 16:45", "acao": "Upload de balancete",
-            "empresa": "Empresa C", "usuario": "admin@empresa.com"}
-    ]
+    if not eventos:
+        st.info("ℹ️ Nenhum evento no período selecionado.")
+        return
 
-    for act in activities:
+    for evento in eventos:
         with st.container():
             col1, col2 = st.columns([1, 5])
             with col1:
-                st.markdown(f"**{act['data']}**")
+                st.markdown(f"**{evento['dt_evento']:%d/%m/%Y %H:%M}**")
             with col2:
+                rotulo = ROTULOS_EVENTOS.get(evento['tipo'], evento['tipo'])
+                empresa = evento['empresa'] or "—"
+                usuario = evento['usuario'] or "sistema"
                 st.markdown(
-                    f"**{act['acao']}** - {act['empresa']} _(por {act['usuario']})_")
+                    f"**{rotulo}** - {empresa}: {evento['descricao']} _(por {usuario})_")
             st.markdown("---")
+
+    col1, col2, col3 = st.columns([1, 1, 4])
+    with col1:
+        st.button("⬅️ Anterior", disabled=len(cursores) <= 1, key="historico_anterior",
+                  on_click=cursores.pop)
+    with col2:
+        st.button("Próxima ➡️", disabled=proximo is None, key="historico_proxima",
+                  on_click=cursores.append, args=(proximo,))
+    with col3:
+        st.caption(f"Página {len(cursores)}")
+
+
+if aba_ativa == ABAS[0]:
+    aba_processados()
+elif aba_ativa == ABAS[1]:
+    aba_upload()
+else:
+    aba_historico()
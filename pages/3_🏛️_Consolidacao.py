@@ -0,0 +1,178 @@
+import streamlit as st
+from utils.auth import require_authentication, get_current_user
+from utils.dashboard_db import carregar_catalogo_empresas
+
+# Configuração da página
+st.set_page_config(
+    page_title="Consolidação - Audit MC",
+    page_icon="🏛️",
+    layout="wide"
+)
+
+# Verificar autenticação
+require_authentication()
+
+# Obter usuário atual
+user = get_current_user()
+
+# Header
+st.title("🏛️ Consolidação de Grupos")
+st.markdown(f"**Usuário:** {user['nome']}")
+st.markdown("---")
+
+sucesso, mensagem, df_empresas = carregar_catalogo_empresas()
+if not sucesso:
+    st.error(mensagem)
+    st.stop()
+
+df_controladoras = df_empresas[df_empresas["fl_controladora"].fillna(False).astype(bool)] \
+    if not df_empresas.empty else df_empresas
+
+if df_controladoras.empty:
+    st.warning("⚠️ Nenhuma empresa marcada como controladora.")
+    st.stop()
+
+controladoras = dict(zip(df_controladoras["razao_social"], df_controladoras["id"]))
+
+# Abas: somente a aba ativa é executada (st.tabs executaria todas a cada
+# rerun) e cada aba importa somente os módulos que usa
+ABAS = ["🏛️ Balancete Consolidado", "✂️ Regras de Eliminação"]
+
+aba_ativa = st.segmented_control(
+    "Aba", ABAS, default=ABAS[0], key="aba_consolidacao",
+    label_visibility="collapsed") or ABAS[0]
+
+
+# Tab 1: Consolidado
+def aba_consolidado():
+    from utils.balancete_db import listar_anos_balancetes
+    from utils.consolidacao import METRICAS_CONSOLIDACAO, consolidar_grupo
+
+    anos = listar_anos_balancetes()
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        grupo = st.selectbox("Controladora", list(controladoras.keys()))
+
+    with col2:
+        ano = st.selectbox("Ano", anos if anos else ["-"])
+
+    with col3:
+        mes = st.selectbox(
+            "Mês", list(range(1, 13)), format_func=lambda m: str(m).zfill(2))
+
+    with col4:
+        metrica = st.selectbox(
+            "Métrica", list(METRICAS_CONSOLIDACAO.keys()),
+            format_func=lambda m: METRICAS_CONSOLIDACAO[m])
+
+    st.markdown("---")
+
+    if not anos:
+        st.warning("⚠️ Nenhum balancete importado.")
+    else:
+        with st.spinner("Consolidando..."):
+            sucesso, mensagem, resultado = consolidar_grupo(
+                int(controladoras[grupo]), int(ano), int(mes), metrica)
+
+        if not sucesso:
+            st.error(mensagem)
+        else:
+            st.info(
+                f"👥 **Membros:** {', '.join(m[1] for m in resultado['membros'])}")
+
+            if len(resultado["membros"]) == 1:
+                st.warning(
+                    "⚠️ Nenhuma controlada ativa vinculada a esta controladora. "
+                    "Informe a controladora do grupo na tela de Empresas.")
+
+            if resultado["sem_balancete"]:
+                st.warning(
+                    f"⚠️ Sem balancete em {str(mes).zfill(2)}/{ano}: "
+                    f"{', '.join(resultado['sem_balancete'])}")
+
+            df_consolidado = resultado["tabela"]
+
+            if df_consolidado.empty:
+                st.warning("⚠️ Nenhum item importado para o grupo no período.")
+            else:
+                somente_eliminadas = st.toggle(
+                    "Somente contas com eliminação", value=False)
+
+                if somente_eliminadas:
+                    df_consolidado = df_consolidado[df_consolidado["Eliminações"] != 0]
+
+                st.dataframe(df_consolidado, width="stretch", hide_index=True)
+
+                st.info(
+                    f"📊 **{len(df_consolidado)}** conta(s) | "
+                    f"**Eliminações:** {resultado['tabela']['Eliminações'].abs().sum():,.2f}")
+
+
+# Tab 2: Regras de eliminação
+def aba_regras():
+    from utils.consolidacao import (
+        listar_regras_eliminacao,
+        cadastrar_regra_eliminacao,
+        remover_regra_eliminacao
+    )
+
+    st.subheader("✂️ Regras de Eliminação Intercompany")
+    st.caption(
+        "Contas analíticas com o código do prefixo ou abaixo dele são eliminadas na "
+        "consolidação (1.1 cobre 1.1.05, mas não 1.10).")
+
+    df_regras = listar_regras_eliminacao()
+
+    if df_regras.empty:
+        st.info("ℹ️ Nenhuma regra cadastrada.")
+    else:
+        st.dataframe(df_regras, width="stretch", hide_index=True)
+
+        col1, col2 = st.columns([2, 4])
+        with col1:
+            regra_remover = st.selectbox(
+                "Remover regra (ID)", df_regras["ID"].tolist())
+            if st.button("🗑️ Remover", width="stretch"):
+                sucesso, mensagem = remover_regra_eliminacao(int(regra_remover))
+                if sucesso:
+                    st.success(mensagem)
+                    st.rerun()
+                else:
+                    st.error(mensagem)
+
+    st.markdown("---")
+
+    with st.form("form_nova_regra", clear_on_submit=True):
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            grupo_regra = st.selectbox(
+                "Grupo", ["Todos"] + list(controladoras.keys()))
+        with col2:
+            conta_prefixo = st.text_input(
+                "Prefixo da Conta *", placeholder="1.1.2.05")
+        with col3:
+            descricao_regra = st.text_input(
+                "Descrição", placeholder="Mútuos com partes relacionadas")
+
+        if st.form_submit_button("💾 Cadastrar Regra", type="primary"):
+            if not conta_prefixo.strip():
+                st.error("⚠️ Informe o prefixo da conta!")
+            else:
+                sucesso, mensagem = cadastrar_regra_eliminacao(
+                    None if grupo_regra == "Todos" else int(controladoras[grupo_regra]),
+                    conta_prefixo,
+                    descricao_regra or None
+                )
+                if sucesso:
+                    st.success(mensagem)
+                else:
+                    st.error(mensagem)
+
+
+if aba_ativa == ABAS[0]:
+    aba_consolidado()
+else:
+    aba_regras()
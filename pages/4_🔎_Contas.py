@@ -0,0 +1,223 @@
+import math
+
+import streamlit as st
+from utils.auth import require_authentication, get_current_user
+
+# Configuração da página
+st.set_page_config(
+    page_title="Contas - Audit MC",
+    page_icon="🔎",
+    layout="wide"
+)
+
+# Verificar autenticação
+require_authentication()
+
+# Obter usuário atual
+user = get_current_user()
+
+# Header
+st.title("🔎 Análise de Contas")
+st.markdown(f"**Usuário:** {user['nome']}")
+st.markdown("---")
+
+EMPRESAS_POR_PAGINA = 5
+GRUPOS_POR_PAGINA = 25
+
+# Abas: somente a aba ativa é executada (st.tabs executaria todas a cada
+# rerun) e cada aba importa somente os módulos que usa
+ABAS = ["📈 Série Temporal", "🔍 Busca"]
+
+aba_ativa = st.segmented_control(
+    "Aba", ABAS, default=ABAS[0], key="aba_contas",
+    label_visibility="collapsed") or ABAS[0]
+
+
+# Tab 1: Série temporal de uma conta
+def aba_serie():
+    from utils.balancete_db import listar_anos_balancetes
+    from utils.serie_conta import (
+        METRICAS_SERIE,
+        listar_empresas_com_conta,
+        montar_pivot_conta
+    )
+
+    st.subheader("📈 Série Temporal da Conta")
+
+    anos = listar_anos_balancetes()
+
+    if not anos:
+        st.warning("⚠️ Nenhum balancete importado.")
+    else:
+        col1, col2, col3, col4 = st.columns([2, 1, 1, 2])
+
+        with col1:
+            conta = st.text_input(
+                "Conta *", placeholder="1.1.01.001", key="serie_conta").strip()
+
+        with col2:
+            ano_inicio = st.selectbox(
+                "Ano Inicial", sorted(anos), key="serie_ano_inicio")
+
+        with col3:
+            ano_fim = st.selectbox(
+                "Ano Final", sorted(anos, reverse=True), key="serie_ano_fim")
+
+        with col4:
+            metrica = st.selectbox(
+                "Métrica", list(METRICAS_SERIE.keys()),
+                format_func=lambda m: METRICAS_SERIE[m], key="serie_metrica")
+
+        if not conta:
+            st.info("👆 Informe o código da conta.")
+        elif ano_inicio > ano_fim:
+            st.error("⚠️ Ano inicial maior que o ano final!")
+        else:
+            with st.spinner("Buscando empresas com a conta..."):
+                sucesso, mensagem, df_empresas_conta = listar_empresas_com_conta(
+                    conta, int(ano_inicio), int(ano_fim))
+
+            if not sucesso:
+                st.error(mensagem)
+            elif df_empresas_conta.empty:
+                st.warning("⚠️ Conta não encontrada no intervalo selecionado.")
+            else:
+                total_paginas = math.ceil(
+                    len(df_empresas_conta) / EMPRESAS_POR_PAGINA)
+
+                col1, col2 = st.columns([1, 5])
+                with col1:
+                    pagina = st.number_input(
+                        "Página", min_value=1, max_value=total_paginas, value=1,
+                        key="serie_pagina")
+                with col2:
+                    st.markdown("<br>", unsafe_allow_html=True)
+                    st.caption(
+                        f"{len(df_empresas_conta)} empresa(s) | página {pagina} de {total_paginas}")
+
+                # Somente as empresas da página atual são carregadas
+                inicio = (pagina - 1) * EMPRESAS_POR_PAGINA
+                df_pagina = df_empresas_conta.iloc[inicio:inicio + EMPRESAS_POR_PAGINA]
+
+                with st.spinner("Carregando séries..."):
+                    sucesso, mensagem, df_pivot = montar_pivot_conta(
+                        df_pagina, conta, int(ano_inicio), int(ano_fim), metrica)
+
+                if not sucesso:
+                    st.error(mensagem)
+                else:
+                    st.line_chart(df_pivot)
+                    st.dataframe(df_pivot, width="stretch")
+
+
+# Tab 2: Busca de contas em todas as empresas
+def aba_busca():
+    from utils.balancete_db import listar_anos_balancetes
+    from utils.busca_contas import (
+        TAMANHO_MINIMO_TERMO,
+        buscar_contas,
+        carregar_itens_encontrados
+    )
+
+    st.subheader("🔍 Buscar Conta nos Balancetes")
+
+    anos = listar_anos_balancetes()
+
+    if not anos:
+        st.warning("⚠️ Nenhum balancete importado.")
+    else:
+        col1, col2, col3 = st.columns([3, 1, 1])
+
+        with col1:
+            termo = st.text_input(
+                "Código ou descrição *",
+                placeholder="1.1.02 ou PIS a recuperar",
+                key="busca_termo").strip()
+
+        with col2:
+            ano_inicio = st.selectbox(
+                "Ano Inicial", sorted(anos), key="busca_ano_inicio")
+
+        with col3:
+            ano_fim = st.selectbox(
+                "Ano Final", sorted(anos, reverse=True), key="busca_ano_fim")
+
+        if len(termo) < TAMANHO_MINIMO_TERMO:
+            st.info(
+                f"👆 Informe pelo menos {TAMANHO_MINIMO_TERMO} caracteres "
+                "(códigos são buscados por prefixo).")
+        elif ano_inicio > ano_fim:
+            st.error("⚠️ Ano inicial maior que o ano final!")
+        else:
+            # Nova busca volta para a primeira página. A pilha guarda o
+            # cursor (keyset) de início de cada página já visitada.
+            chave_busca = (termo, ano_inicio, ano_fim)
+            if st.session_state.get("busca_chave") != chave_busca:
+                st.session_state.busca_chave = chave_busca
+                st.session_state.busca_cursores = [None]
+
+            cursores = st.session_state.busca_cursores
+            pagina = len(cursores)
+
+            with st.spinner("Buscando..."):
+                sucesso, mensagem, df_grupos, proximo = buscar_contas(
+                    termo, int(ano_inicio), int(ano_fim),
+                    cursores[-1], GRUPOS_POR_PAGINA)
+
+            if not sucesso:
+                st.error(mensagem)
+            elif df_grupos.empty:
+                st.warning("⚠️ Nenhuma conta encontrada.")
+            else:
+                df_grupos["Período"] = (
+                    df_grupos["mes"].astype(str).str.zfill(2) + "/"
+                    + df_grupos["ano"].astype(str))
+
+                st.dataframe(
+                    df_grupos[[
+                        "razao_social", "Período", "qtd_contas", "contas"
+                    ]].rename(columns={
+                        "razao_social": "Empresa",
+                        "qtd_contas": "Contas",
+                        "contas": "Encontradas"
+                    }),
+                    width="stretch", hide_index=True)
+
+                col1, col2, col3 = st.columns([1, 1, 4])
+                with col1:
+                    if st.button("⬅️ Anterior", disabled=pagina <= 1,
+                                 key="busca_anterior"):
+                        cursores.pop()
+                        st.rerun()
+                with col2:
+                    if st.button("Próxima ➡️", disabled=proximo is None,
+                                 key="busca_proxima"):
+                        cursores.append(proximo)
+                        st.rerun()
+                with col3:
+                    st.caption(f"Página {pagina}")
+
+                # Detalhe de um grupo
+                opcoes = list(range(len(df_grupos)))
+                indice = st.selectbox(
+                    "Ver itens de:", opcoes,
+                    format_func=lambda i: (
+                        f"{df_grupos.iloc[i]['abreviacao']} - "
+                        f"{df_grupos.iloc[i]['Período']}"),
+                    key="busca_detalhe")
+
+                grupo = df_grupos.iloc[indice]
+                sucesso, mensagem, df_itens = carregar_itens_encontrados(
+                    termo, int(grupo["empresa_id"]),
+                    int(grupo["ano"]), int(grupo["mes"]))
+
+                if sucesso:
+                    st.dataframe(df_itens, width="stretch", hide_index=True)
+                else:
+                    st.error(mensagem)
+
+
+if aba_ativa == ABAS[0]:
+    aba_serie()
+else:
+    aba_busca()
@@ -0,0 +1,54 @@
+"""
+Conversão dos formatos de valor impressos nos balancetes em PDF
+
+Cada formato aceito por PADRAO_VALOR precisa chegar ao valor numérico
+correto depois de limpar_dados e validar_tipos.
+"""
+
+import pandas as pd
+import pytest
+
+from utils.balancete_processor import limpar_dados, validar_tipos
+from utils.leitor_pdf import PADRAO_VALOR, _valor_impresso
+
+
+# (valor impresso, coluna, valor esperado)
+FORMATOS = [
+    ("1.234,56", "Saldo Atual", 1234.56),
+    ("-1.234,56", "Saldo Atual", -1234.56),
+    ("(1.234,56)", "Saldo Atual", -1234.56),
+    ("1.234,56-", "Saldo Atual", -1234.56),
+    ("1.234,56D", "Saldo Atual", 1234.56),
+    ("1.234,56d", "Saldo Atual", 1234.56),
+    ("1.234,56C", "Saldo Atual", -1234.56),
+    ("1.234,56c", "Saldo Anterior", -1234.56),
+    ("1234,56", "Saldo Atual", 1234.56),
+    ("0,00C", "Saldo Atual", 0.0),
+    ("1.234,56C", "Val. Crédito", 1234.56),
+    ("1.234,56D", "Val. Débito", 1234.56),
+    ("1.234,56-", "Val. Débito", -1234.56),
+]
+
+
+def _converter(texto, coluna):
+    """Passa um único valor pelo mesmo caminho do leitor de PDF"""
+    df = pd.DataFrame({
+        "Nível": ["1"],
+        "Conta": ["1"],
+        "Desc. Conta": ["ATIVO"],
+        "Saldo Anterior": ["0,00"],
+        "Val. Débito": ["0,00"],
+        "Val. Crédito": ["0,00"],
+        "Saldo Atual": ["0,00"],
+    })
+    df[coluna] = _valor_impresso(texto, coluna)
+
+    valido, mensagem, df_convertido = validar_tipos(limpar_dados(df))
+    assert valido, mensagem
+    return df_convertido[coluna].iloc[0]
+
+
+@pytest.mark.parametrize("texto, coluna, esperado", FORMATOS)
+def test_formato_impresso(texto, coluna, esperado):
+    assert PADRAO_VALOR.match(texto)
+    assert _converter(texto, coluna) == pytest.approx(esperado)
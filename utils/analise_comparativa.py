@@ -0,0 +1,249 @@
+"""
+analise_comparativa.py - Comparação vetorizada de balancetes entre períodos
+
+Carrega os itens de vários períodos de uma empresa em uma única consulta,
+alinha tudo pelo índice de contas (matriz contas × períodos) e calcula as
+variações (absoluta, %, MoM e YoY) com NumPy, sem merges entre pares de meses.
+
+A consulta em cache propaga os erros (não ficam guardados no cache);
+carregar_matriz_periodos converte o erro para (sucesso, mensagem, dados).
+"""
+
+import streamlit as st
+from database import conectar, desconectar
+
+
+METRICAS = {
+    "saldo_atual": "Saldo Atual",
+    "val_debito": "Val. Débito",
+    "val_credito": "Val. Crédito",
+    "saldo_anterior": "Saldo Anterior",
+}
+
+TTL_CACHE_ANALISE = 600
+
+
+@st.cache_data(ttl=TTL_CACHE_ANALISE, show_spinner=False, max_entries=32)
+def _consultar_matriz_periodos(empresa_id, ano, anos_anteriores):
+    """Matriz contas × períodos da empresa (ver carregar_matriz_periodos)"""
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        anos = list(range(ano - anos_anteriores, ano + 1))
+
+        # Filtro repetido em i.ano: poda as partições de balancete_itens
+        # (particionada por ano), o que o filtro em b.ano não faz
+        cursor.execute(f"""
+            SELECT
+                b.ano, b.mes, i.conta, i.descricao,
+                {', '.join('i.' + m for m in METRICAS)}
+            FROM public.balancete b
+            JOIN public.balancete_itens i
+                ON i.balancete_id = b.id AND i.ano = b.ano
+            WHERE b.empresa_id = %s
+              AND b.ano = ANY(%s)
+              AND i.ano = ANY(%s)
+        """, (empresa_id, anos, anos))
+
+        resultados = cursor.fetchall()
+        if not resultados:
+            return None
+
+        df = pd.DataFrame(
+            resultados, columns=["ano", "mes", "conta", "descricao"] + list(METRICAS))
+
+        return alinhar_por_conta(df)
+
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def carregar_matriz_periodos(empresa_id, ano, anos_anteriores=1):
+    """
+    Carrega e alinha os itens de uma empresa em uma matriz contas × períodos
+
+    O cache é mantido por (empresa, ano); os anos anteriores entram na mesma
+    matriz para permitir a comparação YoY.
+
+    Args:
+        empresa_id: ID da empresa
+        ano: ano de referência (ex: 2025)
+        anos_anteriores: quantidade de anos anteriores incluídos
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, dados: dict com 'contas'
+            (Index), 'descricoes' (ndarray), 'periodos' (list de tuplas
+            (ano, mes)) e uma matriz float por métrica, ou None se não
+            houver dados)
+    """
+    try:
+        dados = _consultar_matriz_periodos(empresa_id, ano, anos_anteriores)
+        return (True, "✅ Períodos carregados", dados)
+    except Exception as e:
+        print(f"❌ Erro ao carregar períodos: {e}")
+        return (False, f"❌ Erro ao carregar períodos: {str(e)}", None)
+
+
+def limpar_cache_analise():
+    """
+    Invalida as matrizes de análise em cache (chamada após importações)
+    """
+    _consultar_matriz_periodos.clear()
+
+
+def alinhar_por_conta(df):
+    """
+    Alinha itens de vários períodos pelo índice de contas
+
+    Args:
+        df: DataFrame com ano, mes, conta, descricao e as colunas de METRICAS
+
+    Returns:
+        dict no formato de carregar_matriz_periodos
+    """
+    import numpy as np
+    import pandas as pd
+
+    contas, pos_conta = np.unique(df["conta"].to_numpy(dtype=str), return_inverse=True)
+
+    chave_periodo = df["ano"].to_numpy(dtype=np.int64) * 100 + df["mes"].to_numpy(dtype=np.int64)
+    chaves, pos_periodo = np.unique(chave_periodo, return_inverse=True)
+
+    # Descrição: a do período mais recente em que a conta aparece
+    ultimas = (
+        pd.DataFrame({"conta": contas[pos_conta], "descricao": df["descricao"].to_numpy(),
+                      "periodo": chave_periodo})
+        .sort_values("periodo", kind="stable")
+        .drop_duplicates("conta", keep="last")
+    )
+    descricoes = ultimas.set_index("conta")["descricao"].reindex(contas).to_numpy()
+
+    dados = {
+        "contas": pd.Index(contas, name="Conta"),
+        "descricoes": descricoes,
+        "periodos": [(int(c // 100), int(c % 100)) for c in chaves],
+    }
+
+    for metrica in METRICAS:
+        matriz = np.zeros((len(contas), len(chaves)), dtype=float)
+        # add.at soma códigos de conta repetidos no mesmo período (a atribuição
+        # direta manteria só o último valor)
+        np.add.at(matriz, (pos_conta, pos_periodo), df[metrica].to_numpy(dtype=float))
+        dados[metrica] = matriz
+
+    return dados
+
+
+def indices_periodo_base(periodos, tipo):
+    """
+    Para cada período, retorna a coluna do período base da comparação
+
+    Args:
+        periodos: list de tuplas (ano, mes) ordenadas
+        tipo: 'MoM' (mês anterior) ou 'YoY' (mesmo mês do ano anterior)
+
+    Returns:
+        numpy.ndarray com o índice da coluna base (-1 quando inexistente)
+    """
+    import numpy as np
+
+    posicao = {p: i for i, p in enumerate(periodos)}
+    bases = []
+
+    for ano, mes in periodos:
+        if tipo == "YoY":
+            base = (ano - 1, mes)
+        else:
+            base = (ano - 1, 12) if mes == 1 else (ano, mes - 1)
+        bases.append(posicao.get(base, -1))
+
+    return np.array(bases, dtype=np.int64)
+
+
+def calcular_variacoes(dados, metrica="saldo_atual", tipo="MoM"):
+    """
+    Calcula as variações absoluta e percentual de todos os períodos de uma vez
+
+    Args:
+        dados: dict de carregar_matriz_periodos
+        metrica: chave de METRICAS
+        tipo: 'MoM' ou 'YoY'
+
+    Returns:
+        tuple (variacao_abs: ndarray, variacao_pct: ndarray) contas × períodos;
+        colunas sem período base ficam com NaN
+    """
+    import numpy as np
+
+    matriz = dados[metrica]
+    bases = indices_periodo_base(dados["periodos"], tipo)
+
+    base = np.full_like(matriz, np.nan)
+    tem_base = bases >= 0
+    base[:, tem_base] = matriz[:, bases[tem_base]]
+
+    variacao_abs = matriz - base
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variacao_pct = np.where(base != 0, variacao_abs / np.abs(base) * 100, np.nan)
+
+    return variacao_abs, variacao_pct
+
+
+def tabela_valores(dados, metrica="saldo_atual", ano=None):
+    """
+    Monta a tabela contas × períodos de uma métrica
+
+    Args:
+        dados: dict de carregar_matriz_periodos
+        metrica: chave de METRICAS
+        ano: filtra as colunas de um ano (opcional)
+
+    Returns:
+        DataFrame com Conta, Descrição e uma coluna por período (MM/AAAA)
+    """
+    return _montar_tabela(dados, dados[metrica], ano)
+
+
+def tabela_variacoes(dados, metrica="saldo_atual", tipo="MoM", percentual=False, ano=None):
+    """
+    Monta a tabela contas × períodos das variações
+
+    Args:
+        dados: dict de carregar_matriz_periodos
+        metrica: chave de METRICAS
+        tipo: 'MoM' ou 'YoY'
+        percentual: True para variação %, False para absoluta
+        ano: filtra as colunas de um ano (opcional)
+
+    Returns:
+        DataFrame com Conta, Descrição e uma coluna por período (MM/AAAA)
+    """
+    variacao_abs, variacao_pct = calcular_variacoes(dados, metrica, tipo)
+    return _montar_tabela(dados, variacao_pct if percentual else variacao_abs, ano)
+
+
+def _rotulo_periodo(periodo):
+    """Formata (ano, mes) como MM/AAAA"""
+    return f"{str(periodo[1]).zfill(2)}/{periodo[0]}"
+
+
+def _montar_tabela(dados, matriz, ano=None):
+    """Converte uma matriz contas × períodos em DataFrame para exibição"""
+    import pandas as pd
+
+    colunas = [
+        i for i, p in enumerate(dados["periodos"]) if ano is None or p[0] == ano]
+
+    df = pd.DataFrame(
+        matriz[:, colunas],
+        columns=[_rotulo_periodo(dados["periodos"][i]) for i in colunas]
+    )
+    df.insert(0, "Descrição", dados["descricoes"])
+    df.insert(0, "Conta", dados["contas"])
+
+    return df
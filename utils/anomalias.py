@@ -0,0 +1,246 @@
+"""
+anomalias.py - Pontuação de movimentos atípicos por conta
+
+Após cada importação, Val. Débito e Val. Crédito de todas as contas do
+período são comparados com o histórico da própria conta na empresa por um
+z-score robusto: mediana e MAD (desvio absoluto mediano) em vez de média e
+desvio padrão, para que um único mês atípico no passado não infle a
+referência e esconda os seguintes.
+
+O histórico fica em public.conta_estatistica, uma linha por conta com o
+movimento de cada período pontuado (jsonb por AAAAMM), mantido de forma
+incremental: a pontuação lê O(plano de contas) linhas, nunca os anos
+anteriores de balancete_itens, e a contribuição de um balancete
+reimportado é removida pela chave do período.
+"""
+
+from database import conectar, desconectar
+
+
+# Mínimo de períodos no histórico para pontuar
+MIN_PERIODOS_HISTORICO = 6
+
+# |z| robusto a partir do qual a conta é sinalizada (Iglewicz e Hoaglin)
+LIMITE_Z_SCORE = 3.5
+
+# Piso do desvio (evita z infinito em contas com histórico constante)
+DESVIO_MINIMO = 1.0
+
+# MAD -> desvio padrão equivalente em uma distribuição normal
+FATOR_MAD = 1.4826
+
+# Percentil 75 dos desvios absolutos -> desvio padrão, usado quando o MAD é
+# zero (conta com o mesmo valor em mais da metade dos meses, ex: movimento
+# esporádico); continua ignorando até 1/4 de meses atípicos no histórico
+FATOR_P75 = 0.8694
+
+CAMPOS_PONTUADOS = ("val_debito", "val_credito")
+
+
+def calcular_scores(df_atual, df_historico, periodos):
+    """
+    Calcula o z-score robusto de cada conta do período contra o histórico
+
+    O histórico vira uma matriz contas × períodos (zeros onde a conta não
+    teve movimento) e mediana/MAD são calculados por linha de uma vez.
+
+    Args:
+        df_atual: DataFrame indexado por conta com descricao, val_debito e val_credito
+        df_historico: DataFrame com conta, periodo (AAAAMM), val_debito e val_credito
+        periodos: list com os períodos (AAAAMM) do histórico da empresa
+
+    Returns:
+        DataFrame com conta, descricao, campo, valor, mediana, desvio e
+        z_score somente das contas sinalizadas
+    """
+    import numpy as np
+    import pandas as pd
+
+    colunas = ["conta", "descricao", "campo", "valor", "mediana", "desvio", "z_score"]
+
+    if len(periodos) < MIN_PERIODOS_HISTORICO or df_atual.empty:
+        return pd.DataFrame(columns=colunas)
+
+    pos_conta = df_atual.index.get_indexer(df_historico["conta"])
+    pos_periodo = pd.Index(periodos).get_indexer(df_historico["periodo"])
+    validas = (pos_conta >= 0) & (pos_periodo >= 0)
+
+    resultados = []
+
+    for campo in CAMPOS_PONTUADOS:
+        # Contas sem histórico ficam com mediana e MAD zero
+        matriz = np.zeros((len(df_atual), len(periodos)))
+        matriz[pos_conta[validas], pos_periodo[validas]] = \
+            df_historico[campo].to_numpy(dtype=float)[validas]
+
+        mediana = np.median(matriz, axis=1)
+        desvios_absolutos = np.abs(matriz - mediana[:, None])
+        mad = np.median(desvios_absolutos, axis=1) * FATOR_MAD
+        desvio = np.where(
+            mad > 0, mad, np.percentile(desvios_absolutos, 75, axis=1) * FATOR_P75)
+        desvio = np.maximum(desvio, DESVIO_MINIMO)
+
+        valor = df_atual[campo].to_numpy(dtype=float)
+        z_score = (valor - mediana) / desvio
+
+        sinalizadas = np.abs(z_score) >= LIMITE_Z_SCORE
+
+        resultados.append(pd.DataFrame({
+            "conta": df_atual.index[sinalizadas],
+            "descricao": df_atual["descricao"].to_numpy()[sinalizadas],
+            "campo": campo,
+            "valor": valor[sinalizadas],
+            "mediana": mediana[sinalizadas],
+            "desvio": desvio[sinalizadas],
+            "z_score": z_score[sinalizadas],
+        }))
+
+    return pd.concat(resultados, ignore_index=True)[colunas]
+
+
+def pontuar_balancete(empresa_id, balancete_id):
+    """
+    Pontua o balancete contra o histórico, grava as contas sinalizadas e
+    soma o período às estatísticas (tudo na mesma transação)
+
+    Args:
+        empresa_id: ID da empresa
+        balancete_id: ID do balancete recém-importado
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, qtd_sinalizadas: int)
+    """
+    import pandas as pd
+    from psycopg2.extras import Json, execute_values
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT ano, mes, fl_estatistica
+            FROM public.balancete
+            WHERE id = %s AND empresa_id = %s
+            FOR UPDATE
+        """, (balancete_id, empresa_id))
+        cabecalho = cursor.fetchone()
+
+        if not cabecalho:
+            return (False, "❌ Balancete não encontrado para pontuação", 0)
+
+        ano, mes, ja_pontuado = cabecalho
+        if ja_pontuado:
+            return (True, "ℹ️ Balancete já pontuado", 0)
+
+        # Períodos no histórico da empresa (AAAAMM)
+        cursor.execute("""
+            SELECT ano * 100 + mes
+            FROM public.balancete
+            WHERE empresa_id = %s AND fl_estatistica = true
+        """, (empresa_id,))
+        periodos = [linha[0] for linha in cursor.fetchall()]
+        n_periodos = len(periodos)
+
+        # Movimento do período, agregado por conta
+        cursor.execute("""
+            SELECT conta, min(descricao), sum(val_debito), sum(val_credito)
+            FROM public.balancete_itens
+            WHERE balancete_id = %s AND ano = %s
+            GROUP BY conta
+        """, (balancete_id, ano))
+        df_atual = pd.DataFrame(
+            cursor.fetchall(), columns=["conta", "descricao", "val_debito", "val_credito"]
+        ).set_index("conta")
+        df_atual[["val_debito", "val_credito"]] = \
+            df_atual[["val_debito", "val_credito"]].astype(float)
+
+        # Histórico das contas do período (uma linha por conta e período)
+        cursor.execute("""
+            SELECT s.conta, h.key::integer,
+                   (h.value ->> 0)::double precision,
+                   (h.value ->> 1)::double precision
+            FROM public.conta_estatistica s
+            CROSS JOIN LATERAL jsonb_each(s.historico) h
+            WHERE s.empresa_id = %s
+              AND s.conta = ANY(%s)
+        """, (empresa_id, df_atual.index.tolist()))
+        df_historico = pd.DataFrame(cursor.fetchall(), columns=[
+            "conta", "periodo", "val_debito", "val_credito"])
+
+        df_sinalizadas = calcular_scores(df_atual, df_historico, periodos)
+
+        if not df_sinalizadas.empty:
+            execute_values(cursor, """
+                INSERT INTO public.balancete_anomalia (
+                    balancete_id, empresa_id, ano, mes, conta, descricao,
+                    campo, valor, mediana, desvio, z_score
+                ) VALUES %s
+            """, [
+                (balancete_id, empresa_id, ano, mes, *linha)
+                for linha in df_sinalizadas.itertuples(index=False)
+            ])
+
+        # Acrescentar o período ao histórico das contas
+        if not df_atual.empty:
+            chave = str(ano * 100 + mes)
+
+            execute_values(cursor, """
+                INSERT INTO public.conta_estatistica (empresa_id, conta, historico)
+                VALUES %s
+                ON CONFLICT (empresa_id, conta) DO UPDATE SET
+                    historico = conta_estatistica.historico || EXCLUDED.historico
+            """, [
+                (empresa_id, conta, Json({chave: [debito, credito]}))
+                for conta, debito, credito in zip(
+                    df_atual.index.tolist(),
+                    df_atual["val_debito"].tolist(),
+                    df_atual["val_credito"].tolist())
+            ], page_size=1000)
+
+        cursor.execute(
+            "UPDATE public.balancete SET fl_estatistica = true WHERE id = %s",
+            (balancete_id,))
+
+        conn.commit()
+
+        qtd = df_sinalizadas["conta"].nunique()
+        if n_periodos < MIN_PERIODOS_HISTORICO:
+            mensagem = (f"ℹ️ Anomalias: histórico insuficiente "
+                        f"({n_periodos}/{MIN_PERIODOS_HISTORICO} períodos)")
+        elif qtd > 0:
+            mensagem = f"🚨 Anomalias: {qtd} conta(s) com movimento atípico"
+        else:
+            mensagem = "✅ Anomalias: nenhum movimento atípico"
+
+        return (True, mensagem, qtd)
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"❌ Erro ao pontuar balancete: {e}")
+        return (False, f"❌ Erro ao pontuar anomalias: {str(e)}", 0)
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def remover_estatisticas_balancete(cursor, empresa_id, mes, ano):
+    """
+    Retira do histórico o período do balancete que será deletado
+    (deve ser chamada na mesma transação do DELETE)
+
+    Args:
+        cursor: cursor psycopg2 aberto
+        empresa_id: ID da empresa
+        mes: mês (1-12)
+        ano: ano (ex: 2025)
+    """
+    chave = str(int(ano) * 100 + int(mes))
+
+    cursor.execute("""
+        UPDATE public.conta_estatistica
+        SET historico = historico - %s::text
+        WHERE empresa_id = %s
+          AND historico ? %s::text
+    """, (chave, empresa_id, chave))
@@ -0,0 +1,166 @@
+"""
+armazenamento_temporario.py - Balancetes processados fora da memória da sessão
+
+Entre "Processar" e "Gravar" o DataFrame processado fica num arquivo Arrow
+IPC temporário (sem compressão, para ser lido por memory map) e a sessão
+guarda somente o identificador. Arquivos mais antigos que
+TTL_ARQUIVO_TEMPORARIO são apagados a cada nova gravação, então sessões
+abandonadas não acumulam dados no servidor. Os arquivos de exportação
+(utils/exportacao.py) usam a mesma pasta e a mesma expiração.
+"""
+
+import os
+import re
+import tempfile
+import time
+import uuid
+
+
+PASTA_TEMPORARIA = os.path.join(tempfile.gettempdir(), "audit_mc_processados")
+
+EXTENSAO_ARQUIVO = ".arrow"
+
+# Segundos até um arquivo processado e não gravado ser descartado
+TTL_ARQUIVO_TEMPORARIO = 2 * 3600
+
+PADRAO_IDENTIFICADOR = re.compile(r"[0-9a-f]{32}")
+
+
+def _caminho(identificador, extensao=EXTENSAO_ARQUIVO):
+    """Caminho do arquivo de um identificador (rejeita valores fora do padrão)"""
+    if not identificador or not PADRAO_IDENTIFICADOR.fullmatch(identificador):
+        raise ValueError(f"Identificador inválido: {identificador!r}")
+    return os.path.join(PASTA_TEMPORARIA, identificador + extensao)
+
+
+def limpar_arquivos_expirados(ttl=TTL_ARQUIVO_TEMPORARIO):
+    """
+    Apaga os arquivos temporários mais antigos que o TTL
+
+    Args:
+        ttl: idade máxima em segundos
+
+    Returns:
+        int com a quantidade de arquivos apagados
+    """
+    if not os.path.isdir(PASTA_TEMPORARIA):
+        return 0
+
+    limite = time.time() - ttl
+    apagados = 0
+
+    for nome in os.listdir(PASTA_TEMPORARIA):
+        caminho = os.path.join(PASTA_TEMPORARIA, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+                apagados += 1
+        except OSError:
+            pass
+
+    return apagados
+
+
+def reservar_arquivo(extensao):
+    """
+    Reserva um caminho novo na pasta temporária (o arquivo não é criado)
+
+    Args:
+        extensao: extensão do arquivo (ex: ".csv")
+
+    Returns:
+        str com o caminho do arquivo
+    """
+    limpar_arquivos_expirados()
+    os.makedirs(PASTA_TEMPORARIA, exist_ok=True)
+    return _caminho(uuid.uuid4().hex, extensao)
+
+
+def salvar_dataframe(df):
+    """
+    Grava o DataFrame num arquivo temporário e retorna o identificador
+
+    Args:
+        df: DataFrame processado
+
+    Returns:
+        str com o identificador (guardado na sessão no lugar do DataFrame)
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    limpar_arquivos_expirados()
+    os.makedirs(PASTA_TEMPORARIA, exist_ok=True)
+
+    identificador = uuid.uuid4().hex
+    caminho = _caminho(identificador)
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Grava com outro nome e renomeia: leitores nunca veem o arquivo pela metade
+    caminho_parcial = caminho + ".parcial"
+    with pa.OSFile(caminho_parcial, "wb") as destino:
+        with ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    os.replace(caminho_parcial, caminho)
+
+    return identificador
+
+
+def abrir_tabela(identificador):
+    """
+    Abre a tabela Arrow do identificador via memory map (sem copiar o arquivo)
+
+    Args:
+        identificador: retornado por salvar_dataframe
+
+    Returns:
+        pyarrow.Table ou None se o arquivo expirou/não existe
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    try:
+        caminho = _caminho(identificador)
+        with pa.memory_map(caminho, "r") as origem:
+            return ipc.open_file(origem).read_all()
+    except (ValueError, FileNotFoundError):
+        return None
+
+
+def carregar_dataframe(identificador, inicio=None, quantidade=None):
+    """
+    Lê o DataFrame (ou somente uma janela de linhas) do arquivo temporário
+
+    Args:
+        identificador: retornado por salvar_dataframe
+        inicio: primeira linha da janela (None = desde o início)
+        quantidade: linhas da janela (None = até o fim)
+
+    Returns:
+        DataFrame ou None se o arquivo expirou/não existe
+    """
+    tabela = abrir_tabela(identificador)
+    if tabela is None:
+        return None
+
+    if inicio is not None or quantidade is not None:
+        tabela = tabela.slice(inicio or 0, quantidade)
+
+    return tabela.to_pandas()
+
+
+def remover_dataframe(identificador):
+    """
+    Apaga o arquivo temporário do identificador (se existir)
+
+    Args:
+        identificador: retornado por salvar_dataframe
+    """
+    if not identificador:
+        return
+    try:
+        os.remove(_caminho(identificador))
+    except (ValueError, OSError):
+        # Inexistente ou ainda mapeado em memória (Windows): a limpeza por
+        # TTL_ARQUIVO_TEMPORARIO apaga depois
+        pass
@@ -0,0 +1,137 @@
+"""
+auditoria.py - Log de eventos de auditoria (importações, exclusões, empresas)
+
+registrar_evento recebe o cursor da operação auditada: o evento é gravado na
+mesma transação e só existe se a operação for confirmada. A leitura da
+timeline usa paginação keyset sobre (dt_evento, id), que lê somente as
+linhas da página pelo índice, independente de quantos anos de eventos a
+tabela acumule.
+"""
+
+from datetime import datetime, time, timedelta
+
+from database import conectar, desconectar
+
+
+EVENTO_IMPORTACAO_BALANCETE = "importacao_balancete"
+EVENTO_EXCLUSAO_BALANCETE = "exclusao_balancete"
+EVENTO_CADASTRO_EMPRESA = "cadastro_empresa"
+EVENTO_ATUALIZACAO_EMPRESA = "atualizacao_empresa"
+EVENTO_INATIVACAO_EMPRESA = "inativacao_empresa"
+
+# Rótulos exibidos na timeline
+ROTULOS_EVENTOS = {
+    EVENTO_IMPORTACAO_BALANCETE: "📤 Importação de balancete",
+    EVENTO_EXCLUSAO_BALANCETE: "🗑️ Exclusão de balancete",
+    EVENTO_CADASTRO_EMPRESA: "🏢 Cadastro de empresa",
+    EVENTO_ATUALIZACAO_EMPRESA: "✏️ Atualização de empresa",
+    EVENTO_INATIVACAO_EMPRESA: "⛔ Inativação de empresa",
+}
+
+EVENTOS_POR_PAGINA = 50
+
+
+def registrar_evento(cursor, tipo, descricao, usuario=None, empresa_id=None,
+                     balancete_id=None, detalhes=None):
+    """
+    Grava um evento de auditoria na transação do cursor informado
+
+    Não faz commit: o evento é confirmado (ou desfeito) junto com a operação.
+
+    Args:
+        cursor: cursor da transação da operação auditada
+        tipo: uma das constantes EVENTO_*
+        descricao: texto exibido na timeline
+        usuario: email do usuário (None = não informado)
+        empresa_id: ID da empresa afetada
+        balancete_id: ID do balancete afetado
+        detalhes: dict opcional gravado em jsonb
+    """
+    from psycopg2.extras import Json
+
+    cursor.execute("""
+        INSERT INTO public.evento_auditoria (
+            tipo, usuario, empresa_id, balancete_id, descricao, detalhes
+        ) VALUES (%s, %s, %s, %s, %s, %s)
+    """, (tipo, usuario, empresa_id, balancete_id, descricao,
+          Json(detalhes) if detalhes is not None else None))
+
+
+def listar_eventos(data_inicio, data_fim, tipos=None, apos=None,
+                   por_pagina=EVENTOS_POR_PAGINA):
+    """
+    Lista uma página da timeline de eventos, do mais recente ao mais antigo
+
+    Args:
+        data_inicio: primeira data do intervalo (date)
+        data_fim: última data do intervalo (date, inclusiva)
+        tipos: lista de constantes EVENTO_* (None = todos)
+        apos: cursor (dt_evento, id) do último evento da página anterior
+            (None = primeira página)
+        por_pagina: eventos por página
+
+    Returns:
+        tuple (eventos: list de dict, proximo: cursor da próxima página ou None)
+    """
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        condicoes = ["e.dt_evento >= %s", "e.dt_evento < %s"]
+        params = [
+            datetime.combine(data_inicio, time.min),
+            datetime.combine(data_fim + timedelta(days=1), time.min),
+        ]
+
+        if tipos:
+            condicoes.append("e.tipo = ANY(%s)")
+            params.append(list(tipos))
+
+        # Keyset: continua a partir do último evento exibido
+        if apos is not None:
+            condicoes.append("(e.dt_evento, e.id) < (%s, %s)")
+            params.extend(apos)
+
+        # Busca uma linha a mais para saber se existe próxima página
+        query = f"""
+            SELECT e.id, e.dt_evento, e.tipo, e.usuario, e.empresa_id,
+                   emp.razao_social, e.balancete_id, e.descricao, e.detalhes
+            FROM public.evento_auditoria e
+            LEFT JOIN public.empresa emp ON emp.id = e.empresa_id
+            WHERE {' AND '.join(condicoes)}
+            ORDER BY e.dt_evento DESC, e.id DESC
+            LIMIT %s
+        """
+        params.append(por_pagina + 1)
+
+        cursor.execute(query, params)
+        linhas = cursor.fetchall()
+
+        eventos = [
+            {
+                "id": linha[0],
+                "dt_evento": linha[1],
+                "tipo": linha[2],
+                "usuario": linha[3],
+                "empresa_id": linha[4],
+                "empresa": linha[5],
+                "balancete_id": linha[6],
+                "descricao": linha[7],
+                "detalhes": linha[8],
+            }
+            for linha in linhas[:por_pagina]
+        ]
+
+        proximo = None
+        if len(linhas) > por_pagina:
+            proximo = (eventos[-1]["dt_evento"], eventos[-1]["id"])
+
+        return (eventos, proximo)
+
+    except Exception as e:
+        print(f"❌ Erro ao listar eventos de auditoria: {e}")
+        return ([], None)
+    finally:
+        if conn:
+            desconectar(conn)
@@ -1,5 +1,11 @@
 import streamlit as st
-from utils.supabase_client import supabase
+from utils.sessoes_auth import (
+    emprestar_cliente,
+    encerrar_sessao,
+    obter_registro_sessoes,
+    registrar_sessao,
+    validar_sessao
+)
 
 
 def login(email: str, password: str) -> dict:
@@ -14,19 +20,24 @@ def login(email: str, password: str) -> dict:
         dict com 'success' (bool) e 'message' (str)
     """
     try:
-        response = supabase.auth.sign_in_with_password({
-            "email": email,
-            "password": password
-        })
-
-        if response.user:
-            # Armazena dados do usuário na sessão
-            st.session_state.authenticated = True
-            st.session_state.user = {
+        # Cliente exclusivo do pool: logins simultâneos não disputam estado
+        with emprestar_cliente(obter_registro_sessoes()) as cliente:
+            response = cliente.sign_in_with_password({
+                "email": email,
+                "password": password
+            })
+
+        if response.user and response.session:
+            usuario = {
                 "id": response.user.id,
                 "email": response.user.email,
                 "nome": response.user.user_metadata.get("nome_completo", email.split("@")[0])
             }
+
+            # Armazena dados do usuário na sessão (tokens ficam no registro do processo)
+            st.session_state.sessao_auth_id = registrar_sessao(response.session, usuario)
+            st.session_state.authenticated = True
+            st.session_state.user = usuario
             return {"success": True, "message": "Login realizado com sucesso!"}
         else:
             return {"success": False, "message": "Erro ao realizar login."}
@@ -50,7 +61,7 @@ def logout():
     Realiza logout do usuário
     """
     try:
-        supabase.auth.sign_out()
+        encerrar_sessao(st.session_state.pop("sessao_auth_id", None))
         st.session_state.authenticated = False
         st.session_state.user = None
         st.rerun()
@@ -62,10 +73,23 @@ def check_authentication():
     """
     Verifica se o usuário está autenticado
 
+    A validação é local (sessão registrada e token dentro da validade), sem
+    chamada à API de autenticação a cada carregamento de página.
+
     Returns:
         bool: True se autenticado, False caso contrário
     """
-    return st.session_state.get("authenticated", False)
+    if not st.session_state.get("authenticated", False):
+        return False
+
+    if validar_sessao(st.session_state.get("sessao_auth_id")) is None:
+        # Sessão expirada/revogada: volta para o login
+        st.session_state.authenticated = False
+        st.session_state.user = None
+        st.session_state.pop("sessao_auth_id", None)
+        return False
+
+    return True
 
 
 def get_current_user():
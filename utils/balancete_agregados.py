@@ -0,0 +1,164 @@
+"""
+balancete_agregados.py - Agregados por balancete calculados na importação
+
+Os agregados (contagens, totais de débito/crédito e saldos por grupo de
+primeiro nível) são calculados de forma vetorizada sobre o DataFrame
+processado e gravados junto com o cabeçalho em public.balancete_agregado.
+"""
+
+
+COLUNAS_VALORES = ['Saldo Anterior', 'Val. Débito', 'Val. Crédito', 'Saldo Atual']
+
+# Grupos de primeiro nível do plano de contas: prefixo da conta -> grupo.
+# A comparação é por segmentos inteiros do código (2.3 cobre 2.3.01 e
+# 2.03.01, mas não 2.31 nem 23.1) e o prefixo mais longo tem precedência
+# (ex: "2.3" classifica o PL dentro do grupo "2" do passivo). Códigos sem
+# separador são comparados pelos dígitos.
+GRUPOS_CONTA = {
+    "1": "ativo",
+    "2": "passivo",
+    "2.3": "pl",
+    "3": "receitas",
+    "4": "despesas",
+}
+
+
+def obter_mascara_movimento(df_itens):
+    """
+    Identifica as linhas com movimento (algum valor diferente de zero)
+
+    Args:
+        df_itens: DataFrame processado do balancete
+
+    Returns:
+        numpy.ndarray booleano (True = linha será gravada)
+    """
+    valores = df_itens[COLUNAS_VALORES].to_numpy(dtype=float)
+    return (valores != 0).any(axis=1)
+
+
+def marcar_contas_analiticas(contas):
+    """
+    Marca as contas analíticas (sem contas filhas no próprio balancete)
+
+    Após ordenar os códigos, uma conta sintética é sempre seguida por uma
+    filha (mesmo prefixo + separador), então basta comparar cada conta com a
+    próxima.
+
+    Args:
+        contas: Series/array com os códigos das contas
+
+    Returns:
+        numpy.ndarray booleano na ordem original
+    """
+    import numpy as np
+
+    contas = np.asarray(contas, dtype=str)
+    if len(contas) == 0:
+        return np.zeros(0, dtype=bool)
+
+    ordem = np.argsort(contas, kind="stable")
+    ordenadas = contas[ordem]
+
+    separador = "." if np.char.find(ordenadas, ".").max() >= 0 else ""
+    prefixos = np.char.add(ordenadas[:-1], separador)
+
+    tem_filha = np.zeros(len(ordenadas), dtype=bool)
+    tem_filha[:-1] = (
+        np.char.startswith(ordenadas[1:], prefixos) &
+        (np.char.str_len(ordenadas[1:]) > np.char.str_len(ordenadas[:-1]))
+    )
+
+    analiticas = np.empty(len(contas), dtype=bool)
+    analiticas[ordem] = ~tem_filha
+    return analiticas
+
+
+def classificar_grupos(contas, grupos=GRUPOS_CONTA):
+    """
+    Classifica as contas nos grupos de primeiro nível
+
+    Args:
+        contas: Series com os códigos das contas
+        grupos: dict prefixo -> nome do grupo
+
+    Returns:
+        numpy.ndarray com o nome do grupo ('' quando não classificada)
+    """
+    import numpy as np
+    import pandas as pd
+
+    codigos = pd.Series(contas, dtype=str).str.strip()
+
+    # Segmentos sem zeros à esquerda, separados por "." (2.03.01 -> 2.3.1)
+    segmentos = (
+        codigos
+        .str.replace(r"(^|\D)0+(?=\d)", r"\1", regex=True)
+        .str.replace(r"\D+", ".", regex=True)
+        .str.strip(".")
+    )
+    sem_separador = ~codigos.str.contains(r"\D", regex=True).to_numpy(dtype=bool)
+    segmentos = segmentos.to_numpy(dtype=str)
+    digitos = codigos.to_numpy(dtype=str)
+
+    resultado = np.full(len(codigos), "", dtype=object)
+
+    # Do prefixo mais curto para o mais longo: o mais longo sobrescreve
+    for prefixo in sorted(grupos, key=lambda p: len(p.split("."))):
+        por_segmento = (
+            (segmentos == prefixo) |
+            np.char.startswith(segmentos, prefixo + ".")
+        )
+        por_digitos = np.char.startswith(digitos, prefixo.replace(".", ""))
+        mascara = np.where(sem_separador, por_digitos, por_segmento)
+        resultado[mascara] = grupos[prefixo]
+
+    return resultado
+
+
+def calcular_agregados(df_itens, mascara_movimento=None):
+    """
+    Calcula os agregados do balancete em uma única passada vetorizada
+
+    Totais e saldos por grupo somam apenas contas analíticas, evitando
+    contar o mesmo valor em cada nível da hierarquia.
+
+    Args:
+        df_itens: DataFrame processado do balancete
+        mascara_movimento: máscara de linhas com movimento (opcional)
+
+    Returns:
+        dict com contagens, totais e saldos por grupo
+    """
+    import numpy as np
+    import pandas as pd
+
+    if mascara_movimento is None:
+        mascara_movimento = obter_mascara_movimento(df_itens)
+
+    valores = df_itens[COLUNAS_VALORES].to_numpy(dtype=float)
+    analiticas = marcar_contas_analiticas(df_itens['Conta'])
+    grupos = classificar_grupos(df_itens['Conta'])
+
+    totais = valores[analiticas].sum(axis=0) if analiticas.any() else np.zeros(4)
+
+    saldos_grupo = (
+        pd.Series(valores[analiticas, 3])
+        .groupby(grupos[analiticas])
+        .sum()
+    )
+
+    agregados = {
+        "qtd_itens": int(mascara_movimento.sum()),
+        "qtd_ignorados": int((~mascara_movimento).sum()),
+        "qtd_analiticas": int((analiticas & mascara_movimento).sum()),
+        "total_saldo_anterior": round(float(totais[0]), 2),
+        "total_debito": round(float(totais[1]), 2),
+        "total_credito": round(float(totais[2]), 2),
+        "total_saldo_atual": round(float(totais[3]), 2),
+    }
+
+    for grupo in sorted(set(GRUPOS_CONTA.values())):
+        agregados[f"saldo_{grupo}"] = round(float(saldos_grupo.get(grupo, 0.0)), 2)
+
+    return agregados
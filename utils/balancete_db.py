@@ -3,7 +3,27 @@ balancete_db.py - Operações de banco de dados para balancetes
 """
 
 from database import conectar, desconectar
-import pandas as pd
+from utils.dashboard_db import limpar_cache_dashboard
+from utils.analise_comparativa import limpar_cache_analise
+from utils.consolidacao import limpar_cache_consolidacao
+from utils.continuidade import verificar_continuidade_importacao
+from utils.serie_conta import limpar_cache_serie
+from utils.anomalias import pontuar_balancete, remover_estatisticas_balancete
+from utils.busca_contas import limpar_cache_busca
+from utils.auditoria import (
+    EVENTO_EXCLUSAO_BALANCETE,
+    EVENTO_IMPORTACAO_BALANCETE,
+    registrar_evento
+)
+from utils.balancete_agregados import (
+    COLUNAS_VALORES,
+    calcular_agregados,
+    obter_mascara_movimento
+)
+
+
+# Itens por bloco de INSERT (o progresso é informado a cada bloco)
+TAMANHO_BLOCO_ITENS = 5000
 
 
 def obter_empresa_id_por_razao_social(razao_social):
@@ -35,15 +55,18 @@ def obter_empresa_id_por_razao_social(razao_social):
             desconectar(conn)
 
 
-def deletar_balancete_existente(empresa_id, mes, ano):
+def deletar_balancete_existente(empresa_id, mes, ano, usuario=None):
     """
     Deleta balancete existente (mesma empresa + mês + ano)
     CASCADE vai deletar os itens automaticamente
+    A contribuição do balancete às estatísticas de anomalias é removida
+    e o evento de auditoria é gravado na mesma transação
 
     Args:
         empresa_id: ID da empresa
         mes: mês (1-12)
         ano: ano (ex: 2025)
+        usuario: email do usuário (registrado no evento de auditoria)
 
     Returns:
         tuple (sucesso: bool, mensagem: str)
@@ -53,13 +76,24 @@ def deletar_balancete_existente(empresa_id, mes, ano):
         conn = conectar()
         cursor = conn.cursor()
 
+        # Retirar o balancete do histórico de anomalias antes de deletá-lo
+        remover_estatisticas_balancete(cursor, empresa_id, mes, ano)
+
         query = """
             DELETE FROM public.balancete
             WHERE empresa_id = %s AND mes = %s AND ano = %s
+            RETURNING id
         """
 
         cursor.execute(query, (empresa_id, mes, ano))
-        linhas_deletadas = cursor.rowcount
+        ids_deletados = [linha[0] for linha in cursor.fetchall()]
+        linhas_deletadas = len(ids_deletados)
+
+        for balancete_id in ids_deletados:
+            registrar_evento(
+                cursor, EVENTO_EXCLUSAO_BALANCETE,
+                f"Balancete {int(mes):02d}/{ano} excluído",
+                usuario=usuario, empresa_id=empresa_id, balancete_id=balancete_id)
 
         conn.commit()
 
@@ -78,10 +112,13 @@ def deletar_balancete_existente(empresa_id, mes, ano):
             desconectar(conn)
 
 
-def inserir_balancete(empresa_id, mes, ano, df_itens, user_email):
+def inserir_balancete(empresa_id, mes, ano, df_itens, user_email, progresso=None):
     """
-    Insere novo balancete (cabeçalho + itens)
+    Insere novo balancete (cabeçalho + itens + agregados)
     OTIMIZAÇÃO: Grava somente linhas com movimento (valores diferentes de zero)
+    Os agregados (contagens, débito/crédito e saldos por grupo) são calculados
+    na mesma passada vetorizada e gravados na mesma transação, assim como o
+    evento de auditoria da importação
 
     Args:
         empresa_id: ID da empresa
@@ -89,10 +126,13 @@ def inserir_balancete(empresa_id, mes, ano, df_itens, user_email):
         ano: ano (ex: 2025)
         df_itens: DataFrame com os itens do balancete
         user_email: email do usuário que está importando
+        progresso: callback opcional progresso(etapa: str, fracao: float)
 
     Returns:
         tuple (sucesso: bool, mensagem: str, balancete_id: int ou None)
     """
+    from psycopg2.extras import execute_values
+
     print(f"🔍 [DEBUG] inserir_balancete - Início")
     print(
         f"🔍 [DEBUG] empresa_id={empresa_id}, mes={mes}, ano={ano}, user_email={user_email}")
@@ -116,56 +156,94 @@ def inserir_balancete(empresa_id, mes, ano, df_itens, user_email):
         balancete_id = cursor.fetchone()[0]
         print(f"🔍 [DEBUG] Cabeçalho inserido! balancete_id={balancete_id}")
 
-        # 2. Inserir itens do balancete
+        # 2. Garantir partição anual de balancete_itens (particionada por ano)
+        cursor.execute(
+            "SELECT public.garantir_particao_balancete_itens(%s)", (ano,))
+
+        # 3. Inserir itens do balancete
         query_itens = """
             INSERT INTO public.balancete_itens (
-                balancete_id, nivel, conta, descricao,
-                saldo_anterior, val_debito, val_credito, saldo_atual
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                balancete_id, ano, nivel, conta, descricao,
+                saldo_anterior, val_debito, val_credito, saldo_atual,
+                conta_padrao
+            ) VALUES %s
         """
 
-        # Preparar dados para inserção em lote
-        itens_para_inserir = []
-        linhas_ignoradas = 0
-
+        # Passada vetorizada: filtro de movimento + agregados do balancete
         print(f"🔍 [DEBUG] Iniciando processamento de itens...")
-        for idx, row in df_itens.iterrows():
-            # Converter valores para float
-            saldo_anterior = float(row['Saldo Anterior'])
-            val_debito = float(row['Val. Débito'])
-            val_credito = float(row['Val. Crédito'])
-            saldo_atual = float(row['Saldo Atual'])
-
-            # FILTRO: Gravar SOMENTE se pelo menos um valor for diferente de zero
-            if saldo_anterior != 0 or val_debito != 0 or val_credito != 0 or saldo_atual != 0:
-                item = (
-                    balancete_id,
-                    row['Nível'] if row['Nível'] not in [
-                        '', 'nan', 'None'] else None,
-                    row['Conta'],
-                    row['Desc. Conta'] if row['Desc. Conta'] not in [
-                        '', 'nan', 'None'] else None,
-                    saldo_anterior,
-                    val_debito,
-                    val_credito,
-                    saldo_atual
-                )
-                itens_para_inserir.append(item)
-            else:
-                linhas_ignoradas += 1
+        mascara_movimento = obter_mascara_movimento(df_itens)
+        agregados = calcular_agregados(df_itens, mascara_movimento)
+
+        # FILTRO: Gravar SOMENTE linhas com pelo menos um valor diferente de zero
+        df_gravar = df_itens.loc[mascara_movimento]
+        valores_vazios = ['', 'nan', 'None']
+        niveis = df_gravar['Nível'].where(
+            ~df_gravar['Nível'].isin(valores_vazios), None)
+        descricoes = df_gravar['Desc. Conta'].where(
+            ~df_gravar['Desc. Conta'].isin(valores_vazios), None)
+        valores = df_gravar[COLUNAS_VALORES].to_numpy(dtype=float).tolist()
+
+        # Conta do plano padrão (preenchida por processar_balancete)
+        if 'Conta Padrão' in df_gravar.columns:
+            contas_padrao = df_gravar['Conta Padrão'].astype(object).where(
+                df_gravar['Conta Padrão'].notna(), None).tolist()
+        else:
+            contas_padrao = [None] * len(df_gravar)
+
+        itens_para_inserir = [
+            (balancete_id, ano, nivel, conta, descricao, *linha, conta_padrao)
+            for nivel, conta, descricao, linha, conta_padrao in zip(
+                niveis.tolist(), df_gravar['Conta'].tolist(),
+                descricoes.tolist(), valores, contas_padrao)
+        ]
+        linhas_ignoradas = agregados['qtd_ignorados']
 
         print(
             f"🔍 [DEBUG] Itens processados: {len(itens_para_inserir)} para inserir, {linhas_ignoradas} ignoradas")
 
-        # Executar inserção em lote (somente linhas com movimento)
+        # Executar inserção em lote (somente linhas com movimento), em blocos
+        # para informar o progresso
         if itens_para_inserir:
             print(
                 f"🔍 [DEBUG] Executando insert em lote de {len(itens_para_inserir)} itens...")
-            cursor.executemany(query_itens, itens_para_inserir)
+            total_itens = len(itens_para_inserir)
+            for inicio in range(0, total_itens, TAMANHO_BLOCO_ITENS):
+                execute_values(cursor, query_itens,
+                               itens_para_inserir[inicio:inicio + TAMANHO_BLOCO_ITENS],
+                               page_size=1000)
+                if progresso:
+                    progresso("Gravando itens",
+                              min(inicio + TAMANHO_BLOCO_ITENS, total_itens) / total_itens)
             print(f"🔍 [DEBUG] Insert em lote concluído!")
         else:
             print(f"🔍 [DEBUG] Nenhum item para inserir!")
 
+        if progresso:
+            progresso("Atualizando resumos", 1.0)
+
+        # 4. Gravar agregados do balancete
+        colunas_agregado = list(agregados.keys())
+        query_agregado = f"""
+            INSERT INTO public.balancete_agregado (
+                balancete_id, {', '.join(colunas_agregado)}
+            ) VALUES ({', '.join(['%s'] * (len(colunas_agregado) + 1))})
+        """
+        cursor.execute(query_agregado, [balancete_id] + list(agregados.values()))
+
+        # 5. Atualizar resumo materializado (listagens) na mesma transação
+        cursor.execute(
+            "SELECT public.atualizar_resumo_balancete(%s)", (balancete_id,))
+
+        # 6. Evento de auditoria (confirmado junto com a importação)
+        registrar_evento(
+            cursor, EVENTO_IMPORTACAO_BALANCETE,
+            f"Balancete {int(mes):02d}/{ano} importado",
+            usuario=user_email, empresa_id=empresa_id, balancete_id=balancete_id,
+            detalhes={
+                "linhas_gravadas": len(itens_para_inserir),
+                "linhas_ignoradas": int(linhas_ignoradas),
+            })
+
         print(f"🔍 [DEBUG] Executando commit...")
         conn.commit()
         print(f"🔍 [DEBUG] Commit realizado com sucesso!")
@@ -191,12 +269,14 @@ def inserir_balancete(empresa_id, mes, ano, df_itens, user_email):
             print(f"🔍 [DEBUG] Conexão fechada")
 
 
-def importar_balancete_completo(razao_social, mes, ano, df_itens, user_email):
+def importar_balancete_completo(razao_social, mes, ano, df_itens, user_email, progresso=None):
     """
     Pipeline completo de importação:
     1. Buscar ID da empresa
     2. Deletar balancete existente
     3. Inserir novo balancete
+    4. Pontuar anomalias de movimento contra o histórico
+    5. Verificar continuidade de saldos com o mês anterior
 
     Args:
         razao_social: razão social da empresa
@@ -204,10 +284,16 @@ def importar_balancete_completo(razao_social, mes, ano, df_itens, user_email):
         ano: ano (ex: 2025)
         df_itens: DataFrame com os itens do balancete
         user_email: email do usuário que está importando
+        progresso: callback opcional progresso(etapa: str, fracao: float),
+            com a fração do pipeline inteiro (0 a 1)
 
     Returns:
         tuple (sucesso: bool, mensagem: str)
     """
+    def informar(etapa, fracao):
+        if progresso:
+            progresso(etapa, fracao)
+
     print(f"🔍 [DEBUG] importar_balancete_completo - Início")
     print(
         f"🔍 [DEBUG] razao_social={razao_social}, mes={mes}, ano={ano}, user_email={user_email}")
@@ -222,8 +308,10 @@ def importar_balancete_completo(razao_social, mes, ano, df_itens, user_email):
         return (False, f"❌ Empresa '{razao_social}' não encontrada no banco")
 
     # 2. Deletar balancete existente
+    informar("Removendo balancete anterior", 0.02)
     print(f"🔍 [DEBUG] Deletando balancete existente...")
-    sucesso, msg_delete = deletar_balancete_existente(empresa_id, mes, ano)
+    sucesso, msg_delete = deletar_balancete_existente(
+        empresa_id, mes, ano, usuario=user_email)
     print(f"🔍 [DEBUG] Resultado delete: sucesso={sucesso}, msg={msg_delete}")
 
     if not sucesso:
@@ -232,8 +320,10 @@ def importar_balancete_completo(razao_social, mes, ano, df_itens, user_email):
 
     # 3. Inserir novo balancete
     print(f"🔍 [DEBUG] Chamando inserir_balancete...")
+    informar("Gravando itens", 0.05)
     sucesso, msg_insert, balancete_id = inserir_balancete(
-        empresa_id, mes, ano, df_itens, user_email)
+        empresa_id, mes, ano, df_itens, user_email,
+        progresso=lambda etapa, fracao: informar(etapa, 0.05 + 0.8 * fracao))
     print(
         f"🔍 [DEBUG] Resultado insert: sucesso={sucesso}, balancete_id={balancete_id}")
 
@@ -241,8 +331,27 @@ def importar_balancete_completo(razao_social, mes, ano, df_itens, user_email):
         print(f"❌ [DEBUG] Erro ao inserir!")
         return (False, msg_insert)
 
+    # 4. Pontuar anomalias contra o histórico da empresa
+    informar("Pontuando anomalias", 0.88)
+    print(f"🔍 [DEBUG] Pontuando anomalias...")
+    _, msg_anomalias, _ = pontuar_balancete(empresa_id, balancete_id)
+
+    # Invalidar indicadores, matrizes de análise, consolidações e séries em cache
+    limpar_cache_dashboard()
+    limpar_cache_analise()
+    limpar_cache_consolidacao()
+    limpar_cache_serie()
+    limpar_cache_busca()
+
+    # 5. Verificar continuidade com o mês anterior
+    informar("Verificando continuidade", 0.95)
+    print(f"🔍 [DEBUG] Verificando continuidade de saldos...")
+    _, msg_continuidade, _ = verificar_continuidade_importacao(
+        empresa_id, int(ano), int(mes))
+
     # Mensagem consolidada
-    mensagem_final = f"{msg_delete}\n{msg_insert}"
+    mensagem_final = f"{msg_delete}\n{msg_insert}\n{msg_anomalias}\n{msg_continuidade}"
+    informar("Concluído", 1.0)
     print(f"🔍 [DEBUG] importar_balancete_completo - Sucesso! Retornando...")
 
     return (True, mensagem_final)
@@ -261,6 +370,8 @@ def listar_balancetes(empresa="Todas", ano="Todos", mes="Todos"):
         DataFrame com colunas: razao_social, cnpj_form, abreviacao, ano, mes, 
         dt_importacao, user_importacao
     """
+    import pandas as pd
+
     conn = None
     try:
         conn = conectar()
@@ -274,9 +385,9 @@ def listar_balancetes(empresa="Todas", ano="Todos", mes="Todos"):
                 abreviacao,
                 ano,
                 mes,
-                balancete_dt_importacao as dt_importacao,
+                dt_importacao,
                 user_importacao
-            FROM public.vw_empresa_balancete
+            FROM public.balancete_resumo
             WHERE 1=1
         """
 
@@ -296,7 +407,7 @@ def listar_balancetes(empresa="Todas", ano="Todos", mes="Todos"):
             params.append(int(mes))
 
         # Ordenar
-        query += " ORDER BY balancete_dt_importacao DESC, razao_social, ano DESC, mes DESC"
+        query += " ORDER BY dt_importacao DESC, razao_social, ano DESC, mes DESC"
 
         cursor.execute(query, params)
         resultados = cursor.fetchall()
@@ -322,3 +433,31 @@ def listar_balancetes(empresa="Todas", ano="Todos", mes="Todos"):
     finally:
         if conn:
             desconectar(conn)
+
+
+def listar_anos_balancetes():
+    """
+    Lista os anos que possuem balancetes importados (para filtros)
+
+    Returns:
+        list de anos (int) em ordem decrescente
+    """
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT DISTINCT ano
+            FROM public.balancete_resumo
+            ORDER BY ano DESC
+        """)
+
+        return [linha[0] for linha in cursor.fetchall()]
+
+    except Exception as e:
+        print(f"❌ Erro ao listar anos: {e}")
+        return []
+    finally:
+        if conn:
+            desconectar(conn)
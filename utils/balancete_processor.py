@@ -2,8 +2,11 @@
 balancete_processor.py - Processamento de arquivos de balancete com pandas
 """
 
-import pandas as pd
 import io
+import os
+from utils.leitor_excel import ler_balancete_xls, ler_balancete_xlsx
+from utils.leitor_pdf import ler_balancete_pdf
+from utils.plano_contas import aplicar_mapeamento
 
 
 def ler_balancete_txt_csv(arquivo, encoding='utf-8'):
@@ -17,6 +20,8 @@ def ler_balancete_txt_csv(arquivo, encoding='utf-8'):
     Returns:
         tuple (sucesso: bool, mensagem: str, df: DataFrame ou None)
     """
+    import pandas as pd
+
     try:
         # Ler arquivo
         df = pd.read_csv(
@@ -42,6 +47,29 @@ def ler_balancete_txt_csv(arquivo, encoding='utf-8'):
         return (False, f"❌ Erro ao ler arquivo: {str(e)}", None)
 
 
+def ler_balancete(arquivo, nome=None):
+    """
+    Lê o arquivo de balancete conforme a extensão (.csv/.txt, .xlsx, .xls ou .pdf)
+
+    Args:
+        arquivo: arquivo uploadado (UploadedFile do Streamlit) ou BytesIO
+        nome: nome do arquivo (padrão: arquivo.name; sem nome lê como CSV)
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame ou None)
+    """
+    extensao = os.path.splitext(nome or getattr(arquivo, "name", "") or "")[1].lower()
+
+    if extensao in (".xlsx", ".xlsm"):
+        return ler_balancete_xlsx(arquivo)
+    if extensao == ".xls":
+        return ler_balancete_xls(arquivo)
+    if extensao == ".pdf":
+        return ler_balancete_pdf(arquivo)
+
+    return ler_balancete_txt_csv(arquivo)
+
+
 def validar_estrutura(df):
     """
     Valida se o DataFrame tem as colunas esperadas
@@ -132,6 +160,8 @@ def validar_tipos(df):
     Returns:
         tuple (valido: bool, mensagem: str, df_convertido: DataFrame ou None)
     """
+    import pandas as pd
+
     try:
         df_convertido = df.copy()
 
@@ -217,18 +247,22 @@ def remover_coluna_saldo_periodo(df):
     return df
 
 
-def processar_balancete(arquivo):
+def processar_balancete(arquivo, plano_contas_id=None, nome=None):
     """
     Processa arquivo de balancete completo (pipeline)
 
     Args:
         arquivo: arquivo uploadado (UploadedFile do Streamlit)
+        plano_contas_id: plano de contas da empresa; quando informado, as
+            contas são mapeadas para o plano padrão (coluna 'Conta Padrão')
+        nome: nome do arquivo, define o leitor pela extensão (padrão:
+            arquivo.name)
 
     Returns:
         tuple (sucesso: bool, mensagem: str, df: DataFrame ou None)
     """
-    # 1. Ler arquivo
-    sucesso, mensagem, df = ler_balancete_txt_csv(arquivo)
+    # 1. Ler arquivo (CSV/TXT, planilha Excel ou PDF)
+    sucesso, mensagem, df = ler_balancete(arquivo, nome)
     if not sucesso:
         return (False, mensagem, None)
 
@@ -258,4 +292,18 @@ def processar_balancete(arquivo):
     if len(df_final) == 0:
         return (False, "❌ Arquivo não possui dados válidos", None)
 
-    return (True, f"✅ Processado com sucesso! {len(df_final)} registros", df_final)
+    mensagem = f"✅ Processado com sucesso! {len(df_final)} registros"
+
+    # 9. Mapear contas para o plano padrão
+    if plano_contas_id:
+        sucesso, mensagem_mapeamento, df_final, contas_nao_mapeadas = aplicar_mapeamento(
+            df_final, plano_contas_id)
+        if not sucesso:
+            return (False, mensagem_mapeamento, None)
+
+        if contas_nao_mapeadas:
+            mensagem += f" | ⚠️ {len(contas_nao_mapeadas)} conta(s) sem mapeamento no plano padrão"
+        else:
+            mensagem += " | 🗂️ Todas as contas mapeadas no plano padrão"
+
+    return (True, mensagem, df_final)
@@ -0,0 +1,248 @@
+"""
+busca_contas.py - Busca de contas em todos os balancetes importados
+
+Códigos de conta (somente dígitos e pontos) são buscados por prefixo
+(conta LIKE 'termo%', índice text_pattern_ops); qualquer outro termo é
+buscado na descrição (ILIKE '%termo%', índice de trigramas). O resultado é
+agrupado por empresa e período e paginado no banco por keyset.
+"""
+
+import re
+
+import streamlit as st
+from database import conectar, desconectar
+
+
+TTL_CACHE_BUSCA = 300
+
+# Trigramas exigem pelo menos 3 caracteres para usar o índice
+TAMANHO_MINIMO_TERMO = 3
+
+# Quantidade de contas exibidas por grupo (empresa/período)
+CONTAS_POR_GRUPO = 5
+
+PADRAO_CODIGO_CONTA = re.compile(r"[\d.]+")
+
+
+def montar_filtro_busca(termo):
+    """
+    Monta a condição SQL da busca conforme o tipo do termo
+
+    Args:
+        termo: código (prefixo) ou trecho da descrição
+
+    Returns:
+        tuple (condicao_sql: str, parametro: str, tipo: str)
+    """
+    termo = termo.strip()
+    escapado = (termo.replace("\\", "\\\\")
+                .replace("%", "\\%")
+                .replace("_", "\\_"))
+
+    if PADRAO_CODIGO_CONTA.fullmatch(termo):
+        return ("i.conta LIKE %s", f"{escapado}%", "conta")
+
+    return ("i.descricao ILIKE %s", f"%{escapado}%", "descricao")
+
+
+COLUNAS_GRUPOS = [
+    "empresa_id", "razao_social", "abreviacao", "ano", "mes",
+    "qtd_contas", "contas"
+]
+
+
+@st.cache_data(ttl=TTL_CACHE_BUSCA, show_spinner=False, max_entries=256)
+def _consultar_grupos(termo, ano_inicio, ano_fim, apos, por_pagina):
+    """
+    Consulta uma página de grupos (empresa/período) que atendem à busca
+
+    Erros de banco são propagados para não ficarem guardados no cache.
+
+    Args:
+        termo: código (prefixo) ou trecho da descrição da conta
+        ano_inicio: primeiro ano do intervalo (limita as partições lidas)
+        ano_fim: último ano do intervalo
+        apos: cursor (razao_social, empresa_id, ano, mes) do último grupo
+            da página anterior (None = primeira página)
+        por_pagina: grupos por página
+
+    Returns:
+        tuple (df: DataFrame com um grupo por linha, proximo: cursor ou None)
+    """
+    import pandas as pd
+
+    condicao, parametro, _ = montar_filtro_busca(termo)
+
+    condicoes = [condicao, "i.ano BETWEEN %s AND %s"]
+    params = [parametro, ano_inicio, ano_fim]
+
+    # Keyset: descarta os grupos já exibidos antes de agregar, em vez de
+    # reagregar todas as páginas anteriores com OFFSET
+    if apos is not None:
+        razao_social, empresa_id, ano, mes = apos
+        condicoes.append("""(
+                (e.razao_social, e.id) > (%s, %s)
+                OR ((e.razao_social, e.id) = (%s, %s)
+                    AND (b.ano, b.mes) < (%s, %s))
+            )""")
+        params.extend([razao_social, empresa_id,
+                       razao_social, empresa_id, ano, mes])
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        # Uma linha a mais indica se existe próxima página (sem count total)
+        cursor.execute(f"""
+            SELECT
+                e.id,
+                e.razao_social,
+                e.abreviacao,
+                b.ano,
+                b.mes,
+                count(*),
+                (array_agg(i.conta || ' - ' || COALESCE(i.descricao, '')
+                           ORDER BY i.conta))[1:{CONTAS_POR_GRUPO}]
+            FROM public.balancete_itens i
+            JOIN public.balancete b
+                ON b.id = i.balancete_id
+               AND b.ano = i.ano
+            JOIN public.empresa e ON e.id = b.empresa_id
+            WHERE {' AND '.join(condicoes)}
+            GROUP BY e.id, e.razao_social, e.abreviacao, b.ano, b.mes
+            ORDER BY e.razao_social, e.id, b.ano DESC, b.mes DESC
+            LIMIT %s
+        """, params + [por_pagina + 1])
+
+        resultados = cursor.fetchall()
+    finally:
+        if conn:
+            desconectar(conn)
+
+    df = pd.DataFrame(resultados[:por_pagina], columns=COLUNAS_GRUPOS)
+    df["contas"] = df["contas"].map(lambda contas: " | ".join(contas or []))
+
+    proximo = None
+    if len(resultados) > por_pagina:
+        ultimo = df.iloc[-1]
+        proximo = (ultimo["razao_social"], int(ultimo["empresa_id"]),
+                   int(ultimo["ano"]), int(ultimo["mes"]))
+
+    return (df, proximo)
+
+
+def buscar_contas(termo, ano_inicio, ano_fim, apos=None, por_pagina=25):
+    """
+    Busca a conta em todas as empresas, agrupando por empresa e período
+
+    Os grupos são ordenados por empresa e do período mais recente ao mais
+    antigo. A soma de saldos não é exibida: o termo encontra contas
+    sintéticas e analíticas juntas, e somá-las contaria o mesmo valor
+    mais de uma vez.
+
+    Args:
+        termo: código (prefixo) ou trecho da descrição da conta
+        ano_inicio: primeiro ano do intervalo (limita as partições lidas)
+        ano_fim: último ano do intervalo
+        apos: cursor retornado pela página anterior (None = primeira página)
+        por_pagina: grupos por página
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame com um grupo por
+        linha, proximo: cursor da próxima página ou None)
+    """
+    import pandas as pd
+
+    if len(termo.strip()) < TAMANHO_MINIMO_TERMO:
+        return (True, "", pd.DataFrame(columns=COLUNAS_GRUPOS), None)
+
+    try:
+        df, proximo = _consultar_grupos(
+            termo, ano_inicio, ano_fim, apos, por_pagina)
+        return (True, "", df, proximo)
+    except Exception as e:
+        print(f"❌ Erro ao buscar contas: {e}")
+        return (False, f"❌ Erro ao buscar contas: {str(e)}", None, None)
+
+
+@st.cache_data(ttl=TTL_CACHE_BUSCA, show_spinner=False, max_entries=256)
+def _consultar_itens_encontrados(termo, empresa_id, ano, mes):
+    """
+    Consulta os itens que atendem à busca em um balancete
+
+    Erros de banco são propagados para não ficarem guardados no cache.
+
+    Args:
+        termo: código (prefixo) ou trecho da descrição da conta
+        empresa_id: ID da empresa
+        ano: ano do balancete
+        mes: mês do balancete
+
+    Returns:
+        DataFrame com os itens encontrados
+    """
+    import pandas as pd
+
+    condicao, parametro, _ = montar_filtro_busca(termo)
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute(f"""
+            SELECT
+                i.conta,
+                i.descricao,
+                i.saldo_anterior,
+                i.val_debito,
+                i.val_credito,
+                i.saldo_atual
+            FROM public.balancete b
+            JOIN public.balancete_itens i
+                ON i.balancete_id = b.id
+               AND i.ano = b.ano
+            WHERE b.empresa_id = %s
+              AND b.ano = %s
+              AND b.mes = %s
+              AND {condicao}
+            ORDER BY i.conta
+        """, (empresa_id, ano, mes, parametro))
+
+        return pd.DataFrame(cursor.fetchall(), columns=[
+            "Conta", "Descrição", "Saldo Anterior",
+            "Val. Débito", "Val. Crédito", "Saldo Atual"
+        ])
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def carregar_itens_encontrados(termo, empresa_id, ano, mes):
+    """
+    Carrega os itens que atendem à busca em um balancete
+
+    Args:
+        termo: código (prefixo) ou trecho da descrição da conta
+        empresa_id: ID da empresa
+        ano: ano do balancete
+        mes: mês do balancete
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame ou None)
+    """
+    try:
+        return (True, "", _consultar_itens_encontrados(
+            termo, empresa_id, ano, mes))
+    except Exception as e:
+        print(f"❌ Erro ao carregar itens encontrados: {e}")
+        return (False, f"❌ Erro ao carregar itens encontrados: {str(e)}", None)
+
+
+def limpar_cache_busca():
+    """
+    Invalida os resultados de busca em cache (chamada após importações)
+    """
+    _consultar_grupos.clear()
+    _consultar_itens_encontrados.clear()
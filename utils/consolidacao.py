@@ -0,0 +1,342 @@
+"""
+consolidacao.py - Consolidação de balancetes de grupos econômicos
+
+Soma os balancetes da controladora e de suas controladas em um período e
+aplica as regras de eliminação intercompany (public.regra_eliminacao).
+
+A agregação é feita sobre índices de conta: cada item recebe a posição da
+sua conta e do seu membro, e np.bincount soma tudo de uma vez (agregação
+esparsa), sem merges entre os balancetes dos membros.
+
+A consolidação em cache propaga os erros (não ficam guardados no cache);
+consolidar_grupo converte o erro para (sucesso, mensagem, resultado).
+"""
+
+import streamlit as st
+from database import conectar, desconectar
+from utils.balancete_agregados import marcar_contas_analiticas
+
+
+TTL_CACHE_CONSOLIDACAO = 600
+
+METRICAS_CONSOLIDACAO = {
+    "saldo_atual": "Saldo Atual",
+    "saldo_anterior": "Saldo Anterior",
+    "val_debito": "Val. Débito",
+    "val_credito": "Val. Crédito",
+}
+
+
+def obter_membros_grupo(cursor, controladora_id):
+    """
+    Retorna os membros do grupo (controladora + controladas)
+
+    Controladas são somente as empresas ativas com fl_controlada e
+    controladora_id apontando para a controladora; controladas sem vínculo
+    não entram em nenhum grupo (o vínculo é editado na tela de Empresas).
+
+    Args:
+        cursor: cursor psycopg2 aberto
+        controladora_id: ID da controladora
+
+    Returns:
+        list de tuplas (id, abreviacao) com a controladora em primeiro lugar
+    """
+    cursor.execute("""
+        SELECT id, abreviacao
+        FROM public.empresa
+        WHERE id = %s
+           OR (fl_controlada = true AND fl_ativa = true
+               AND controladora_id = %s)
+        ORDER BY (id = %s) DESC, razao_social
+    """, (controladora_id, controladora_id, controladora_id))
+
+    linhas = cursor.fetchall()
+    if not linhas or linhas[0][0] != controladora_id:
+        return []
+
+    return [(linha[0], linha[1]) for linha in linhas]
+
+
+def propagar_para_sinteticas(contas, valores_analiticas):
+    """
+    Soma os valores das contas analíticas em todas as contas ascendentes
+
+    Com as contas ordenadas, os descendentes de uma conta ocupam um intervalo
+    contíguo; np.searchsorted encontra os intervalos e uma soma acumulada
+    fornece o total de cada um.
+
+    Args:
+        contas: ndarray ordenado com os códigos das contas
+        valores_analiticas: ndarray com valores apenas nas contas analíticas
+
+    Returns:
+        ndarray com o valor de cada conta (analíticas + descendentes)
+    """
+    import numpy as np
+
+    separador = "." if np.char.find(contas, ".").max() >= 0 else ""
+    prefixos = np.char.add(contas, separador)
+
+    inicio = np.searchsorted(contas, prefixos, side="left")
+    fim = np.searchsorted(contas, np.char.add(prefixos, "\U0010ffff"), side="left")
+
+    acumulado = np.concatenate([[0.0], np.cumsum(valores_analiticas)])
+    total = acumulado[fim] - acumulado[inicio]
+
+    # Com separador o intervalo não inclui a própria conta
+    if separador:
+        total = total + valores_analiticas
+
+    return total
+
+
+def listar_regras_eliminacao(controladora_id=None):
+    """
+    Lista as regras de eliminação de um grupo (incluindo as globais)
+
+    Args:
+        controladora_id: ID da controladora ou None para todas
+
+    Returns:
+        DataFrame com ID, Grupo, Prefixo da Conta, Descrição e Ativa
+    """
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        query = """
+            SELECT r.id, COALESCE(e.abreviacao, 'Todos'), r.conta_prefixo,
+                   r.descricao, r.fl_ativa
+            FROM public.regra_eliminacao r
+            LEFT JOIN public.empresa e ON e.id = r.controladora_id
+        """
+        params = []
+
+        if controladora_id is not None:
+            query += " WHERE r.controladora_id = %s OR r.controladora_id IS NULL"
+            params.append(controladora_id)
+
+        query += " ORDER BY r.conta_prefixo"
+
+        cursor.execute(query, params)
+
+        return pd.DataFrame(cursor.fetchall(), columns=[
+            "ID", "Grupo", "Prefixo da Conta", "Descrição", "Ativa"
+        ])
+
+    except Exception as e:
+        print(f"❌ Erro ao listar regras de eliminação: {e}")
+        return pd.DataFrame()
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def cadastrar_regra_eliminacao(controladora_id, conta_prefixo, descricao=None):
+    """
+    Cadastra regra de eliminação intercompany
+
+    Args:
+        controladora_id: ID da controladora ou None (vale para todos os grupos)
+        conta_prefixo: código (ou prefixo) das contas eliminadas
+        descricao: descrição da regra
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str)
+    """
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            INSERT INTO public.regra_eliminacao (controladora_id, conta_prefixo, descricao)
+            VALUES (%s, %s, %s)
+        """, (controladora_id, conta_prefixo.strip().rstrip("."), descricao))
+
+        conn.commit()
+        limpar_cache_consolidacao()
+
+        return (True, "✅ Regra de eliminação cadastrada!")
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"❌ Erro ao cadastrar regra: {e}")
+        return (False, f"❌ Erro ao cadastrar regra: {str(e)}")
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def remover_regra_eliminacao(regra_id):
+    """
+    Remove regra de eliminação
+
+    Args:
+        regra_id: ID da regra
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str)
+    """
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "DELETE FROM public.regra_eliminacao WHERE id = %s", (regra_id,))
+        linhas_deletadas = cursor.rowcount
+
+        conn.commit()
+        limpar_cache_consolidacao()
+
+        if linhas_deletadas > 0:
+            return (True, "🗑️ Regra removida!")
+        else:
+            return (False, "❌ Regra não encontrada!")
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"❌ Erro ao remover regra: {e}")
+        return (False, f"❌ Erro ao remover regra: {str(e)}")
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def consolidar_grupo(controladora_id, ano, mes, metrica="saldo_atual"):
+    """
+    Consolida os balancetes do grupo em um período
+
+    Args:
+        controladora_id: ID da controladora
+        ano: ano (ex: 2025)
+        mes: mês (1-12)
+        metrica: chave de METRICAS_CONSOLIDACAO
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, resultado: dict com 'membros'
+            (list de (id, abreviacao)), 'sem_balancete' (abreviações sem
+            balancete no período) e 'tabela' (DataFrame com Conta,
+            Descrição, uma coluna por membro, Soma, Eliminações e
+            Consolidado), ou None)
+    """
+    if metrica not in METRICAS_CONSOLIDACAO:
+        raise ValueError(f"Métrica inválida: {metrica}")
+
+    try:
+        resultado = _consolidar_grupo(controladora_id, ano, mes, metrica)
+    except Exception as e:
+        print(f"❌ Erro ao consolidar grupo: {e}")
+        return (False, f"❌ Erro ao consolidar grupo: {str(e)}", None)
+
+    if resultado is None:
+        return (False, "❌ Controladora não encontrada!", None)
+
+    return (True, "✅ Grupo consolidado", resultado)
+
+
+def limpar_cache_consolidacao():
+    """
+    Invalida as consolidações em cache (importações e regras de eliminação)
+    """
+    _consolidar_grupo.clear()
+
+
+@st.cache_data(ttl=TTL_CACHE_CONSOLIDACAO, show_spinner=False, max_entries=64)
+def _consolidar_grupo(controladora_id, ano, mes, metrica):
+    """Consolidação do grupo em cache (ver consolidar_grupo)"""
+    import numpy as np
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        membros = obter_membros_grupo(cursor, controladora_id)
+        if not membros:
+            return None
+
+        ids_membros = [m[0] for m in membros]
+
+        cursor.execute(f"""
+            SELECT b.empresa_id, i.conta, i.descricao, i.{metrica}
+            FROM public.balancete b
+            JOIN public.balancete_itens i
+                ON i.balancete_id = b.id AND i.ano = b.ano
+            WHERE b.empresa_id = ANY(%s)
+              AND b.ano = %s
+              AND b.mes = %s
+        """, (ids_membros, ano, mes))
+        itens = cursor.fetchall()
+
+        cursor.execute("""
+            SELECT conta_prefixo
+            FROM public.regra_eliminacao
+            WHERE fl_ativa = true
+              AND (controladora_id = %s OR controladora_id IS NULL)
+        """, (controladora_id,))
+        prefixos_eliminacao = [linha[0] for linha in cursor.fetchall()]
+
+    finally:
+        if conn:
+            desconectar(conn)
+
+    colunas_membros = [m[1] for m in membros]
+    importados = {linha[0] for linha in itens}
+    sem_balancete = [m[1] for m in membros if m[0] not in importados]
+
+    if not itens:
+        return {"membros": membros, "sem_balancete": sem_balancete,
+                "tabela": pd.DataFrame()}
+
+    empresa_ids = np.fromiter((linha[0] for linha in itens), dtype=np.int64, count=len(itens))
+    contas_itens = np.array([linha[1] for linha in itens], dtype=str)
+    valores = np.fromiter((float(linha[3]) for linha in itens), dtype=float, count=len(itens))
+
+    # Índices de conta e de membro
+    contas, pos_conta = np.unique(contas_itens, return_inverse=True)
+    pos_membro = pd.Index(ids_membros).get_indexer(empresa_ids)
+
+    n_contas, n_membros = len(contas), len(membros)
+
+    # Agregação esparsa contas × membros
+    por_membro = np.bincount(
+        pos_conta * n_membros + pos_membro,
+        weights=valores,
+        minlength=n_contas * n_membros
+    ).reshape(n_contas, n_membros)
+
+    soma = por_membro.sum(axis=1)
+
+    # Eliminações: contas analíticas cobertas pelas regras (a própria conta
+    # do prefixo ou as filhas, "1.1" não cobre "1.10"), propagadas para as
+    # contas sintéticas ascendentes
+    eliminadas = np.zeros(n_contas, dtype=bool)
+    for prefixo in prefixos_eliminacao:
+        eliminadas |= (contas == prefixo) | np.char.startswith(contas, prefixo + ".")
+
+    analiticas = marcar_contas_analiticas(contas)
+    eliminacao_analiticas = np.where(eliminadas & analiticas, -soma, 0.0)
+    eliminacoes = propagar_para_sinteticas(contas, eliminacao_analiticas)
+
+    # Descrição: primeira encontrada para cada conta
+    descricoes = np.empty(n_contas, dtype=object)
+    primeira = np.unique(pos_conta, return_index=True)[1]
+    descricoes[:] = [itens[i][2] for i in primeira]
+
+    tabela = pd.DataFrame(por_membro, columns=colunas_membros)
+    tabela.insert(0, "Descrição", descricoes)
+    tabela.insert(0, "Conta", contas)
+    tabela["Soma"] = soma
+    tabela["Eliminações"] = eliminacoes
+    tabela["Consolidado"] = soma + eliminacoes
+
+    return {"membros": membros, "sem_balancete": sem_balancete, "tabela": tabela}
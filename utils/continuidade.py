@@ -0,0 +1,186 @@
+"""
+continuidade.py - Verificação de continuidade de saldos entre meses
+
+O Saldo Anterior de cada conta no mês N deve ser igual ao Saldo Atual da
+mesma conta no mês N-1. A verificação cruza os itens de cada balancete com
+os do período anterior em uma única consulta (FULL JOIN por conta sobre o
+índice (balancete_id, conta)); contas ausentes de um dos lados valem zero,
+pois linhas sem movimento não são gravadas.
+"""
+
+from database import conectar, desconectar
+
+
+TOLERANCIA_CONTINUIDADE = 0.01
+
+
+def verificar_continuidade(empresa_id=None, ano=None, mes=None,
+                           tolerancia=TOLERANCIA_CONTINUIDADE):
+    """
+    Lista as quebras de continuidade entre cada balancete e o mês anterior
+
+    Args:
+        empresa_id: ID da empresa ou None (todas)
+        ano: ano do balancete verificado ou None (todos)
+        mes: mês do balancete verificado ou None (todos)
+        tolerancia: diferença máxima aceita (arredondamentos)
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame com Empresa, Ano,
+            Mês, Conta, Descrição, Saldo Atual (mês anterior), Saldo Anterior
+            (mês) e Diferença, ou None em caso de erro)
+    """
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        query = """
+            WITH pares AS (
+                SELECT
+                    b.id  AS balancete_id,
+                    b.ano,
+                    b.mes,
+                    b.empresa_id,
+                    bp.id  AS anterior_id,
+                    bp.ano AS anterior_ano
+                FROM public.balancete b
+                JOIN public.balancete bp
+                    ON bp.empresa_id = b.empresa_id
+                   AND bp.ano = CASE WHEN b.mes = 1 THEN b.ano - 1 ELSE b.ano END
+                   AND bp.mes = CASE WHEN b.mes = 1 THEN 12 ELSE b.mes - 1 END
+                WHERE 1=1
+        """
+
+        params = []
+
+        if empresa_id is not None:
+            query += " AND b.empresa_id = %s"
+            params.append(empresa_id)
+
+        if ano is not None:
+            query += " AND b.ano = %s"
+            params.append(int(ano))
+
+        if mes is not None:
+            query += " AND b.mes = %s"
+            params.append(int(mes))
+
+        query += """
+            )
+            SELECT
+                e.razao_social,
+                p.ano,
+                p.mes,
+                q.conta,
+                q.descricao,
+                q.saldo_atual_anterior,
+                q.saldo_anterior_atual,
+                q.saldo_anterior_atual - q.saldo_atual_anterior AS diferenca
+            FROM pares p
+            JOIN public.empresa e ON e.id = p.empresa_id
+            CROSS JOIN LATERAL (
+                SELECT
+                    COALESCE(a.conta, c.conta)         AS conta,
+                    COALESCE(a.descricao, c.descricao) AS descricao,
+                    COALESCE(c.saldo_atual, 0)         AS saldo_atual_anterior,
+                    COALESCE(a.saldo_anterior, 0)      AS saldo_anterior_atual
+                FROM (
+                    SELECT conta, descricao, saldo_anterior
+                    FROM public.balancete_itens
+                    WHERE balancete_id = p.balancete_id AND ano = p.ano
+                ) a
+                FULL JOIN (
+                    SELECT conta, descricao, saldo_atual
+                    FROM public.balancete_itens
+                    WHERE balancete_id = p.anterior_id AND ano = p.anterior_ano
+                ) c ON c.conta = a.conta
+                WHERE abs(COALESCE(a.saldo_anterior, 0) - COALESCE(c.saldo_atual, 0)) > %s
+            ) q
+            ORDER BY e.razao_social, p.ano, p.mes, q.conta
+        """
+        params.append(tolerancia)
+
+        cursor.execute(query, params)
+        resultados = cursor.fetchall()
+
+        df = pd.DataFrame(resultados, columns=[
+            'Empresa',
+            'Ano',
+            'Mês',
+            'Conta',
+            'Descrição',
+            'Saldo Atual (mês anterior)',
+            'Saldo Anterior (mês)',
+            'Diferença'
+        ])
+
+        colunas_valores = ['Saldo Atual (mês anterior)', 'Saldo Anterior (mês)', 'Diferença']
+        df[colunas_valores] = df[colunas_valores].astype(float)
+
+        return (True, f"✅ {len(df)} quebra(s) de continuidade encontrada(s)", df)
+
+    except Exception as e:
+        print(f"❌ Erro ao verificar continuidade: {e}")
+        import traceback
+        traceback.print_exc()
+        return (False, f"❌ Erro ao verificar continuidade: {str(e)}", None)
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def verificar_continuidade_importacao(empresa_id, ano, mes):
+    """
+    Verifica a continuidade de um balancete recém-importado contra o mês
+    anterior (somente os dois períodos envolvidos)
+
+    Args:
+        empresa_id: ID da empresa
+        ano: ano do balancete importado
+        mes: mês do balancete importado
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df_quebras: DataFrame ou None)
+    """
+    import pandas as pd
+
+    ano_ant, mes_ant = (ano - 1, 12) if mes == 1 else (ano, mes - 1)
+    periodo_ant = f"{str(mes_ant).zfill(2)}/{ano_ant}"
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT 1 FROM public.balancete
+            WHERE empresa_id = %s AND ano = %s AND mes = %s
+        """, (empresa_id, ano_ant, mes_ant))
+        existe_anterior = cursor.fetchone() is not None
+
+    except Exception as e:
+        print(f"❌ Erro ao buscar balancete anterior: {e}")
+        return (False, f"❌ Continuidade não verificada: {str(e)}", None)
+    finally:
+        if conn:
+            desconectar(conn)
+
+    if not existe_anterior:
+        return (True, f"ℹ️ Continuidade não verificada: sem balancete de {periodo_ant}",
+                pd.DataFrame())
+
+    sucesso, mensagem, df_quebras = verificar_continuidade(empresa_id, ano, mes)
+
+    if not sucesso:
+        return (False, f"❌ Continuidade não verificada: {mensagem.removeprefix('❌ ')}", None)
+
+    if df_quebras.empty:
+        return (True, f"🔗 Continuidade OK em relação a {periodo_ant}", df_quebras)
+
+    return (True,
+            f"⚠️ Continuidade: {len(df_quebras)} conta(s) com Saldo Anterior "
+            f"diferente do Saldo Atual de {periodo_ant}",
+            df_quebras)
@@ -0,0 +1,393 @@
+"""
+dashboard_db.py - Consultas e indicadores do Dashboard
+
+Lê somente dados pré-agregados (public.balancete_resumo) e o cadastro de
+empresas, com cache de curta duração. Os indicadores são calculados em
+pandas sobre O(balancetes) linhas, nunca sobre balancete_itens.
+
+As consultas em cache propagam os erros (um erro temporário do banco não
+fica guardado no cache); as funções públicas de carga convertem o erro para
+(sucesso, mensagem, df).
+"""
+
+import streamlit as st
+from database import conectar, desconectar
+
+
+# Tempo de vida do cache (segundos)
+TTL_CACHE_DASHBOARD = 120
+
+GRUPOS_DASHBOARD = {
+    "saldo_ativo": "Ativo",
+    "saldo_passivo": "Passivo",
+    "saldo_pl": "Patrimônio Líquido",
+    "saldo_receitas": "Receitas",
+    "saldo_despesas": "Despesas",
+}
+
+
+@st.cache_data(ttl=TTL_CACHE_DASHBOARD, show_spinner=False)
+def _consultar_resumos():
+    """Resumo de todos os balancetes (DataFrame com uma linha por balancete)"""
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        colunas = [
+            "empresa_id", "razao_social", "abreviacao", "fl_ativa", "ano", "mes",
+            "dt_importacao", "qtd_itens", "total_debito", "total_credito",
+        ] + list(GRUPOS_DASHBOARD.keys())
+
+        cursor.execute(f"""
+            SELECT {', '.join(colunas)}
+            FROM public.balancete_resumo
+        """)
+
+        df = pd.DataFrame(cursor.fetchall(), columns=colunas)
+
+        colunas_numericas = ["total_debito", "total_credito"] + \
+            list(GRUPOS_DASHBOARD.keys())
+        df[colunas_numericas] = df[colunas_numericas].astype(float)
+
+        return df
+
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def carregar_resumos():
+    """
+    Carrega o resumo de todos os balancetes importados
+
+    Balancetes sem agregado têm os saldos por grupo nulos (NaN).
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame ou None)
+    """
+    try:
+        return (True, "✅ Resumos carregados", _consultar_resumos())
+    except Exception as e:
+        print(f"❌ Erro ao carregar resumos: {e}")
+        return (False, f"❌ Erro ao carregar resumos: {str(e)}", None)
+
+
+@st.cache_data(ttl=TTL_CACHE_DASHBOARD, show_spinner=False)
+def _consultar_catalogo_empresas():
+    """Cadastro de empresas (id, abreviacao, razao_social e flags)"""
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        colunas = [
+            "id", "abreviacao", "razao_social",
+            "fl_controladora", "fl_controlada", "fl_ativa"
+        ]
+
+        cursor.execute(f"""
+            SELECT {', '.join(colunas)}
+            FROM public.empresa
+            ORDER BY razao_social
+        """)
+
+        return pd.DataFrame(cursor.fetchall(), columns=colunas)
+
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def carregar_catalogo_empresas():
+    """
+    Carrega o cadastro de empresas (sem formatação para exibição)
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame com id,
+            abreviacao, razao_social e flags, ou None)
+    """
+    try:
+        return (True, "✅ Empresas carregadas", _consultar_catalogo_empresas())
+    except Exception as e:
+        print(f"❌ Erro ao carregar empresas: {e}")
+        return (False, f"❌ Erro ao carregar empresas: {str(e)}", None)
+
+
+@st.cache_data(ttl=TTL_CACHE_DASHBOARD, show_spinner=False)
+def _consultar_matriz_completude(ano):
+    """Matriz empresas ativas × meses (ver carregar_matriz_completude)"""
+    import numpy as np
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT
+                e.abreviacao,
+                e.razao_social,
+                COALESCE(bit_or(1 << (r.mes - 1)), 0) AS meses
+            FROM public.empresa e
+            LEFT JOIN public.balancete_resumo r
+                ON r.empresa_id = e.id AND r.ano = %s
+            WHERE e.fl_ativa = true
+            GROUP BY e.id, e.abreviacao, e.razao_social
+            ORDER BY e.razao_social
+        """, (ano,))
+
+        resultados = cursor.fetchall()
+
+        colunas_meses = [str(m).zfill(2) for m in range(1, 13)]
+
+        if not resultados:
+            return pd.DataFrame(columns=["Razão Social"] + colunas_meses + ["Pendentes"])
+
+        mascaras = np.array([linha[2] for linha in resultados], dtype=np.int64)
+        matriz = ((mascaras[:, None] >> np.arange(12)) & 1).astype(bool)
+
+        df = pd.DataFrame(
+            matriz,
+            columns=colunas_meses,
+            index=pd.Index([linha[0] for linha in resultados], name="Empresa")
+        )
+        df.insert(0, "Razão Social", [linha[1] for linha in resultados])
+        df["Pendentes"] = 12 - matriz.sum(axis=1)
+
+        return df
+
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def carregar_matriz_completude(ano):
+    """
+    Monta a matriz de completude empresas ativas × meses de um ano
+
+    Uma única consulta agrupada devolve, por empresa ativa, a máscara de bits
+    dos meses importados; o pivot é feito com operações de bits em NumPy.
+
+    Args:
+        ano: ano desejado (ex: 2025)
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame indexado por
+            empresa (abreviação) com colunas "01".."12" booleanas e a coluna
+            "Pendentes", ou None)
+    """
+    try:
+        return (True, "✅ Matriz de completude montada", _consultar_matriz_completude(ano))
+    except Exception as e:
+        print(f"❌ Erro ao montar matriz de completude: {e}")
+        return (False, f"❌ Erro ao montar matriz de completude: {str(e)}", None)
+
+
+@st.cache_data(ttl=TTL_CACHE_DASHBOARD, show_spinner=False)
+def _consultar_anomalias(ano, mes):
+    """Contas sinalizadas de um período (ver carregar_anomalias)"""
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT e.abreviacao, a.conta, a.descricao, a.campo,
+                   a.valor, a.mediana, a.desvio, a.z_score
+            FROM public.balancete_anomalia a
+            JOIN public.empresa e ON e.id = a.empresa_id
+            WHERE a.ano = %s AND a.mes = %s
+            ORDER BY abs(a.z_score) DESC
+        """, (ano, mes))
+
+        df = pd.DataFrame(cursor.fetchall(), columns=[
+            "Empresa", "Conta", "Descrição", "Campo",
+            "Valor", "Mediana", "Desvio", "Z-Score"
+        ])
+        df["Campo"] = df["Campo"].map(
+            {"val_debito": "Val. Débito", "val_credito": "Val. Crédito"})
+
+        return df
+
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def carregar_anomalias(ano, mes):
+    """
+    Carrega as contas sinalizadas com movimento atípico em um período
+
+    Args:
+        ano: ano do período
+        mes: mês do período
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame com Empresa,
+            Conta, Descrição, Campo, Valor, Mediana, Desvio (MAD) e Z-Score
+            (maior |z| primeiro), ou None)
+    """
+    try:
+        return (True, "✅ Anomalias carregadas", _consultar_anomalias(ano, mes))
+    except Exception as e:
+        print(f"❌ Erro ao carregar anomalias: {e}")
+        return (False, f"❌ Erro ao carregar anomalias: {str(e)}", None)
+
+
+def limpar_cache_dashboard():
+    """
+    Invalida os caches do Dashboard (chamada após importações e edições)
+    """
+    _consultar_resumos.clear()
+    _consultar_catalogo_empresas.clear()
+    _consultar_matriz_completude.clear()
+    _consultar_anomalias.clear()
+
+
+def periodo_anterior(ano, mes):
+    """
+    Retorna o período imediatamente anterior
+
+    Args:
+        ano: ano (ex: 2025)
+        mes: mês (1-12)
+
+    Returns:
+        tuple (ano, mes)
+    """
+    return (ano - 1, 12) if mes == 1 else (ano, mes - 1)
+
+
+def calcular_cobertura(df_resumos, df_empresas, ano, mes):
+    """
+    Calcula a cobertura de importação de um período
+
+    Args:
+        df_resumos: DataFrame de carregar_resumos()
+        df_empresas: DataFrame de carregar_catalogo_empresas()
+        ano: ano do período
+        mes: mês do período
+
+    Returns:
+        dict com empresas_ativas, importadas, pendentes e percentual
+    """
+    ativas = df_empresas.loc[
+        df_empresas["fl_ativa"].fillna(False).astype(bool), "id"]
+
+    importadas = df_resumos.loc[
+        (df_resumos["ano"] == ano) & (df_resumos["mes"] == mes), "empresa_id"]
+
+    qtd_ativas = int(ativas.nunique())
+    qtd_importadas = int(ativas.isin(importadas).sum())
+
+    return {
+        "empresas_ativas": qtd_ativas,
+        "importadas": qtd_importadas,
+        "pendentes": qtd_ativas - qtd_importadas,
+        "percentual": (qtd_importadas / qtd_ativas * 100) if qtd_ativas else 0.0,
+    }
+
+
+def meses_sem_agregado(df_resumos, ano):
+    """
+    Meses do ano com algum balancete sem agregado (saldos por grupo nulos)
+
+    Somar esses meses como zero mostraria totais e variações falsos, então
+    eles ficam fora dos totais por grupo.
+
+    Args:
+        df_resumos: DataFrame de carregar_resumos()
+        ano: ano desejado
+
+    Returns:
+        list de meses (1-12)
+    """
+    df_ano = df_resumos[df_resumos["ano"] == ano]
+    sem_agregado = df_ano[list(GRUPOS_DASHBOARD.keys())].isna().any(axis=1)
+
+    return sorted(df_ano.loc[sem_agregado, "mes"].unique().tolist())
+
+
+def totais_por_mes(df_resumos, ano):
+    """
+    Soma os saldos por grupo de todas as empresas, mês a mês
+
+    Meses sem balancete ou com algum balancete sem agregado ficam nulos.
+
+    Args:
+        df_resumos: DataFrame de carregar_resumos()
+        ano: ano desejado
+
+    Returns:
+        DataFrame indexado por mês (1-12) com uma coluna por grupo
+    """
+    import numpy as np
+
+    df_ano = df_resumos[df_resumos["ano"] == ano]
+
+    totais = (
+        df_ano.groupby("mes")[list(GRUPOS_DASHBOARD.keys())]
+        .sum()
+        .reindex(range(1, 13))
+    )
+    totais.loc[meses_sem_agregado(df_resumos, ano)] = np.nan
+
+    return totais.rename(columns=GRUPOS_DASHBOARD)
+
+
+def _totais_periodo(df_resumos, ano, mes):
+    """Saldos por grupo de um período (nulos sem balancete ou sem agregado)"""
+    import numpy as np
+    import pandas as pd
+
+    grupos = list(GRUPOS_DASHBOARD.keys())
+    df_periodo = df_resumos.loc[
+        (df_resumos["ano"] == ano) & (df_resumos["mes"] == mes), grupos]
+
+    if df_periodo.empty or df_periodo.isna().any(axis=None):
+        return pd.Series(np.nan, index=grupos)
+
+    return df_periodo.sum()
+
+
+def variacao_mensal(df_resumos, ano, mes):
+    """
+    Calcula os totais por grupo do período e a variação contra o mês anterior
+
+    Períodos sem balancete ou com balancete sem agregado ficam nulos (e a
+    variação também), em vez de entrar como zero.
+
+    Args:
+        df_resumos: DataFrame de carregar_resumos()
+        ano: ano do período
+        mes: mês do período
+
+    Returns:
+        DataFrame com colunas Grupo, Atual, Anterior, Variação e Variação %
+    """
+    import pandas as pd
+
+    ano_ant, mes_ant = periodo_anterior(ano, mes)
+    grupos = list(GRUPOS_DASHBOARD.keys())
+
+    atual = _totais_periodo(df_resumos, ano, mes)
+    anterior = _totais_periodo(df_resumos, ano_ant, mes_ant)
+
+    variacao = atual - anterior
+    percentual = (variacao / anterior.abs().where(anterior != 0)) * 100
+
+    return pd.DataFrame({
+        "Grupo": [GRUPOS_DASHBOARD[g] for g in grupos],
+        "Atual": atual.to_numpy(),
+        "Anterior": anterior.to_numpy(),
+        "Variação": variacao.to_numpy(),
+        "Variação %": percentual.to_numpy(),
+    })
@@ -2,8 +2,15 @@
 empresa_db.py - Funções de banco de dados para gestão de empresas
 """
 
-import pandas as pd
 from database import conectar, desconectar
+from utils.dashboard_db import limpar_cache_dashboard
+from utils.consolidacao import limpar_cache_consolidacao
+from utils.auditoria import (
+    EVENTO_ATUALIZACAO_EMPRESA,
+    EVENTO_CADASTRO_EMPRESA,
+    EVENTO_INATIVACAO_EMPRESA,
+    registrar_evento
+)
 
 
 def listar_empresas(filtro_status=None):
@@ -16,6 +23,8 @@ def listar_empresas(filtro_status=None):
     Returns:
         DataFrame com as empresas
     """
+    import pandas as pd
+
     conn = None
     try:
         conn = conectar()
@@ -24,26 +33,28 @@ def listar_empresas(filtro_status=None):
         # Query base
         query = """
             SELECT 
-                id,
-                abreviacao,
-                razao_social,
-                cnpj_form,
-                fl_controladora,
-                fl_controlada,
-                fl_operacional,
-                fl_patrimonial,
-                fl_ativa,
-                fl_inativa
-            FROM public.empresa
+                e.id,
+                e.abreviacao,
+                e.razao_social,
+                e.cnpj_form,
+                e.fl_controladora,
+                e.fl_controlada,
+                c.razao_social,
+                e.fl_operacional,
+                e.fl_patrimonial,
+                e.fl_ativa,
+                e.fl_inativa
+            FROM public.empresa e
+            LEFT JOIN public.empresa c ON c.id = e.controladora_id
         """
 
         # Aplicar filtro de status
         if filtro_status == "ativa":
-            query += " WHERE fl_ativa = true"
+            query += " WHERE e.fl_ativa = true"
         elif filtro_status == "inativa":
-            query += " WHERE fl_inativa = true"
+            query += " WHERE e.fl_inativa = true"
 
-        query += " ORDER BY razao_social"
+        query += " ORDER BY e.razao_social"
 
         cursor.execute(query)
         resultados = cursor.fetchall()
@@ -51,8 +62,8 @@ def listar_empresas(filtro_status=None):
         # Criar DataFrame
         colunas = [
             "ID", "Abreviação", "Razão Social", "CNPJ",
-            "Controladora", "Controlada", "Operacional", "Patrimonial",
-            "Ativa", "Inativa"
+            "Controladora", "Controlada", "Controladora do Grupo",
+            "Operacional", "Patrimonial", "Ativa", "Inativa"
         ]
 
         df = pd.DataFrame(resultados, columns=colunas)
@@ -140,6 +151,8 @@ def buscar_empresas(termo, tipo_busca="razao_social"):
     Returns:
         DataFrame com resultados
     """
+    import pandas as pd
+
     conn = None
     try:
         conn = conectar()
@@ -194,12 +207,13 @@ def buscar_empresas(termo, tipo_busca="razao_social"):
             desconectar(conn)
 
 
-def cadastrar_empresa(dados):
+def cadastrar_empresa(dados, usuario=None):
     """
     Cadastra nova empresa
 
     Args:
         dados: dict com dados da empresa
+        usuario: email do usuário (registrado no evento de auditoria)
 
     Returns:
         tuple (sucesso: bool, mensagem: str, id_empresa: int ou None)
@@ -221,9 +235,9 @@ def cadastrar_empresa(dados):
             INSERT INTO public.empresa (
                 plano_contas_id, abreviacao, razao_social, cnpj, cnpj_form,
                 fl_controladora, fl_controlada, fl_operacional, fl_patrimonial,
-                fl_ativa, fl_inativa
+                fl_ativa, fl_inativa, controladora_id
             ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
             ) RETURNING id
         """
 
@@ -241,13 +255,21 @@ def cadastrar_empresa(dados):
             dados.get('fl_operacional', False),
             dados.get('fl_patrimonial', False),
             dados.get('fl_ativa', True),
-            dados.get('fl_inativa', False)
+            dados.get('fl_inativa', False),
+            dados.get('controladora_id')
         )
 
         cursor.execute(query, valores)
         id_empresa = cursor.fetchone()[0]
 
+        registrar_evento(
+            cursor, EVENTO_CADASTRO_EMPRESA,
+            f"Empresa {dados['razao_social']} cadastrada",
+            usuario=usuario, empresa_id=id_empresa,
+            detalhes={"cnpj": cnpj_formatado, "abreviacao": dados['abreviacao']})
+
         conn.commit()
+        limpar_cache_dashboard()
 
         return (True, "✅ Empresa cadastrada com sucesso!", id_empresa)
 
@@ -261,13 +283,14 @@ def cadastrar_empresa(dados):
             desconectar(conn)
 
 
-def atualizar_empresa(id_empresa, dados):
+def atualizar_empresa(id_empresa, dados, usuario=None):
     """
     Atualiza dados da empresa
 
     Args:
         id_empresa: ID da empresa
         dados: dict com dados a atualizar
+        usuario: email do usuário (registrado no evento de auditoria)
 
     Returns:
         tuple (sucesso: bool, mensagem: str)
@@ -284,7 +307,7 @@ def atualizar_empresa(id_empresa, dados):
         campos_permitidos = [
             'plano_contas_id', 'abreviacao', 'razao_social',
             'fl_controladora', 'fl_controlada', 'fl_operacional',
-            'fl_patrimonial', 'fl_ativa', 'fl_inativa'
+            'fl_patrimonial', 'fl_ativa', 'fl_inativa', 'controladora_id'
         ]
 
         for campo in campos_permitidos:
@@ -304,9 +327,25 @@ def atualizar_empresa(id_empresa, dados):
         """
 
         cursor.execute(query, valores)
+        linhas_atualizadas = cursor.rowcount
+
+        # Propagar dados cadastrais para o resumo de balancetes
+        cursor.execute(
+            "SELECT public.atualizar_resumo_empresa(%s)", (id_empresa,))
+
+        if linhas_atualizadas > 0:
+            registrar_evento(
+                cursor, EVENTO_ATUALIZACAO_EMPRESA,
+                f"Campos atualizados: {', '.join(campo for campo in campos_permitidos if campo in dados)}",
+                usuario=usuario, empresa_id=id_empresa,
+                detalhes={campo: dados[campo] for campo in campos_permitidos if campo in dados})
+
         conn.commit()
+        limpar_cache_dashboard()
+        if 'controladora_id' in dados or 'fl_controlada' in dados:
+            limpar_cache_consolidacao()
 
-        if cursor.rowcount > 0:
+        if linhas_atualizadas > 0:
             return (True, "✅ Empresa atualizada com sucesso!")
         else:
             return (False, "❌ Empresa não encontrada!")
@@ -321,12 +360,13 @@ def atualizar_empresa(id_empresa, dados):
             desconectar(conn)
 
 
-def deletar_empresa(id_empresa):
+def deletar_empresa(id_empresa, usuario=None):
     """
     Deleta empresa (soft delete - marca como inativa)
 
     Args:
         id_empresa: ID da empresa
+        usuario: email do usuário (registrado no evento de auditoria)
 
     Returns:
         tuple (sucesso: bool, mensagem: str)
@@ -343,9 +383,21 @@ def deletar_empresa(id_empresa):
         """
 
         cursor.execute(query, (id_empresa,))
+        linhas_atualizadas = cursor.rowcount
+
+        # Propagar status (fl_ativa) para o resumo de balancetes
+        cursor.execute(
+            "SELECT public.atualizar_resumo_empresa(%s)", (id_empresa,))
+
+        if linhas_atualizadas > 0:
+            registrar_evento(
+                cursor, EVENTO_INATIVACAO_EMPRESA, "Empresa inativada",
+                usuario=usuario, empresa_id=id_empresa)
+
         conn.commit()
+        limpar_cache_dashboard()
 
-        if cursor.rowcount > 0:
+        if linhas_atualizadas > 0:
             return (True, "✅ Empresa inativada com sucesso!")
         else:
             return (False, "❌ Empresa não encontrada!")
@@ -0,0 +1,382 @@
+"""
+exportacao.py - Exportação de consultas em CSV, Excel (.xlsx) ou Parquet
+
+O resultado é lido do banco por um cursor nomeado (server-side), em blocos
+de LINHAS_POR_BLOCO, e cada bloco é escrito no arquivo antes do próximo ser
+buscado: nem o resultado nem o arquivo ficam inteiros em memória. O Excel
+usa o modo write_only do openpyxl (linhas gravadas em sequência, sem montar
+a planilha em memória) e o Parquet grava um row group por bloco.
+
+Os arquivos ficam na pasta de utils/armazenamento_temporario.py e expiram
+junto com os demais arquivos temporários.
+"""
+
+import csv
+import os
+import uuid
+from datetime import datetime
+
+from database import conectar, desconectar
+from utils.armazenamento_temporario import reservar_arquivo
+
+
+# Formato -> (extensão, MIME)
+FORMATOS_EXPORTACAO = {
+    "Excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+# Conteúdos exportáveis -> rótulo exibido
+CONTEUDOS_EXPORTACAO = {
+    "balancetes": "Lista de balancetes",
+    "itens": "Itens dos balancetes",
+    "empresas": "Empresas",
+}
+
+# Linhas buscadas do servidor (e gravadas no arquivo) por vez
+LINHAS_POR_BLOCO = 20000
+
+# Acima disso a exportação roda em segundo plano (utils/jobs.py)
+LIMITE_EXPORTACAO_IMEDIATA = 50000
+
+# Linhas de dados por aba do Excel (limite de 1.048.576 linhas com o cabeçalho)
+LIMITE_LINHAS_PLANILHA = 1048575
+
+
+def _filtros_balancete(filtros, prefixo, params, tabela_itens=None):
+    """Condições de empresa/ano/mês no formato de listar_balancetes"""
+    condicoes = []
+
+    if filtros.get("empresa", "Todas") != "Todas":
+        condicoes.append(f"{prefixo}.razao_social = %s")
+        params.append(filtros["empresa"])
+
+    if filtros.get("ano", "Todos") != "Todos":
+        condicoes.append(f"{prefixo}.ano = %s")
+        params.append(int(filtros["ano"]))
+        # Poda de partições de balancete_itens (particionada por ano)
+        if tabela_itens:
+            condicoes.append(f"{tabela_itens}.ano = %s")
+            params.append(int(filtros["ano"]))
+
+    if filtros.get("mes", "Todos") != "Todos":
+        condicoes.append(f"{prefixo}.mes = %s")
+        params.append(int(filtros["mes"]))
+
+    return condicoes
+
+
+def montar_consulta(conteudo, filtros, ordenar=True):
+    """
+    Monta a consulta de um conteúdo exportável
+
+    Args:
+        conteudo: chave de CONTEUDOS_EXPORTACAO
+        filtros: dict com empresa/ano/mes ("Todas"/"Todos" = sem filtro) ou
+            status ('ativa', 'inativa' ou None) para empresas
+        ordenar: False omite o ORDER BY (contagem)
+
+    Returns:
+        tuple (query: str, params: list, colunas: list de (nome, tipo))
+    """
+    params = []
+
+    if conteudo == "balancetes":
+        colunas = [
+            ("Razão Social", "texto"), ("CNPJ", "texto"), ("Abreviação", "texto"),
+            ("Ano", "inteiro"), ("Mês", "inteiro"), ("Data Importação", "data_hora"),
+            ("Usuário", "texto"), ("Qtd. Itens", "inteiro"),
+            ("Saldo Anterior", "decimal"), ("Débito", "decimal"),
+            ("Crédito", "decimal"), ("Saldo Atual", "decimal"),
+        ]
+        condicoes = _filtros_balancete(filtros, "r", params)
+        query = """
+            SELECT r.razao_social, r.cnpj_form, r.abreviacao, r.ano, r.mes,
+                   r.dt_importacao::timestamp, r.user_importacao, r.qtd_itens,
+                   r.total_saldo_anterior::float8, r.total_debito::float8,
+                   r.total_credito::float8, r.total_saldo_atual::float8
+            FROM public.balancete_resumo r
+        """
+        ordem = " ORDER BY r.razao_social, r.ano, r.mes"
+
+    elif conteudo == "itens":
+        colunas = [
+            ("Razão Social", "texto"), ("CNPJ", "texto"),
+            ("Ano", "inteiro"), ("Mês", "inteiro"),
+            ("Nível", "texto"), ("Conta", "texto"), ("Desc. Conta", "texto"),
+            ("Conta Padrão", "texto"),
+            ("Saldo Anterior", "decimal"), ("Val. Débito", "decimal"),
+            ("Val. Crédito", "decimal"), ("Saldo Atual", "decimal"),
+        ]
+        condicoes = _filtros_balancete(filtros, "r", params, tabela_itens="i")
+        query = """
+            SELECT r.razao_social, r.cnpj_form, r.ano, r.mes,
+                   i.nivel, i.conta, i.descricao, i.conta_padrao,
+                   i.saldo_anterior::float8, i.val_debito::float8,
+                   i.val_credito::float8, i.saldo_atual::float8
+            FROM public.balancete_resumo r
+            JOIN public.balancete_itens i
+              ON i.balancete_id = r.balancete_id AND i.ano = r.ano
+        """
+        ordem = " ORDER BY r.razao_social, r.ano, r.mes, i.conta"
+
+    elif conteudo == "empresas":
+        colunas = [
+            ("ID", "inteiro"), ("Abreviação", "texto"), ("Razão Social", "texto"),
+            ("CNPJ", "texto"), ("Controladora", "booleano"), ("Controlada", "booleano"),
+            ("Operacional", "booleano"), ("Patrimonial", "booleano"),
+            ("Ativa", "booleano"), ("Inativa", "booleano"),
+        ]
+        condicoes = []
+        if filtros.get("status") == "ativa":
+            condicoes.append("fl_ativa = true")
+        elif filtros.get("status") == "inativa":
+            condicoes.append("fl_inativa = true")
+        query = """
+            SELECT id, abreviacao, razao_social, cnpj_form,
+                   fl_controladora, fl_controlada, fl_operacional, fl_patrimonial,
+                   fl_ativa, fl_inativa
+            FROM public.empresa
+        """
+        ordem = " ORDER BY razao_social"
+
+    else:
+        raise ValueError(f"Conteúdo de exportação inválido: {conteudo!r}")
+
+    if condicoes:
+        query += " WHERE " + " AND ".join(condicoes)
+    if ordenar:
+        query += ordem
+
+    return (query, params, colunas)
+
+
+def contar_linhas(conteudo, filtros, limite=LIMITE_EXPORTACAO_IMEDIATA):
+    """
+    Conta as linhas da exportação até limite + 1 (não percorre tudo)
+
+    Args:
+        conteudo: chave de CONTEUDOS_EXPORTACAO
+        filtros: filtros de montar_consulta
+        limite: contagem máxima relevante
+
+    Returns:
+        int (limite + 1 indica "mais que o limite"; -1 em caso de erro)
+    """
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        query, params, _ = montar_consulta(conteudo, filtros, ordenar=False)
+        cursor.execute(
+            f"SELECT count(*) FROM ({query} LIMIT %s) t", params + [limite + 1])
+        return cursor.fetchone()[0]
+
+    except Exception as e:
+        print(f"❌ Erro ao contar linhas da exportação: {e}")
+        return -1
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def iterar_blocos(query, params, tamanho_bloco=LINHAS_POR_BLOCO):
+    """
+    Percorre o resultado com cursor nomeado (server-side), bloco a bloco
+
+    Args:
+        query: SQL da consulta
+        params: parâmetros da consulta
+        tamanho_bloco: linhas por bloco
+
+    Yields:
+        list de tuplas (até tamanho_bloco linhas)
+    """
+    conn = None
+    try:
+        conn = conectar()
+        # Cursor nomeado: o resultado fica no servidor e vem em FETCHs de um bloco
+        cursor = conn.cursor(name=f"exportacao_{uuid.uuid4().hex}")
+        cursor.execute(query, params)
+
+        while True:
+            linhas = cursor.fetchmany(tamanho_bloco)
+            if not linhas:
+                break
+            yield linhas
+
+        cursor.close()
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def _gravar_csv(caminho, colunas, blocos):
+    """CSV separado por ';' (utf-8 com BOM, abre direto no Excel)"""
+    total = 0
+    with open(caminho, "w", newline="", encoding="utf-8-sig") as arquivo:
+        escritor = csv.writer(arquivo, delimiter=";")
+        escritor.writerow([nome for nome, _ in colunas])
+        for linhas in blocos:
+            escritor.writerows(linhas)
+            total += len(linhas)
+    return total
+
+
+def _gravar_xlsx(caminho, colunas, blocos):
+    """Excel em modo write_only (nova aba a cada LIMITE_LINHAS_PLANILHA)"""
+    from openpyxl import Workbook
+
+    cabecalho = [nome for nome, _ in colunas]
+    livro = Workbook(write_only=True)
+    aba = livro.create_sheet("Dados")
+    aba.append(cabecalho)
+    linhas_aba = 0
+    total = 0
+
+    for linhas in blocos:
+        for linha in linhas:
+            if linhas_aba == LIMITE_LINHAS_PLANILHA:
+                aba = livro.create_sheet(f"Dados {len(livro.worksheets) + 1}")
+                aba.append(cabecalho)
+                linhas_aba = 0
+            aba.append(linha)
+            linhas_aba += 1
+        total += len(linhas)
+
+    livro.save(caminho)
+    return total
+
+
+def _gravar_parquet(caminho, colunas, blocos):
+    """Parquet com um row group por bloco e schema fixo pelas colunas"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Tipo lógico da coluna -> tipo Arrow
+    tipos_arrow = {
+        "texto": pa.string(),
+        "inteiro": pa.int64(),
+        "decimal": pa.float64(),
+        "data_hora": pa.timestamp("us"),
+        "booleano": pa.bool_(),
+    }
+    schema = pa.schema([(nome, tipos_arrow[tipo]) for nome, tipo in colunas])
+    total = 0
+
+    with pq.ParquetWriter(caminho, schema) as escritor:
+        for linhas in blocos:
+            valores_colunas = list(zip(*linhas))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type)
+                 for valores, campo in zip(valores_colunas, schema)],
+                schema=schema))
+            total += len(linhas)
+
+    return total
+
+
+GRAVADORES = {
+    "CSV": _gravar_csv,
+    "Excel": _gravar_xlsx,
+    "Parquet": _gravar_parquet,
+}
+
+
+def nome_arquivo_exportacao(conteudo, formato):
+    """
+    Nome sugerido para o download (ex: itens_20250122_1430.xlsx)
+
+    Args:
+        conteudo: chave de CONTEUDOS_EXPORTACAO
+        formato: chave de FORMATOS_EXPORTACAO
+
+    Returns:
+        str
+    """
+    return f"{conteudo}_{datetime.now():%Y%m%d_%H%M}{FORMATOS_EXPORTACAO[formato][0]}"
+
+
+def exportar(conteudo, filtros, formato, progresso=None):
+    """
+    Grava a exportação num arquivo temporário, em blocos
+
+    Args:
+        conteudo: chave de CONTEUDOS_EXPORTACAO
+        filtros: filtros de montar_consulta
+        formato: chave de FORMATOS_EXPORTACAO
+        progresso: callback opcional progresso(etapa: str, fracao: float ou None)
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, caminho: str ou None)
+    """
+    caminho = None
+    try:
+        query, params, colunas = montar_consulta(conteudo, filtros)
+        caminho = reservar_arquivo(FORMATOS_EXPORTACAO[formato][0])
+
+        def blocos_com_progresso():
+            linhas_lidas = 0
+            for linhas in iterar_blocos(query, params):
+                yield linhas
+                linhas_lidas += len(linhas)
+                if progresso:
+                    progresso(f"Exportando ({linhas_lidas:,} linhas)".replace(",", "."), None)
+
+        # Grava com outro nome e renomeia: o download nunca vê o arquivo pela metade
+        caminho_parcial = caminho + ".parcial"
+        total = GRAVADORES[formato](caminho_parcial, colunas, blocos_com_progresso())
+        os.replace(caminho_parcial, caminho)
+
+        return (True, f"✅ {total} linha(s) exportada(s)", caminho)
+
+    except Exception as e:
+        print(f"❌ Erro ao exportar {conteudo} ({formato}): {e}")
+        if caminho:
+            try:
+                os.remove(caminho + ".parcial")
+            except OSError:
+                pass
+        return (False, f"❌ Erro ao exportar: {str(e)}", None)
+
+
+def ler_arquivo_exportado(caminho):
+    """
+    Lê o arquivo exportado para o st.download_button
+
+    Args:
+        caminho: retornado por exportar
+
+    Returns:
+        bytes (vazio se o arquivo expirou)
+    """
+    try:
+        with open(caminho, "rb") as arquivo:
+            return arquivo.read()
+    except FileNotFoundError:
+        return b""
+
+
+def gerar_exportacao(conteudo, filtros, formato):
+    """
+    Exporta e retorna o conteúdo do arquivo (exportações pequenas, no clique
+    do st.download_button)
+
+    Args:
+        conteudo: chave de CONTEUDOS_EXPORTACAO
+        filtros: filtros de montar_consulta
+        formato: chave de FORMATOS_EXPORTACAO
+
+    Returns:
+        bytes do arquivo
+    """
+    sucesso, mensagem, caminho = exportar(conteudo, filtros, formato)
+    if not sucesso:
+        raise RuntimeError(mensagem)
+
+    try:
+        return ler_arquivo_exportado(caminho)
+    finally:
+        os.remove(caminho)
@@ -0,0 +1,421 @@
+"""
+ingestao.py - Regras comuns da importação de balancetes fora da interface
+
+Convenção de nome de arquivo, leitura de manifesto, resolução de empresas e
+o processamento de um arquivo em disco (executado em processos separados
+pela importação em lote).
+
+Convenção de nome: <EMPRESA>_<AAAA>-<MM>.csv (ou .txt, .xlsx, .xls, .pdf), onde <EMPRESA> é a
+abreviação, o CNPJ (somente dígitos) ou a razão social da empresa.
+Exemplos: MCX_2025-03.csv, 12345678000190_2025-03.txt
+
+Um arquivo lateral <arquivo>.json ({"empresa": ..., "mes": ..., "ano": ...})
+tem prioridade sobre o nome do arquivo.
+"""
+
+import io
+import json
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from database import conectar, desconectar
+from utils.balancete_db import importar_balancete_completo
+from utils.armazenamento_temporario import remover_dataframe, salvar_dataframe
+from utils.balancete_processor import processar_balancete
+from utils.plano_contas import aplicar_mapeamento
+
+
+EXTENSOES_BALANCETE = (".csv", ".txt", ".xlsx", ".xls", ".pdf")
+
+PADRAO_NOME_ARQUIVO = re.compile(
+    r"^(?P<empresa>.+)_(?P<ano>\d{4})-(?P<mes>\d{2})$")
+
+COLUNAS_MANIFESTO = ["arquivo", "empresa", "mes", "ano"]
+
+EXTENSAO_ARQUIVO_LATERAL = ".json"
+
+PASTA_DADOS_PADRAO = "dados"
+
+# Processamentos simultâneos no upload de vários arquivos pela interface
+# (PDFs grandes dividem o mesmo pool de processos de leitor_pdf.py)
+WORKERS_UPLOAD = 4
+
+
+def obter_pasta_dados():
+    """
+    Retorna a pasta monitorada para importação (PASTA_DADOS no secrets.toml)
+
+    Returns:
+        str com o caminho da pasta
+    """
+    try:
+        return st.secrets.get("PASTA_DADOS", PASTA_DADOS_PADRAO)
+    except Exception:
+        return PASTA_DADOS_PADRAO
+
+
+def interpretar_nome_arquivo(caminho):
+    """
+    Extrai empresa, mês e ano do nome do arquivo
+
+    Args:
+        caminho: caminho ou nome do arquivo
+
+    Returns:
+        tuple (empresa: str, mes: int, ano: int) ou None se fora da convenção
+    """
+    nome, extensao = os.path.splitext(os.path.basename(caminho))
+    if extensao.lower() not in EXTENSOES_BALANCETE:
+        return None
+
+    match = PADRAO_NOME_ARQUIVO.match(nome)
+    if not match:
+        return None
+
+    mes = int(match.group("mes"))
+    if not 1 <= mes <= 12:
+        return None
+
+    return (match.group("empresa").strip(), mes, int(match.group("ano")))
+
+
+def identificar_arquivo(caminho):
+    """
+    Identifica empresa, mês e ano de um arquivo (arquivo lateral .json ou
+    convenção de nome)
+
+    Args:
+        caminho: caminho do arquivo de balancete
+
+    Returns:
+        tuple (empresa: str, mes: int, ano: int) ou None se não identificado
+    """
+    caminho_lateral = caminho + EXTENSAO_ARQUIVO_LATERAL
+
+    if os.path.isfile(caminho_lateral):
+        try:
+            with open(caminho_lateral, encoding="utf-8") as arquivo:
+                dados = json.load(arquivo)
+
+            mes = int(dados["mes"])
+            if not 1 <= mes <= 12:
+                return None
+
+            return (str(dados["empresa"]).strip(), mes, int(dados["ano"]))
+
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"❌ Arquivo lateral inválido ({caminho_lateral}): {e}")
+            return None
+
+    return interpretar_nome_arquivo(caminho)
+
+
+def listar_tarefas_diretorio(pasta):
+    """
+    Monta as tarefas de importação a partir dos arquivos de uma pasta
+
+    Args:
+        pasta: diretório com os arquivos de balancete
+
+    Returns:
+        tuple (tarefas: DataFrame com COLUNAS_MANIFESTO, ignorados: list)
+    """
+    import pandas as pd
+
+    tarefas = []
+    ignorados = []
+
+    for nome in sorted(os.listdir(pasta)):
+        caminho = os.path.join(pasta, nome)
+        if not os.path.isfile(caminho):
+            continue
+
+        if nome.endswith(EXTENSAO_ARQUIVO_LATERAL):
+            continue
+
+        identificacao = identificar_arquivo(caminho)
+        if identificacao is None:
+            ignorados.append(nome)
+            continue
+
+        empresa, mes, ano = identificacao
+        tarefas.append((caminho, empresa, mes, ano))
+
+    return (pd.DataFrame(tarefas, columns=COLUNAS_MANIFESTO), ignorados)
+
+
+def carregar_manifesto(caminho_manifesto):
+    """
+    Lê o manifesto de importação (CSV separado por ';')
+
+    Colunas: arquivo;empresa;mes;ano. Caminhos relativos são resolvidos a
+    partir da pasta do manifesto.
+
+    Args:
+        caminho_manifesto: caminho do arquivo de manifesto
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, tarefas: DataFrame ou None)
+    """
+    import pandas as pd
+
+    try:
+        df = pd.read_csv(caminho_manifesto, sep=";", dtype=str,
+                         encoding="utf-8-sig")
+    except Exception as e:
+        return (False, f"❌ Erro ao ler manifesto: {str(e)}", None)
+
+    df.columns = [c.strip().lower() for c in df.columns]
+    colunas_faltando = [c for c in COLUNAS_MANIFESTO if c not in df.columns]
+    if colunas_faltando:
+        return (False, f"❌ Colunas faltando no manifesto: {', '.join(colunas_faltando)}", None)
+
+    df = df[COLUNAS_MANIFESTO].dropna(subset=["arquivo", "empresa"])
+    df["empresa"] = df["empresa"].str.strip()
+
+    mes = pd.to_numeric(df["mes"], errors="coerce")
+    ano = pd.to_numeric(df["ano"], errors="coerce")
+    invalidas = mes.isna() | ano.isna() | ~mes.between(1, 12)
+    if invalidas.any():
+        linhas = ", ".join(str(i + 2) for i in df.index[invalidas])
+        return (False, f"❌ Mês/ano inválido no manifesto (linhas {linhas})", None)
+
+    df["mes"] = mes.astype(int)
+    df["ano"] = ano.astype(int)
+
+    pasta = os.path.dirname(os.path.abspath(caminho_manifesto))
+    df["arquivo"] = [
+        a if os.path.isabs(a) else os.path.join(pasta, a)
+        for a in df["arquivo"].str.strip()
+    ]
+
+    return (True, f"✅ Manifesto com {len(df)} arquivo(s)", df.reset_index(drop=True))
+
+
+def resolver_empresas(identificadores):
+    """
+    Resolve identificadores de empresa (abreviação, CNPJ ou razão social)
+
+    Args:
+        identificadores: lista de identificadores
+
+    Returns:
+        dict identificador -> (razao_social, plano_contas_id); identificadores
+        não encontrados ou ambíguos ficam de fora
+    """
+    identificadores = sorted(set(identificadores))
+    if not identificadores:
+        return {}
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT t.identificador, e.razao_social, e.plano_contas_id
+            FROM unnest(%s::text[]) AS t(identificador)
+            JOIN public.empresa e
+                ON upper(e.abreviacao) = upper(t.identificador)
+                OR e.cnpj = regexp_replace(t.identificador, '\\D', '', 'g')
+                OR upper(e.razao_social) = upper(t.identificador)
+        """, (identificadores,))
+
+        encontrados = {}
+        ambiguos = set()
+        for identificador, razao_social, plano_contas_id in cursor.fetchall():
+            anterior = encontrados.get(identificador)
+            if anterior and anterior[0] != razao_social:
+                ambiguos.add(identificador)
+            encontrados[identificador] = (razao_social, plano_contas_id)
+
+        for identificador in ambiguos:
+            print(f"⚠️ Identificador de empresa ambíguo: {identificador}")
+            del encontrados[identificador]
+
+        return encontrados
+
+    except Exception as e:
+        print(f"❌ Erro ao resolver empresas: {e}")
+        return {}
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def processar_arquivo(caminho):
+    """
+    Lê e processa um arquivo de balancete em disco
+
+    Executado nos processos da importação em lote: não acessa o banco (o
+    mapeamento do plano de contas é aplicado por quem grava).
+
+    Args:
+        caminho: caminho do arquivo
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame ou None)
+    """
+    try:
+        with open(caminho, "rb") as arquivo:
+            conteudo = io.BytesIO(arquivo.read())
+    except OSError as e:
+        return (False, f"❌ Erro ao abrir arquivo: {str(e)}", None)
+
+    return processar_balancete(conteudo, nome=caminho)
+
+
+def gravar_balancete(empresa, mes, ano, df, usuario, progresso=None):
+    """
+    Aplica o mapeamento do plano de contas e grava o balancete processado
+
+    Args:
+        empresa: tuple (razao_social, plano_contas_id) de resolver_empresas
+        mes: mês (1-12)
+        ano: ano (ex: 2025)
+        df: DataFrame retornado por processar_arquivo
+        usuario: identificação gravada em user_importacao
+        progresso: callback opcional repassado a importar_balancete_completo
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str)
+    """
+    razao_social, plano_contas_id = empresa
+
+    if plano_contas_id:
+        sucesso, mensagem, df, _ = aplicar_mapeamento(df, plano_contas_id)
+        if not sucesso:
+            return (False, mensagem)
+
+    return importar_balancete_completo(
+        razao_social, int(mes), int(ano), df, usuario, progresso=progresso)
+
+
+def extrair_arquivos_upload(arquivos, ignorados):
+    """
+    Percorre os arquivos enviados, abrindo os ZIPs em memória
+
+    Os membros do ZIP são lidos um de cada vez, direto do arquivo enviado
+    e sem extração para o disco, à medida que o gerador é consumido.
+
+    Args:
+        arquivos: lista de UploadedFile do Streamlit (.csv, .txt, .xlsx, .xls, .pdf ou .zip)
+        ignorados: list que recebe os nomes ignorados durante a leitura
+
+    Returns:
+        gerador de (nome, bytes)
+    """
+    for arquivo in arquivos:
+        if not arquivo.name.lower().endswith(".zip"):
+            yield (arquivo.name, arquivo.getvalue())
+            continue
+
+        try:
+            with zipfile.ZipFile(arquivo) as pacote:
+                for membro in pacote.infolist():
+                    nome = os.path.basename(membro.filename)
+                    if membro.is_dir() or not nome or membro.filename.startswith("__MACOSX"):
+                        continue
+                    if not nome.lower().endswith(EXTENSOES_BALANCETE):
+                        ignorados.append(f"{arquivo.name}/{membro.filename}")
+                        continue
+                    with pacote.open(membro) as conteudo:
+                        dados = conteudo.read()
+                    yield (nome, dados)
+        except zipfile.BadZipFile:
+            ignorados.append(arquivo.name)
+
+
+def processar_conteudo(nome, conteudo):
+    """
+    Identifica (pelo nome) e processa o conteúdo de um arquivo de balancete
+
+    O DataFrame processado vai para um arquivo temporário
+    (utils/armazenamento_temporario.py); o resultado guarda só o ID.
+
+    Args:
+        nome: nome do arquivo
+        conteudo: bytes do arquivo
+
+    Returns:
+        dict com arquivo, empresa, mes, ano, sucesso, mensagem, registros e
+        processado_id
+    """
+    resultado = {"arquivo": nome, "empresa": None, "mes": None, "ano": None,
+                 "sucesso": False, "mensagem": "", "registros": 0,
+                 "processado_id": None}
+
+    identificacao = interpretar_nome_arquivo(nome)
+    if identificacao is None:
+        resultado["mensagem"] = "❌ Nome fora da convenção <EMPRESA>_<AAAA>-<MM>"
+        return resultado
+
+    resultado["empresa"], resultado["mes"], resultado["ano"] = identificacao
+
+    try:
+        sucesso, mensagem, df = processar_balancete(io.BytesIO(conteudo), nome=nome)
+    except Exception as e:
+        sucesso, mensagem, df = False, f"❌ Erro no processamento: {str(e)}", None
+
+    resultado.update(sucesso=sucesso, mensagem=mensagem)
+    if df is not None:
+        resultado.update(registros=len(df), processado_id=salvar_dataframe(df))
+
+    return resultado
+
+
+def processar_conteudos(conteudos, max_workers=WORKERS_UPLOAD):
+    """
+    Processa vários arquivos em paralelo e resolve as empresas
+
+    Os conteúdos são lidos sob demanda: no máximo max_workers arquivos
+    ficam em memória aguardando processamento.
+
+    Args:
+        conteudos: iterável de (nome, bytes), ex: extrair_arquivos_upload
+        max_workers: processamentos simultâneos
+
+    Returns:
+        list de dict (ver processar_conteudo) na ordem dos arquivos, com
+        'empresa_resolvida' = (razao_social, plano_contas_id) ou None
+    """
+    resultados = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pendentes = deque()
+        for nome, conteudo in conteudos:
+            if len(pendentes) >= max_workers:
+                resultados.append(pendentes.popleft().result())
+            pendentes.append(pool.submit(processar_conteudo, nome, conteudo))
+        resultados.extend(futuro.result() for futuro in pendentes)
+
+    empresas = resolver_empresas(
+        [r["empresa"] for r in resultados if r["empresa"]])
+
+    for resultado in resultados:
+        resultado["empresa_resolvida"] = empresas.get(resultado["empresa"])
+        if resultado["sucesso"] and resultado["empresa_resolvida"] is None:
+            resultado["sucesso"] = False
+            resultado["mensagem"] = f"❌ Empresa '{resultado['empresa']}' não encontrada"
+
+    # Mesmo período mais de uma vez no lote: vale o último arquivo
+    vistos = set()
+    for resultado in reversed(resultados):
+        if not resultado["sucesso"]:
+            continue
+        chave = (resultado["empresa_resolvida"][0], resultado["mes"], resultado["ano"])
+        if chave in vistos:
+            resultado["sucesso"] = False
+            resultado["mensagem"] = "⚠️ Período repetido no lote (vale o último arquivo)"
+        vistos.add(chave)
+
+    # Somente os válidos mantêm o arquivo temporário
+    for resultado in resultados:
+        if not resultado["sucesso"] and resultado["processado_id"]:
+            remover_dataframe(resultado["processado_id"])
+            resultado["processado_id"] = None
+
+    return resultados
@@ -0,0 +1,252 @@
+"""
+jobs.py - Fila de importações e exportações em segundo plano
+
+As importações rodam num pool de threads compartilhado pelo processo do
+Streamlit (st.cache_resource), fora da execução do script: um rerun, a troca
+de página ou outra sessão importando ao mesmo tempo não interrompem a
+gravação. A sessão guarda apenas os IDs dos jobs e a página consulta o
+estado (etapa, progresso, mensagem) periodicamente. Jobs na fila não ocupam
+memória com o balancete: o DataFrame só é lido do arquivo temporário
+(utils/armazenamento_temporario.py) quando a gravação começa. Exportações
+grandes (utils/exportacao.py) usam a mesma fila e o job guarda o caminho do
+arquivo gerado para o download.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import streamlit as st
+from utils.armazenamento_temporario import carregar_dataframe, remover_dataframe
+from utils.exportacao import (
+    CONTEUDOS_EXPORTACAO,
+    FORMATOS_EXPORTACAO,
+    exportar,
+    nome_arquivo_exportacao
+)
+from utils.ingestao import gravar_balancete
+
+
+# Jobs simultâneos no processo (cada um usa uma conexão por etapa)
+MAX_JOBS_SIMULTANEOS = 3
+
+# Segundos que um job finalizado permanece consultável
+TTL_JOB_FINALIZADO = 3600
+
+STATUS_FILA = "fila"
+STATUS_EXECUTANDO = "executando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+STATUS_FINAIS = (STATUS_CONCLUIDO, STATUS_ERRO)
+
+
+@st.cache_resource
+def obter_fila_jobs():
+    """
+    Retorna o executor e o registro de jobs do processo (um por servidor)
+
+    Returns:
+        dict com executor, jobs (id -> dict) e lock
+    """
+    return {
+        "executor": ThreadPoolExecutor(
+            max_workers=MAX_JOBS_SIMULTANEOS, thread_name_prefix="importacao"),
+        "jobs": {},
+        "lock": threading.Lock(),
+    }
+
+
+def _atualizar_job(fila, job_id, **campos):
+    """Atualiza os campos de um job sob o lock do registro"""
+    with fila["lock"]:
+        job = fila["jobs"].get(job_id)
+        if job is not None:
+            job.update(campos)
+
+
+def _limpar_jobs_antigos(fila):
+    """Remove jobs finalizados há mais de TTL_JOB_FINALIZADO (chamar sob lock)"""
+    limite = time.time() - TTL_JOB_FINALIZADO
+    expirados = [
+        job_id for job_id, job in fila["jobs"].items()
+        if job["status"] in STATUS_FINAIS and job["fim"] < limite
+    ]
+    for job_id in expirados:
+        del fila["jobs"][job_id]
+
+
+def _executar_importacao(fila, job_id, empresa, mes, ano, processado_id, user_email):
+    """Corpo do job: grava o balancete informando o progresso"""
+    _atualizar_job(fila, job_id, status=STATUS_EXECUTANDO, etapa="Iniciando",
+                   inicio_execucao=time.time())
+
+    def progresso(etapa, fracao):
+        _atualizar_job(fila, job_id, etapa=etapa, progresso=fracao)
+
+    sucesso, mensagem = False, "❌ Importação interrompida"
+    df_itens = None
+    try:
+        df_itens = carregar_dataframe(processado_id)
+        if df_itens is None:
+            sucesso, mensagem = False, "❌ Dados processados expiraram. Processe o arquivo novamente."
+        else:
+            sucesso, mensagem = gravar_balancete(
+                empresa, mes, ano, df_itens, user_email, progresso=progresso)
+    except Exception as e:
+        print(f"❌ Erro no job de importação {job_id}: {e}")
+        sucesso, mensagem = False, f"❌ Erro: {str(e)}"
+    finally:
+        # Solta o DataFrame (buffers do memory map) antes de apagar o
+        # arquivo; o status final é gravado mesmo se a remoção falhar
+        df_itens = None
+        try:
+            remover_dataframe(processado_id)
+        finally:
+            _atualizar_job(
+                fila, job_id,
+                status=STATUS_CONCLUIDO if sucesso else STATUS_ERRO,
+                etapa="Concluído" if sucesso else "Falhou",
+                progresso=1.0 if sucesso else None,
+                mensagem=mensagem,
+                fim=time.time(),
+            )
+
+
+def submeter_importacao(empresa, mes, ano, processado_id, user_email, descricao):
+    """
+    Enfileira a importação de um balancete processado
+
+    Args:
+        empresa: tuple (razao_social, plano_contas_id)
+        mes: mês (1-12)
+        ano: ano (ex: 2025)
+        processado_id: ID do DataFrame processado em armazenamento_temporario
+            (o arquivo é apagado ao fim do job)
+        user_email: email do usuário que está importando
+        descricao: texto exibido na lista de jobs (ex: nome do arquivo)
+
+    Returns:
+        str com o ID do job
+    """
+    fila = obter_fila_jobs()
+    job_id = uuid.uuid4().hex[:12]
+
+    with fila["lock"]:
+        _limpar_jobs_antigos(fila)
+        fila["jobs"][job_id] = {
+            "id": job_id,
+            "descricao": descricao,
+            "empresa": empresa[0],
+            "periodo": f"{int(mes):02d}/{ano}",
+            "usuario": user_email,
+            "status": STATUS_FILA,
+            "etapa": "Na fila",
+            "progresso": 0.0,
+            "mensagem": "",
+            "criado_em": datetime.now(),
+            "inicio_execucao": None,
+            "fim": None,
+        }
+
+    fila["executor"].submit(
+        _executar_importacao, fila, job_id, empresa, int(mes), int(ano), processado_id, user_email)
+
+    return job_id
+
+
+def _executar_exportacao(fila, job_id, conteudo, filtros, formato):
+    """Corpo do job: grava o arquivo de exportação informando as linhas lidas"""
+    _atualizar_job(fila, job_id, status=STATUS_EXECUTANDO, etapa="Iniciando",
+                   inicio_execucao=time.time())
+
+    def progresso(etapa, fracao):
+        _atualizar_job(fila, job_id, etapa=etapa, progresso=fracao)
+
+    try:
+        sucesso, mensagem, caminho = exportar(conteudo, filtros, formato, progresso=progresso)
+    except Exception as e:
+        print(f"❌ Erro no job de exportação {job_id}: {e}")
+        sucesso, mensagem, caminho = False, f"❌ Erro: {str(e)}", None
+
+    _atualizar_job(
+        fila, job_id,
+        status=STATUS_CONCLUIDO if sucesso else STATUS_ERRO,
+        etapa="Concluído" if sucesso else "Falhou",
+        progresso=1.0 if sucesso else None,
+        mensagem=mensagem,
+        arquivo=caminho,
+        fim=time.time(),
+    )
+
+
+def submeter_exportacao(conteudo, filtros, formato, user_email):
+    """
+    Enfileira uma exportação grande
+
+    Args:
+        conteudo: chave de CONTEUDOS_EXPORTACAO
+        filtros: dict de filtros (empresa/ano/mes)
+        formato: chave de FORMATOS_EXPORTACAO
+        user_email: email do usuário que pediu a exportação
+
+    Returns:
+        str com o ID do job
+    """
+    fila = obter_fila_jobs()
+    job_id = uuid.uuid4().hex[:12]
+
+    with fila["lock"]:
+        _limpar_jobs_antigos(fila)
+        fila["jobs"][job_id] = {
+            "id": job_id,
+            "descricao": f"{CONTEUDOS_EXPORTACAO[conteudo]} ({formato})",
+            "empresa": filtros.get("empresa", "Todas"),
+            "periodo": f"{filtros.get('mes', 'Todos')}/{filtros.get('ano', 'Todos')}",
+            "usuario": user_email,
+            "status": STATUS_FILA,
+            "etapa": "Na fila",
+            "progresso": 0.0,
+            "mensagem": "",
+            "arquivo": None,
+            "nome_arquivo": nome_arquivo_exportacao(conteudo, formato),
+            "mime": FORMATOS_EXPORTACAO[formato][1],
+            "criado_em": datetime.now(),
+            "inicio_execucao": None,
+            "fim": None,
+        }
+
+    fila["executor"].submit(
+        _executar_exportacao, fila, job_id, conteudo, dict(filtros), formato)
+
+    return job_id
+
+
+def consultar_jobs(job_ids):
+    """
+    Retorna uma cópia do estado dos jobs informados
+
+    Args:
+        job_ids: lista de IDs (IDs expirados são ignorados)
+
+    Returns:
+        list de dict, na ordem dos IDs
+    """
+    fila = obter_fila_jobs()
+    with fila["lock"]:
+        return [dict(fila["jobs"][job_id]) for job_id in job_ids if job_id in fila["jobs"]]
+
+
+def existem_jobs_ativos(job_ids):
+    """
+    Indica se algum dos jobs ainda está na fila ou executando
+
+    Args:
+        job_ids: lista de IDs
+
+    Returns:
+        bool
+    """
+    return any(job["status"] not in STATUS_FINAIS for job in consultar_jobs(job_ids))
@@ -0,0 +1,178 @@
+"""
+leitor_excel.py - Leitura de balancetes em planilhas Excel (.xlsx e .xls)
+
+As linhas são percorridas em streaming: .xlsx com openpyxl em modo
+read_only (o XML da aba é lido conforme as linhas são pedidas, sem montar o
+modelo de objetos da planilha) e .xls com xlrd sob demanda (aba a aba). A
+aba usada é a primeira que tiver, nas primeiras LINHAS_BUSCA_CABECALHO
+linhas, o cabeçalho do balancete.
+
+O resultado tem o mesmo formato de ler_balancete_txt_csv (tudo texto, com
+números no padrão brasileiro "1234,56"), então segue pelas mesmas etapas de
+limpeza e validação de balancete_processor.py.
+"""
+
+import math
+from datetime import date, datetime
+from decimal import Decimal
+
+
+# Colunas que identificam a linha de cabeçalho do balancete
+COLUNAS_CABECALHO = ("Conta", "Desc. Conta")
+
+# Colunas de valor: números da planilha são convertidos para "1234,56"
+COLUNAS_NUMERICAS = ("Saldo Anterior", "Val. Débito", "Val. Crédito", "Saldo Atual", "Saldo Período")
+
+# Linhas examinadas no topo de cada aba à procura do cabeçalho
+LINHAS_BUSCA_CABECALHO = 50
+
+
+def _texto_celula(valor, numerica):
+    """
+    Converte o valor de uma célula para o texto equivalente ao do CSV
+
+    Args:
+        valor: valor lido da planilha
+        numerica: True para colunas de valor (decimal com vírgula)
+
+    Returns:
+        str ou NaN para células vazias
+    """
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        return math.nan
+
+    if isinstance(valor, bool):
+        return str(valor)
+
+    if isinstance(valor, int):
+        return str(valor)
+
+    if isinstance(valor, float):
+        if valor.is_integer():
+            return str(int(valor))
+        # Sem notação científica e com vírgula decimal (limpar_dados remove pontos)
+        texto = repr(valor)
+        if "e" in texto:
+            texto = format(Decimal(texto), "f")
+        return texto.replace(".", ",") if numerica else texto
+
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+
+    return str(valor)
+
+
+def _nome_coluna(valor, posicao):
+    """Nome da coluna no cabeçalho (vazio vira 'Unnamed: n', como no pandas)"""
+    if valor is None or not str(valor).strip():
+        return f"Unnamed: {posicao}"
+    return str(valor).strip()
+
+
+def montar_dataframe(linhas):
+    """
+    Procura o cabeçalho nas primeiras linhas e monta o DataFrame com o restante
+
+    Args:
+        linhas: iterador de tuplas com os valores das células
+
+    Returns:
+        DataFrame (tudo texto) ou None se o cabeçalho não foi encontrado
+    """
+    import pandas as pd
+
+    cabecalho = None
+    for posicao, linha in enumerate(linhas):
+        if posicao >= LINHAS_BUSCA_CABECALHO:
+            return None
+        valores = {str(valor).strip() for valor in linha if valor is not None}
+        if all(coluna in valores for coluna in COLUNAS_CABECALHO):
+            cabecalho = [_nome_coluna(valor, i) for i, valor in enumerate(linha)]
+            break
+
+    if cabecalho is None:
+        return None
+
+    numericas = [nome in COLUNAS_NUMERICAS for nome in cabecalho]
+    qtd_colunas = len(cabecalho)
+    registros = []
+
+    # Continua o mesmo iterador: as linhas de dados nunca ficam duplicadas em memória
+    for linha in linhas:
+        if all(valor is None or (isinstance(valor, str) and not valor.strip()) for valor in linha):
+            continue
+        linha = tuple(linha[:qtd_colunas]) + (None,) * (qtd_colunas - len(linha))
+        registros.append([
+            _texto_celula(valor, numerica) for valor, numerica in zip(linha, numericas)])
+
+    return pd.DataFrame(registros, columns=cabecalho, dtype=object)
+
+
+def ler_balancete_xlsx(arquivo):
+    """
+    Lê balancete de planilha .xlsx em modo read_only
+
+    Args:
+        arquivo: arquivo uploadado (UploadedFile do Streamlit) ou BytesIO
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame ou None)
+    """
+    from openpyxl import load_workbook
+
+    try:
+        livro = load_workbook(arquivo, read_only=True, data_only=True)
+    except Exception as e:
+        return (False, f"❌ Erro ao abrir planilha: {str(e)}", None)
+
+    try:
+        for aba in livro.worksheets:
+            # Sem isso, planilhas sem <dimension> são varridas inteiras só
+            # para calcular o tamanho antes da primeira linha
+            aba.reset_dimensions()
+            df = montar_dataframe(aba.iter_rows(values_only=True))
+            if df is not None:
+                return (True, f"✅ Planilha lida com sucesso (aba '{aba.title}')", df)
+
+        return (False, "❌ Cabeçalho do balancete (Conta, Desc. Conta) não encontrado em nenhuma aba", None)
+
+    except Exception as e:
+        return (False, f"❌ Erro ao ler planilha: {str(e)}", None)
+    finally:
+        # read_only mantém o arquivo aberto até o close
+        livro.close()
+
+
+def ler_balancete_xls(arquivo):
+    """
+    Lê balancete de planilha .xls (formato antigo do Excel) com xlrd
+
+    Args:
+        arquivo: arquivo uploadado (UploadedFile do Streamlit) ou BytesIO
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame ou None)
+    """
+    import xlrd
+
+    try:
+        livro = xlrd.open_workbook(file_contents=arquivo.read(), on_demand=True)
+    except Exception as e:
+        return (False, f"❌ Erro ao abrir planilha: {str(e)}", None)
+
+    try:
+        for indice in range(livro.nsheets):
+            aba = livro.sheet_by_index(indice)
+            # Células vazias do xlrd têm valor '' (tratadas como vazias)
+            df = montar_dataframe(
+                [celula.value for celula in linha] for linha in aba.get_rows())
+            livro.unload_sheet(indice)
+            if df is not None:
+                return (True, f"✅ Planilha lida com sucesso (aba '{aba.name}')", df)
+
+        return (False, "❌ Cabeçalho do balancete (Conta, Desc. Conta) não encontrado em nenhuma aba", None)
+
+    except Exception as e:
+        return (False, f"❌ Erro ao ler planilha: {str(e)}", None)
+    finally:
+        livro.release_resources()
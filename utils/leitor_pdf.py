@@ -0,0 +1,437 @@
+"""
+leitor_pdf.py - Extração de balancetes de PDFs com texto (não escaneados)
+
+A extração das palavras (pdfplumber), que é a parte cara, roda em paralelo
+num pool de processos único para o servidor (compartilhado por uploads
+simultâneos), em blocos de PAGINAS_POR_TAREFA páginas; cada
+processo abre o PDF de um arquivo temporário e devolve as linhas de cada página
+como listas de palavras com a posição horizontal. A montagem da tabela é
+feita no processo principal, em ordem:
+
+1. O cabeçalho de colunas é localizado em cada página (páginas sem
+   cabeçalho reutilizam as posições da anterior); o que está acima dele
+   (título, empresa, período) é descartado.
+2. Linhas que se repetem na mesma altura na maioria das páginas (rodapés
+   "Página N de M", cabeçalhos do relatório) são descartadas.
+3. Cada palavra vai para a coluna mais próxima: valores pela margem direita
+   (alinhados à direita), textos pela margem esquerda.
+4. Sem a coluna Nível no relatório, o nível é a profundidade do código da
+   conta (1.1.02 -> 3).
+5. Linhas sem conta continuam o registro anterior (descrição quebrada em
+   duas linhas ou valores na linha de baixo), inclusive na virada de
+   página; linhas sem conta com valores após um registro completo (totais
+   do relatório) são ignoradas.
+
+O DataFrame resultante tem as colunas de validar_estrutura, tudo texto e com
+os valores no padrão brasileiro com sinal à esquerda ("-1.234,56": parênteses,
+menos à direita e saldo credor "C" viram o sinal), e segue pelas mesmas
+etapas de limpeza e validação de balancete_processor.py.
+"""
+
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# Páginas extraídas por tarefa do pool
+PAGINAS_POR_TAREFA = 10
+
+# Abaixo disso a extração roda no próprio processo (o pool não compensa)
+PAGINAS_MINIMAS_PARALELO = 2 * PAGINAS_POR_TAREFA
+
+# Distância vertical (pt) para duas palavras estarem na mesma linha
+TOLERANCIA_LINHA = 3
+
+# Fração das páginas em que uma linha precisa aparecer para ser considerada
+# cabeçalho/rodapé repetido (somente documentos com 3 páginas ou mais)
+FRACAO_LINHA_REPETIDA = 0.5
+
+# Coluna do balancete -> rótulos aceitos no cabeçalho do PDF (normalizados)
+ROTULOS_COLUNAS = {
+    "Nível": ("nivel", "niv."),
+    "Conta": ("conta", "codigo", "cod."),
+    "Desc. Conta": ("desc. conta", "descricao da conta", "descricao", "nome da conta"),
+    "Saldo Anterior": ("saldo anterior",),
+    "Val. Débito": ("val. debito", "debitos", "debito"),
+    "Val. Crédito": ("val. credito", "creditos", "credito"),
+    "Saldo Atual": ("saldo atual",),
+    "Saldo Período": ("saldo periodo", "saldo do periodo"),
+}
+
+COLUNAS_VALORES = ("Saldo Anterior", "Val. Débito", "Val. Crédito", "Saldo Atual", "Saldo Período")
+
+# Colunas em que o sufixo C/D indica a natureza do saldo (sinal)
+COLUNAS_SALDO = ("Saldo Anterior", "Saldo Atual", "Saldo Período")
+
+COLUNAS_TEXTO = ("Nível", "Conta", "Desc. Conta")
+
+# Valor monetário impresso: 1.234,56 | -1.234,56 | (1.234,56) | 1.234,56D | 1.234,56-
+PADRAO_VALOR = re.compile(r"^\(?-?\d{1,3}(\.\d{3})*,\d{2}\)?[DdCc-]?$|^\(?-?\d+,\d{2}\)?[DdCc-]?$")
+
+# Código de conta: dígitos separados por ponto/traço (ex: 1.1.02.001)
+PADRAO_CONTA = re.compile(r"^\d+([.\-]\d+)*$")
+
+
+def _normalizar(texto):
+    """Minúsculas e sem acentos (comparação de rótulos)"""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def _agrupar_linhas(palavras):
+    """Agrupa as palavras de uma página em linhas pela posição vertical"""
+    linhas = []
+    for palavra in sorted(palavras, key=lambda p: (p["top"], p["x0"])):
+        if linhas and abs(palavra["top"] - linhas[-1][0]) <= TOLERANCIA_LINHA:
+            linhas[-1][1].append((palavra["x0"], palavra["x1"], palavra["text"]))
+        else:
+            linhas.append((palavra["top"], [(palavra["x0"], palavra["x1"], palavra["text"])]))
+
+    return [(round(topo), sorted(linha)) for topo, linha in linhas]
+
+
+def extrair_paginas(origem, inicio, fim):
+    """
+    Extrai as linhas (palavras com posição) de um intervalo de páginas
+
+    Executado nos processos do pool: recebe o caminho do PDF (um arquivo
+    temporário, para os bytes não serem enviados a cada tarefa) e não
+    acessa Streamlit nem o banco.
+
+    Args:
+        origem: caminho do PDF ou bytes do PDF
+        inicio: primeira página (base 0)
+        fim: página final (exclusiva)
+
+    Returns:
+        list (uma por página) de linhas; cada linha é uma tupla
+            (topo arredondado, list de (x0, x1, texto))
+    """
+    import io
+    import pdfplumber
+
+    paginas = []
+    if isinstance(origem, bytes):
+        origem = io.BytesIO(origem)
+
+    with pdfplumber.open(origem, pages=list(range(inicio + 1, fim + 1))) as pdf:
+        for pagina in pdf.pages:
+            palavras = pagina.extract_words(x_tolerance=1.5, y_tolerance=TOLERANCIA_LINHA)
+            paginas.append(_agrupar_linhas(palavras))
+            # Libera os objetos da página já processada
+            pagina.close()
+
+    return paginas
+
+
+def _localizar_cabecalho(linha):
+    """
+    Identifica as colunas do balancete numa linha
+
+    Returns:
+        dict coluna -> (x0, x1) ou None se a linha não é o cabeçalho
+    """
+    normalizadas = [_normalizar(texto) for _, _, texto in linha]
+    usadas = set()
+    colunas = {}
+
+    # Rótulos mais longos primeiro ("desc. conta" antes de "conta")
+    candidatos = sorted(
+        ((coluna, rotulo.split()) for coluna, rotulos in ROTULOS_COLUNAS.items() for rotulo in rotulos),
+        key=lambda item: -len(item[1]))
+
+    for coluna, tokens in candidatos:
+        if coluna in colunas:
+            continue
+        for i in range(len(linha) - len(tokens) + 1):
+            indices = range(i, i + len(tokens))
+            if any(j in usadas for j in indices):
+                continue
+            if all(normalizadas[j] == token for j, token in zip(indices, tokens)):
+                usadas.update(indices)
+                colunas[coluna] = (linha[i][0], linha[i + len(tokens) - 1][1])
+                break
+
+    qtd_valores = sum(1 for coluna in colunas if coluna in COLUNAS_VALORES)
+    if "Conta" in colunas and qtd_valores >= 3:
+        return colunas
+    return None
+
+
+def _assinatura(topo, linha):
+    """
+    Altura e texto da linha com dígitos trocados por '#' (detecta rodapés
+    repetidos; a altura evita descartar descrições iguais no meio da tabela)
+    """
+    return (topo, re.sub(r"\d+", "#", " ".join(texto for _, _, texto in linha)))
+
+
+def _distribuir_colunas(linha, colunas):
+    """
+    Distribui as palavras de uma linha de dados pelas colunas do cabeçalho
+
+    Returns:
+        dict coluna -> texto
+    """
+    colunas_valores = [c for c in COLUNAS_VALORES if c in colunas]
+    colunas_texto = [c for c in COLUNAS_TEXTO if c in colunas]
+    registro = {}
+
+    for x0, x1, texto in linha:
+        if PADRAO_VALOR.match(texto) and colunas_valores:
+            # Valores são alinhados à direita: compara a margem direita
+            coluna = min(colunas_valores, key=lambda c: abs(colunas[c][1] - x1))
+        else:
+            coluna = min(colunas_texto, key=lambda c: abs(colunas[c][0] - x0))
+            # Código de conta recuado (hierarquia) que ficou mais perto da
+            # descrição: a primeira palavra com forma de código é a conta
+            if coluna == "Desc. Conta" and "Conta" in colunas and "Conta" not in registro \
+                    and PADRAO_CONTA.match(texto) and not registro.get("Desc. Conta"):
+                coluna = "Conta"
+
+        registro[coluna] = f"{registro[coluna]} {texto}" if coluna in registro else texto
+
+    return registro
+
+
+def _valor_impresso(texto, coluna):
+    """
+    Converte o valor impresso para o formato com sinal à esquerda
+
+    '(1.234,56)' e '1.234,56-' viram '-1.234,56'. Nas colunas de saldo o
+    sufixo C (saldo credor) vira sinal negativo e D (devedor) positivo, na
+    mesma convenção dos arquivos CSV/Excel (débito positivo, crédito
+    negativo); nas colunas de movimento o sufixo só é removido.
+
+    Args:
+        texto: valor como impresso (ex: '1.234,56C')
+        coluna: coluna do balancete a que o valor pertence
+
+    Returns:
+        str no formato '-1.234,56' / '1.234,56'
+    """
+    negativo = False
+
+    sufixo = texto[-1:].upper()
+    if sufixo in ("C", "D", "-"):
+        texto = texto[:-1]
+        if sufixo == "-" or (sufixo == "C" and coluna in COLUNAS_SALDO):
+            negativo = not negativo
+
+    if texto.startswith("(") and texto.endswith(")"):
+        texto = texto[1:-1]
+        negativo = not negativo
+
+    if texto.startswith("-"):
+        texto = texto[1:]
+        negativo = not negativo
+
+    return f"-{texto}" if negativo else texto
+
+
+def montar_tabela(paginas):
+    """
+    Monta as linhas do balancete a partir das linhas extraídas das páginas
+
+    Args:
+        paginas: list (uma por página) de linhas de extrair_paginas
+
+    Returns:
+        tuple (registros: list de dict, colunas: list, qtd_ignoradas: int)
+            ou None se nenhum cabeçalho foi encontrado
+    """
+    # Linhas repetidas na maioria das páginas (rodapés e títulos)
+    repetidas = set()
+    if len(paginas) >= 3:
+        contagem = Counter(
+            assinatura for linhas in paginas
+            for assinatura in {_assinatura(topo, linha) for topo, linha in linhas})
+        repetidas = {
+            assinatura for assinatura, qtd in contagem.items()
+            if qtd >= FRACAO_LINHA_REPETIDA * len(paginas)
+        }
+
+    colunas = None
+    colunas_documento = []
+    registros = []
+    qtd_ignoradas = 0
+
+    for linhas in paginas:
+        # Cabeçalho desta página (o que está acima dele é descartado)
+        inicio = 0
+        for i, (_, linha) in enumerate(linhas):
+            cabecalho = _localizar_cabecalho(linha)
+            if cabecalho:
+                colunas, inicio = cabecalho, i + 1
+                colunas_documento.extend(c for c in cabecalho if c not in colunas_documento)
+                break
+
+        if colunas is None:
+            continue
+
+        for topo, linha in linhas[inicio:]:
+            registro = _distribuir_colunas(linha, colunas)
+
+            if registro.get("Conta") and PADRAO_CONTA.match(registro["Conta"]):
+                registros.append(registro)
+                continue
+
+            # Somente linhas sem conta podem ser rodapé (linhas de dados de
+            # páginas diferentes têm a mesma assinatura)
+            if _assinatura(topo, linha) in repetidas or _localizar_cabecalho(linha):
+                continue
+
+            tem_valores = any(c in registro for c in COLUNAS_VALORES)
+
+            anterior = registros[-1] if registros else None
+            anterior_sem_valores = anterior is not None and not any(c in anterior for c in COLUNAS_VALORES)
+
+            if anterior is not None and (not tem_valores or anterior_sem_valores):
+                # Continuação do registro anterior (descrição quebrada ou
+                # valores na linha seguinte, inclusive na virada de página)
+                for coluna, texto in registro.items():
+                    if coluna == "Desc. Conta" and anterior.get(coluna):
+                        anterior[coluna] = f"{anterior[coluna]} {texto}"
+                    elif coluna not in anterior:
+                        anterior[coluna] = texto
+            else:
+                # Totais do relatório e linhas fora da tabela
+                qtd_ignoradas += 1
+
+    if colunas is None:
+        return None
+
+    return (registros, colunas_documento, qtd_ignoradas)
+
+
+def _processos_pdf():
+    """Processos do pool (1 quando já estamos num processo filho, ex: importar_lote)"""
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return os.cpu_count() or 1
+
+
+# Pool criado no primeiro PDF grande e reaproveitado pelas threads de upload
+_pool_pdf = None
+_trava_pool_pdf = threading.Lock()
+
+
+def _obter_pool_pdf():
+    """
+    Retorna o pool de processos compartilhado, criando-o se necessário
+
+    Um único pool limita o total de processos a _processos_pdf() mesmo com
+    vários PDFs lidos ao mesmo tempo (ex: upload em lote).
+
+    Returns:
+        ProcessPoolExecutor
+    """
+    global _pool_pdf
+    with _trava_pool_pdf:
+        if _pool_pdf is None:
+            # spawn: não duplica o processo do servidor (fork com threads)
+            _pool_pdf = ProcessPoolExecutor(
+                max_workers=_processos_pdf(),
+                mp_context=multiprocessing.get_context("spawn"))
+        return _pool_pdf
+
+
+def _descartar_pool_pdf(pool):
+    """Descarta o pool quebrado (processo morto) para o próximo PDF recriá-lo"""
+    global _pool_pdf
+    with _trava_pool_pdf:
+        if _pool_pdf is pool:
+            _pool_pdf = None
+    pool.shutdown(wait=False)
+
+
+def ler_balancete_pdf(arquivo):
+    """
+    Lê balancete de um PDF com texto, extraindo as páginas em paralelo
+
+    Args:
+        arquivo: arquivo uploadado (UploadedFile do Streamlit) ou BytesIO
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame ou None)
+    """
+    import pandas as pd
+    import io
+    import pdfplumber
+
+    try:
+        conteudo = arquivo.read()
+        with pdfplumber.open(io.BytesIO(conteudo)) as pdf:
+            qtd_paginas = len(pdf.pages)
+    except Exception as e:
+        return (False, f"❌ Erro ao abrir PDF: {str(e)}", None)
+
+    intervalos = [
+        (inicio, min(inicio + PAGINAS_POR_TAREFA, qtd_paginas))
+        for inicio in range(0, qtd_paginas, PAGINAS_POR_TAREFA)
+    ]
+    processos = min(_processos_pdf(), len(intervalos))
+
+    try:
+        if processos <= 1 or qtd_paginas < PAGINAS_MINIMAS_PARALELO:
+            paginas = extrair_paginas(conteudo, 0, qtd_paginas)
+        else:
+            # Os processos leem as páginas de um arquivo temporário: as
+            # tarefas levam só o caminho, não o PDF inteiro
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temporario:
+                temporario.write(conteudo)
+
+            pool = _obter_pool_pdf()
+            try:
+                paginas = [
+                    pagina
+                    for bloco in pool.map(
+                        extrair_paginas,
+                        [temporario.name] * len(intervalos),
+                        [inicio for inicio, _ in intervalos],
+                        [fim for _, fim in intervalos])
+                    for pagina in bloco
+                ]
+            except BrokenProcessPool:
+                _descartar_pool_pdf(pool)
+                raise
+            finally:
+                try:
+                    os.remove(temporario.name)
+                except OSError:
+                    pass
+    except Exception as e:
+        return (False, f"❌ Erro ao extrair texto do PDF: {str(e)}", None)
+
+    if not any(paginas):
+        return (False, "❌ PDF sem texto extraível (documento escaneado?)", None)
+
+    resultado = montar_tabela(paginas)
+    if resultado is None:
+        return (False, "❌ Cabeçalho do balancete (Conta, Saldo Anterior, ...) não encontrado no PDF", None)
+
+    registros, colunas, qtd_ignoradas = resultado
+    df = pd.DataFrame.from_records(
+        registros, columns=[coluna for coluna in ROTULOS_COLUNAS if coluna in colunas])
+
+    # Relatórios sem a coluna Nível: nível pela profundidade do código da conta
+    if "Nível" not in df.columns:
+        df.insert(0, "Nível", df["Conta"].map(
+            lambda conta: str(len(re.split(r"[.\-]", conta))), na_action="ignore"))
+
+    for coluna in COLUNAS_VALORES:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].map(
+                lambda texto: _valor_impresso(texto, coluna), na_action="ignore")
+
+    mensagem = f"✅ PDF lido com sucesso ({qtd_paginas} página(s))"
+    if qtd_ignoradas:
+        mensagem += f" | {qtd_ignoradas} linha(s) fora da tabela ignorada(s)"
+
+    return (True, mensagem, df)
@@ -0,0 +1,115 @@
+"""
+medir_inicializacao.py - Custo de importação (cold start) de cada página
+
+Para cada página, executa somente os imports do topo do arquivo num
+processo Python novo com -X importtime e mostra o tempo total e os módulos
+mais caros. Não executa o corpo das páginas (não acessa banco nem Supabase).
+
+Uso:
+    python -m utils.medir_inicializacao
+    python -m utils.medir_inicializacao --top 15
+"""
+
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+import time
+
+
+PASTA_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def listar_paginas():
+    """
+    Lista o app principal e as páginas
+
+    Returns:
+        list de caminhos
+    """
+    return [os.path.join(PASTA_PROJETO, "app.py")] + sorted(
+        glob.glob(os.path.join(PASTA_PROJETO, "pages", "*.py")))
+
+
+def extrair_imports(caminho):
+    """
+    Extrai os imports do nível do módulo de uma página
+
+    Args:
+        caminho: caminho da página
+
+    Returns:
+        str com o código dos imports
+    """
+    with open(caminho, encoding="utf-8") as arquivo:
+        codigo = arquivo.read()
+
+    arvore = ast.parse(codigo)
+    return "\n".join(
+        ast.get_source_segment(codigo, no)
+        for no in arvore.body
+        if isinstance(no, (ast.Import, ast.ImportFrom))
+    )
+
+
+def medir_pagina(caminho):
+    """
+    Mede os imports de uma página num processo novo
+
+    Args:
+        caminho: caminho da página
+
+    Returns:
+        tuple (sucesso: bool, segundos: float, modulos: list de (us_acumulado, nome), erro: str)
+    """
+    inicio = time.perf_counter()
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", extrair_imports(caminho)],
+        cwd=PASTA_PROJETO, capture_output=True, text=True)
+    segundos = time.perf_counter() - inicio
+
+    # Linhas do importtime: "import time: self [us] | cumulative | imported package"
+    modulos = []
+    outras = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:"):
+            outras.append(linha)
+            continue
+        partes = linha[len("import time:"):].split("|")
+        if len(partes) != 3 or not partes[1].strip().isdigit():
+            continue
+        nome = partes[2].rstrip()
+        # Somente módulos de primeiro nível no relatório (sem indentação)
+        if nome.startswith(" ") and not nome.startswith("  "):
+            modulos.append((int(partes[1]), nome.strip()))
+
+    erro = "\n".join(outras[-3:]) if processo.returncode != 0 else ""
+    return (processo.returncode == 0, segundos, modulos, erro)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede o custo de importação de cada página")
+    parser.add_argument("--top", type=int, default=8,
+                        help="módulos mais caros exibidos por página (padrão: 8)")
+    args = parser.parse_args()
+
+    for caminho in listar_paginas():
+        nome = os.path.relpath(caminho, PASTA_PROJETO)
+        sucesso, segundos, modulos, erro = medir_pagina(caminho)
+
+        print(f"\n{'✅' if sucesso else '❌'} {nome}: {segundos:.2f}s")
+        if not sucesso:
+            print(f"   {erro}")
+            continue
+
+        for acumulado, modulo in sorted(modulos, reverse=True)[:args.top]:
+            print(f"   {acumulado / 1000:8.1f} ms  {modulo}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+migracoes.py - Controle de versão do schema do banco de dados
+
+Aplica, em ordem, os arquivos SQL da pasta migrations/ que ainda não foram
+registrados na tabela public.schema_migrations.
+
+Convenção de nome dos arquivos: NNNN_descricao.sql (ex: 0001_schema_inicial.sql)
+
+Uso (a partir da raiz do projeto):
+    python -m utils.migracoes
+"""
+
+import os
+import re
+
+from database import conectar, desconectar
+
+
+PASTA_MIGRACOES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+# Chave do advisory lock que impede duas execuções simultâneas
+LOCK_MIGRACOES = 7_202_501
+
+
+def listar_migracoes():
+    """
+    Lista os arquivos de migração disponíveis na pasta migrations/
+
+    Returns:
+        list de tuplas (versao: int, descricao: str, caminho: str) em ordem
+    """
+    migracoes = []
+
+    for nome in sorted(os.listdir(PASTA_MIGRACOES)):
+        match = re.match(r"^(\d{4})_(.+)\.sql$", nome)
+        if match:
+            migracoes.append((
+                int(match.group(1)),
+                match.group(2),
+                os.path.join(PASTA_MIGRACOES, nome)
+            ))
+
+    return migracoes
+
+
+def obter_versoes_aplicadas(cursor):
+    """
+    Retorna as versões já aplicadas (cria a tabela de controle se necessário)
+
+    Args:
+        cursor: cursor psycopg2 aberto
+
+    Returns:
+        set com as versões aplicadas
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS public.schema_migrations (
+            versao integer PRIMARY KEY,
+            descricao text NOT NULL,
+            dt_aplicacao timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    cursor.execute("SELECT versao FROM public.schema_migrations")
+    return {linha[0] for linha in cursor.fetchall()}
+
+
+def aplicar_migracoes():
+    """
+    Aplica as migrações pendentes, cada uma em sua própria transação
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str)
+    """
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT pg_advisory_lock(%s)", (LOCK_MIGRACOES,))
+        aplicadas = obter_versoes_aplicadas(cursor)
+        conn.commit()
+
+        pendentes = [m for m in listar_migracoes() if m[0] not in aplicadas]
+
+        if not pendentes:
+            return (True, "ℹ️ Schema já está atualizado")
+
+        for versao, descricao, caminho in pendentes:
+            print(f"🔄 Aplicando migração {versao:04d} - {descricao}...")
+
+            with open(caminho, encoding="utf-8") as arquivo:
+                sql = arquivo.read()
+
+            try:
+                cursor.execute(sql)
+                cursor.execute(
+                    "INSERT INTO public.schema_migrations (versao, descricao) VALUES (%s, %s)",
+                    (versao, descricao)
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                return (False, f"❌ Erro na migração {versao:04d} ({descricao}): {str(e)}")
+
+        return (True, f"✅ {len(pendentes)} migração(ões) aplicada(s)")
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"❌ Erro ao aplicar migrações: {e}")
+        return (False, f"❌ Erro ao aplicar migrações: {str(e)}")
+    finally:
+        if conn:
+            try:
+                conn.cursor().execute(
+                    "SELECT pg_advisory_unlock(%s)", (LOCK_MIGRACOES,))
+            except Exception:
+                pass
+            desconectar(conn)
+
+
+if __name__ == "__main__":
+    sucesso, mensagem = aplicar_migracoes()
+    print(mensagem)
@@ -0,0 +1,188 @@
+"""
+plano_contas.py - Mapeamento das contas da empresa para o plano padrão
+
+O mapeamento de cada plano_contas_id fica em memória (cache) e é aplicado
+no processamento do balancete como um único hash join (Series.map), gerando
+a coluna "Conta Padrão" gravada junto com os itens.
+"""
+
+import streamlit as st
+from database import conectar, desconectar
+
+
+TTL_CACHE_MAPEAMENTO = 3600
+
+COLUNAS_ARQUIVO_MAPEAMENTO = ['Conta', 'Conta Padrão', 'Descrição Padrão']
+
+
+@st.cache_data(ttl=TTL_CACHE_MAPEAMENTO, show_spinner=False)
+def _consultar_mapeamento(plano_contas_id):
+    """
+    Consulta o mapeamento conta -> conta padrão de um plano de contas
+
+    Erros de banco são propagados para não ficarem guardados no cache.
+
+    Args:
+        plano_contas_id: ID do plano de contas da empresa
+
+    Returns:
+        Series indexada pela conta com a conta padrão (vazia se não houver)
+    """
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT conta, conta_padrao
+            FROM public.plano_contas_mapeamento
+            WHERE plano_contas_id = %s
+        """, (plano_contas_id,))
+
+        resultados = cursor.fetchall()
+
+        return pd.Series(
+            [linha[1] for linha in resultados],
+            index=pd.Index([linha[0] for linha in resultados], name="Conta"),
+            name="Conta Padrão",
+            dtype=object
+        )
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def carregar_mapeamento(plano_contas_id):
+    """
+    Carrega o mapeamento conta -> conta padrão de um plano de contas
+
+    Args:
+        plano_contas_id: ID do plano de contas da empresa
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, mapeamento: Series ou None)
+    """
+    try:
+        return (True, "", _consultar_mapeamento(plano_contas_id))
+    except Exception as e:
+        print(f"❌ Erro ao carregar mapeamento: {e}")
+        return (False, f"❌ Erro ao carregar mapeamento: {str(e)}", None)
+
+
+def aplicar_mapeamento(df, plano_contas_id):
+    """
+    Adiciona a coluna "Conta Padrão" ao balancete processado
+
+    Args:
+        df: DataFrame do balancete (coluna 'Conta' limpa)
+        plano_contas_id: ID do plano de contas da empresa
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame com 'Conta Padrão'
+        ou None, contas_nao_mapeadas: list)
+    """
+    sucesso, mensagem, mapeamento = carregar_mapeamento(plano_contas_id)
+    if not sucesso:
+        return (False, mensagem, None, [])
+
+    df = df.copy()
+    df['Conta Padrão'] = df['Conta'].map(mapeamento)
+
+    contas_nao_mapeadas = df.loc[df['Conta Padrão'].isna(), 'Conta'].unique().tolist()
+
+    return (True, "", df, contas_nao_mapeadas)
+
+
+def obter_plano_contas_id(razao_social):
+    """
+    Busca o plano de contas da empresa pela razão social
+
+    Args:
+        razao_social: razão social da empresa
+
+    Returns:
+        int com o plano_contas_id ou None
+    """
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT plano_contas_id FROM public.empresa WHERE razao_social = %s",
+            (razao_social,))
+
+        resultado = cursor.fetchone()
+        return resultado[0] if resultado else None
+
+    except Exception as e:
+        print(f"❌ Erro ao buscar plano de contas: {e}")
+        return None
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def importar_mapeamento(plano_contas_id, df_mapeamento):
+    """
+    Grava (substitui) o mapeamento de um plano de contas
+
+    Args:
+        plano_contas_id: ID do plano de contas
+        df_mapeamento: DataFrame com as colunas de COLUNAS_ARQUIVO_MAPEAMENTO
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str)
+    """
+    from psycopg2.extras import execute_values
+
+    colunas_faltando = [
+        c for c in COLUNAS_ARQUIVO_MAPEAMENTO[:2] if c not in df_mapeamento.columns]
+    if colunas_faltando:
+        return (False, f"❌ Colunas faltando: {', '.join(colunas_faltando)}")
+
+    df = df_mapeamento.copy()
+    df['Conta'] = df['Conta'].astype(str).str.strip()
+    df['Conta Padrão'] = df['Conta Padrão'].astype(str).str.strip()
+    if 'Descrição Padrão' not in df.columns:
+        df['Descrição Padrão'] = None
+    df['Descrição Padrão'] = df['Descrição Padrão'].astype(object).where(
+        df['Descrição Padrão'].notna(), None)
+
+    df = df[(df['Conta'] != '') & (df['Conta Padrão'] != '')]
+    df = df.drop_duplicates(subset='Conta', keep='last')
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "DELETE FROM public.plano_contas_mapeamento WHERE plano_contas_id = %s",
+            (plano_contas_id,))
+
+        execute_values(cursor, """
+            INSERT INTO public.plano_contas_mapeamento (
+                plano_contas_id, conta, conta_padrao, descricao_padrao
+            ) VALUES %s
+        """, [
+            (plano_contas_id, conta, conta_padrao, descricao)
+            for conta, conta_padrao, descricao in zip(
+                df['Conta'], df['Conta Padrão'], df['Descrição Padrão'])
+        ], page_size=1000)
+
+        conn.commit()
+        _consultar_mapeamento.clear()
+
+        return (True, f"✅ Mapeamento gravado! {len(df)} conta(s)")
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"❌ Erro ao importar mapeamento: {e}")
+        return (False, f"❌ Erro ao importar mapeamento: {str(e)}")
+    finally:
+        if conn:
+            desconectar(conn)
@@ -0,0 +1,120 @@
+"""
+previa_balancete.py - Resumo e paginação da prévia do balancete processado
+
+O resumo (contagens, totais, contas com maior movimento e verificações) é
+calculado uma vez por arquivo processado e fica em cache pelo ID do arquivo
+temporário; a tabela da prévia lê somente a página exibida do arquivo
+(memory map), sem enviar o DataFrame inteiro ao navegador a cada rerun.
+"""
+
+import streamlit as st
+from utils.armazenamento_temporario import TTL_ARQUIVO_TEMPORARIO, carregar_dataframe
+from utils.balancete_agregados import (
+    COLUNAS_VALORES,
+    calcular_agregados,
+    marcar_contas_analiticas,
+    obter_mascara_movimento
+)
+
+
+LINHAS_POR_PAGINA_PREVIA = 100
+
+# Contas analíticas exibidas no ranking de movimento
+QTD_CONTAS_DESTAQUE = 10
+
+# Diferença máxima (R$) aceita nas verificações de fechamento
+TOLERANCIA_VALIDACAO = 0.01
+
+
+def resumir_balancete(df):
+    """
+    Calcula o resumo da prévia de um balancete processado
+
+    Args:
+        df: DataFrame processado
+
+    Returns:
+        dict com agregados, contagens, verificações (alertas), contas com
+        maior movimento e contas sem mapeamento
+    """
+    import numpy as np
+
+    mascara_movimento = obter_mascara_movimento(df)
+    agregados = calcular_agregados(df, mascara_movimento)
+
+    valores = df[COLUNAS_VALORES].to_numpy(dtype=float)
+    analiticas = marcar_contas_analiticas(df['Conta'])
+
+    # Saldo anterior + débito - crédito deve fechar com o saldo atual
+    diferenca_saldo = np.abs(
+        valores[:, 0] + valores[:, 1] - valores[:, 2] - valores[:, 3])
+    qtd_saldo_inconsistente = int((diferenca_saldo > TOLERANCIA_VALIDACAO).sum())
+
+    diferenca_partidas = round(
+        agregados["total_debito"] - agregados["total_credito"], 2)
+    qtd_contas_duplicadas = int(df['Conta'].duplicated().sum())
+
+    # Contas analíticas com maior movimento (débito + crédito)
+    movimento = valores[:, 1] + valores[:, 2]
+    indices_analiticas = np.flatnonzero(analiticas & (movimento > 0))
+    destaque = indices_analiticas[
+        np.argsort(-movimento[indices_analiticas], kind="stable")[:QTD_CONTAS_DESTAQUE]]
+    df_destaque = df.iloc[destaque][['Conta', 'Desc. Conta'] + COLUNAS_VALORES]
+
+    df_nao_mapeadas = None
+    if 'Conta Padrão' in df.columns:
+        df_nao_mapeadas = df.loc[df['Conta Padrão'].isna(), ['Conta', 'Desc. Conta']]
+
+    alertas = []
+    if abs(diferenca_partidas) > TOLERANCIA_VALIDACAO:
+        alertas.append(("erro", f"Débitos e créditos não fecham (diferença de {diferenca_partidas:,.2f})"))
+    if qtd_saldo_inconsistente:
+        alertas.append(("aviso", f"{qtd_saldo_inconsistente} linha(s) em que saldo anterior + débito - crédito ≠ saldo atual"))
+    if qtd_contas_duplicadas:
+        alertas.append(("aviso", f"{qtd_contas_duplicadas} conta(s) repetida(s) no arquivo"))
+    if df_nao_mapeadas is not None and not df_nao_mapeadas.empty:
+        alertas.append(("aviso", f"{len(df_nao_mapeadas)} conta(s) sem mapeamento no plano padrão"))
+
+    return {
+        "qtd_linhas": len(df),
+        "agregados": agregados,
+        "diferenca_partidas": diferenca_partidas,
+        "qtd_saldo_inconsistente": qtd_saldo_inconsistente,
+        "qtd_contas_duplicadas": qtd_contas_duplicadas,
+        "alertas": alertas,
+        "contas_destaque": df_destaque.reset_index(drop=True),
+        "contas_nao_mapeadas": df_nao_mapeadas,
+    }
+
+
+@st.cache_data(ttl=TTL_ARQUIVO_TEMPORARIO, max_entries=64, show_spinner=False)
+def resumir_processado(processado_id):
+    """
+    Resumo da prévia do arquivo processado (calculado uma vez por arquivo)
+
+    Args:
+        processado_id: ID do arquivo em armazenamento_temporario
+
+    Returns:
+        dict de resumir_balancete ou None se o arquivo expirou
+    """
+    df = carregar_dataframe(processado_id)
+    if df is None:
+        return None
+    return resumir_balancete(df)
+
+
+def carregar_pagina_previa(processado_id, pagina, por_pagina=LINHAS_POR_PAGINA_PREVIA):
+    """
+    Lê uma página de linhas do arquivo processado
+
+    Args:
+        processado_id: ID do arquivo em armazenamento_temporario
+        pagina: página (começa em 1)
+        por_pagina: linhas por página
+
+    Returns:
+        DataFrame da página ou None se o arquivo expirou
+    """
+    return carregar_dataframe(
+        processado_id, inicio=(pagina - 1) * por_pagina, quantidade=por_pagina)
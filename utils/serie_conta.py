@@ -0,0 +1,181 @@
+"""
+serie_conta.py - Série temporal de uma conta por empresa
+
+Lê somente as linhas da conta em balancete_itens (índice por conta) e monta
+a série por empresa sob demanda: a tela carrega apenas as empresas da página
+exibida e cada série fica memorizada por (empresa, conta, intervalo).
+
+As consultas em cache propagam os erros (não ficam guardados no cache); as
+funções públicas convertem o erro para (sucesso, mensagem, df).
+"""
+
+import streamlit as st
+from database import conectar, desconectar
+
+
+TTL_CACHE_SERIE = 600
+
+METRICAS_SERIE = {
+    "saldo_atual": "Saldo Atual",
+    "val_debito": "Val. Débito",
+    "val_credito": "Val. Crédito",
+}
+
+
+@st.cache_data(ttl=TTL_CACHE_SERIE, show_spinner=False)
+def _consultar_empresas_com_conta(conta, ano_inicio, ano_fim):
+    """Empresas com a conta no intervalo (ver listar_empresas_com_conta)"""
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT e.id, e.razao_social, e.abreviacao
+            FROM public.empresa e
+            WHERE EXISTS (
+                SELECT 1
+                FROM public.balancete_itens i
+                JOIN public.balancete b ON b.id = i.balancete_id
+                WHERE i.conta = %s
+                  AND i.ano BETWEEN %s AND %s
+                  AND b.empresa_id = e.id
+            )
+            ORDER BY e.razao_social
+        """, (conta, ano_inicio, ano_fim))
+
+        return pd.DataFrame(cursor.fetchall(), columns=[
+            "empresa_id", "razao_social", "abreviacao"
+        ])
+
+    finally:
+        if conn:
+            desconectar(conn)
+
+
+def listar_empresas_com_conta(conta, ano_inicio, ano_fim):
+    """
+    Lista as empresas que possuem a conta no intervalo de anos
+
+    Args:
+        conta: código da conta
+        ano_inicio: primeiro ano do intervalo
+        ano_fim: último ano do intervalo
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, df: DataFrame com empresa_id,
+            razao_social e abreviacao, ou None)
+    """
+    try:
+        df = _consultar_empresas_com_conta(conta, ano_inicio, ano_fim)
+        return (True, f"✅ {len(df)} empresa(s) com a conta", df)
+    except Exception as e:
+        print(f"❌ Erro ao listar empresas da conta: {e}")
+        return (False, f"❌ Erro ao listar empresas da conta: {str(e)}", None)
+
+
+@st.cache_data(ttl=TTL_CACHE_SERIE, show_spinner=False, max_entries=512)
+def _carregar_serie_conta(empresa_id, conta, ano_inicio, ano_fim):
+    """
+    Carrega a série mensal de uma conta para uma empresa
+
+    Meses com balancete e sem a conta valem zero (linhas sem movimento não
+    são gravadas); meses sem balancete ficam vazios (NaN). A conta repetida
+    dentro de um balancete é somada, como na matriz de analise_comparativa.py.
+
+    Args:
+        empresa_id: ID da empresa
+        conta: código da conta
+        ano_inicio: primeiro ano do intervalo
+        ano_fim: último ano do intervalo
+
+    Returns:
+        DataFrame indexado por período (AAAA-MM) com as colunas de METRICAS_SERIE
+    """
+    import pandas as pd
+
+    conn = None
+    try:
+        conn = conectar()
+        cursor = conn.cursor()
+
+        cursor.execute(f"""
+            SELECT
+                b.ano,
+                b.mes,
+                {', '.join(f'COALESCE(sum(i.{m}), 0)' for m in METRICAS_SERIE)}
+            FROM public.balancete b
+            LEFT JOIN public.balancete_itens i
+                ON i.balancete_id = b.id
+               AND i.ano = b.ano
+               AND i.conta = %s
+            WHERE b.empresa_id = %s
+              AND b.ano BETWEEN %s AND %s
+            GROUP BY b.ano, b.mes
+        """, (conta, empresa_id, ano_inicio, ano_fim))
+
+        df = pd.DataFrame(
+            cursor.fetchall(), columns=["ano", "mes"] + list(METRICAS_SERIE))
+
+    finally:
+        if conn:
+            desconectar(conn)
+
+    periodos = pd.period_range(
+        f"{ano_inicio}-01", f"{ano_fim}-12", freq="M")
+
+    df.index = pd.PeriodIndex.from_fields(
+        year=df["ano"].astype(int), month=df["mes"].astype(int), freq="M")
+
+    return (
+        df[list(METRICAS_SERIE)]
+        .astype(float)
+        .reindex(periodos)
+        .rename(columns=METRICAS_SERIE)
+    )
+
+
+def montar_pivot_conta(empresas, conta, ano_inicio, ano_fim, metrica="saldo_atual"):
+    """
+    Monta o pivot períodos × empresas de uma conta para as empresas informadas
+
+    Cada série vem do cache de _carregar_serie_conta, então paginar pelas
+    empresas só consulta o banco para as que ainda não foram exibidas.
+
+    Args:
+        empresas: DataFrame com empresa_id e abreviacao (página atual)
+        conta: código da conta
+        ano_inicio: primeiro ano do intervalo
+        ano_fim: último ano do intervalo
+        metrica: chave de METRICAS_SERIE
+
+    Returns:
+        tuple (sucesso: bool, mensagem: str, pivot: DataFrame indexado por
+            período com uma coluna por empresa, ou None)
+    """
+    import pandas as pd
+
+    try:
+        series = {
+            linha.abreviacao: _carregar_serie_conta(
+                int(linha.empresa_id), conta, ano_inicio, ano_fim)[METRICAS_SERIE[metrica]]
+            for linha in empresas.itertuples(index=False)
+        }
+    except Exception as e:
+        print(f"❌ Erro ao carregar série da conta: {e}")
+        return (False, f"❌ Erro ao carregar série da conta: {str(e)}", None)
+
+    pivot = pd.DataFrame(series)
+    pivot.index = pivot.index.astype(str)
+
+    return (True, "✅ Séries carregadas", pivot)
+
+
+def limpar_cache_serie():
+    """
+    Invalida as séries de contas em cache (chamada após importações)
+    """
+    _consultar_empresas_com_conta.clear()
+    _carregar_serie_conta.clear()
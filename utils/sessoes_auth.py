@@ -0,0 +1,212 @@
+"""
+sessoes_auth.py - Pool de clientes de autenticação e sessões validadas
+
+Cada sessão do Streamlit tem o seu próprio contexto de autenticação (tokens
+e dados do usuário) guardado num registro do processo; a sessão do navegador
+guarda apenas o ID. Os clientes GoTrue ficam num pool pequeno e são
+emprestados com exclusividade para login, logout e renovação, então logins
+simultâneos não disputam o estado de um cliente compartilhado.
+
+A validação nas páginas é local (expiração do token no registro), sem
+chamada à API de autenticação; uma thread de fundo renova os tokens que
+estão perto de expirar e descarta sessões abandonadas.
+"""
+
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import streamlit as st
+from utils.supabase_client import criar_cliente_auth
+
+
+# Clientes de autenticação simultâneos no processo
+TAMANHO_POOL_AUTH = 4
+
+# Segundos de espera por um cliente livre antes de desistir
+TIMEOUT_POOL_AUTH = 30
+
+# Renova o token quando faltarem menos que estes segundos para expirar
+MARGEM_RENOVACAO = 300
+
+# Intervalo da thread de renovação
+INTERVALO_RENOVACAO = 30
+
+# Sessões sem acesso há mais que isto deixam de ser renovadas e são removidas
+TTL_SESSAO_INATIVA = 12 * 3600
+
+
+@st.cache_resource
+def obter_registro_sessoes():
+    """
+    Retorna o pool de clientes e o registro de sessões do processo
+
+    Na primeira chamada inicia a thread de renovação de tokens.
+
+    Returns:
+        dict com pool (clientes livres), criados, sessoes (id -> dict) e lock
+    """
+    registro = {
+        "pool": queue.LifoQueue(),
+        "criados": 0,
+        "sessoes": {},
+        "lock": threading.Lock(),
+    }
+
+    threading.Thread(
+        target=_renovar_sessoes, args=(registro,),
+        name="renovacao-auth", daemon=True).start()
+
+    return registro
+
+
+@contextmanager
+def emprestar_cliente(registro):
+    """
+    Empresta um cliente de autenticação do pool (criado sob demanda)
+
+    Args:
+        registro: retornado por obter_registro_sessoes
+
+    Yields:
+        cliente GoTrue de uso exclusivo até o fim do bloco
+    """
+    try:
+        cliente = registro["pool"].get_nowait()
+    except queue.Empty:
+        with registro["lock"]:
+            criar = registro["criados"] < TAMANHO_POOL_AUTH
+            if criar:
+                registro["criados"] += 1
+        if criar:
+            try:
+                cliente = criar_cliente_auth()
+            except Exception:
+                with registro["lock"]:
+                    registro["criados"] -= 1
+                raise
+        else:
+            cliente = registro["pool"].get(timeout=TIMEOUT_POOL_AUTH)
+
+    try:
+        yield cliente
+    finally:
+        registro["pool"].put(cliente)
+
+
+def _dados_sessao(sessao):
+    """Campos guardados no registro a partir da Session do GoTrue"""
+    return {
+        "access_token": sessao.access_token,
+        "refresh_token": sessao.refresh_token,
+        "expires_at": sessao.expires_at or int(time.time()) + (sessao.expires_in or 0),
+    }
+
+
+def registrar_sessao(sessao, usuario):
+    """
+    Guarda a sessão autenticada no registro do processo
+
+    Args:
+        sessao: Session retornada pelo login
+        usuario: dict com id, email e nome do usuário
+
+    Returns:
+        str com o ID da sessão (guardado em st.session_state)
+    """
+    registro = obter_registro_sessoes()
+    sessao_id = uuid.uuid4().hex
+
+    with registro["lock"]:
+        registro["sessoes"][sessao_id] = {
+            **_dados_sessao(sessao),
+            "usuario": usuario,
+            "ultimo_acesso": time.time(),
+        }
+
+    return sessao_id
+
+
+def validar_sessao(sessao_id):
+    """
+    Verifica localmente se a sessão existe e o token não expirou
+
+    Não chama a API de autenticação: a renovação é feita pela thread de fundo.
+
+    Args:
+        sessao_id: ID retornado por registrar_sessao
+
+    Returns:
+        dict com os dados do usuário ou None se a sessão não é válida
+    """
+    if not sessao_id:
+        return None
+
+    registro = obter_registro_sessoes()
+    with registro["lock"]:
+        sessao = registro["sessoes"].get(sessao_id)
+        if sessao is None or sessao["expires_at"] <= time.time():
+            return None
+        sessao["ultimo_acesso"] = time.time()
+        return sessao["usuario"]
+
+
+def encerrar_sessao(sessao_id):
+    """
+    Remove a sessão do registro e a invalida no servidor de autenticação
+
+    Args:
+        sessao_id: ID retornado por registrar_sessao
+    """
+    registro = obter_registro_sessoes()
+    with registro["lock"]:
+        sessao = registro["sessoes"].pop(sessao_id, None)
+
+    if sessao is None:
+        return
+
+    with emprestar_cliente(registro) as cliente:
+        # scope="local": encerra somente esta sessão, não as de outros dispositivos
+        cliente.admin.sign_out(sessao["access_token"], scope="local")
+
+
+def _renovar_sessoes(registro):
+    """Thread de fundo: renova tokens perto de expirar e remove sessões inativas"""
+    while True:
+        time.sleep(INTERVALO_RENOVACAO)
+        agora = time.time()
+
+        with registro["lock"]:
+            inativas = [
+                sessao_id for sessao_id, sessao in registro["sessoes"].items()
+                if agora - sessao["ultimo_acesso"] > TTL_SESSAO_INATIVA
+            ]
+            for sessao_id in inativas:
+                del registro["sessoes"][sessao_id]
+
+            a_renovar = [
+                (sessao_id, sessao["refresh_token"])
+                for sessao_id, sessao in registro["sessoes"].items()
+                if sessao["expires_at"] - agora < MARGEM_RENOVACAO
+            ]
+
+        for sessao_id, refresh_token in a_renovar:
+            try:
+                with emprestar_cliente(registro) as cliente:
+                    resposta = cliente.refresh_session(refresh_token)
+                dados = _dados_sessao(resposta.session)
+            except Exception as e:
+                print(f"❌ Erro ao renovar sessão de autenticação: {e}")
+                # Token já expirado e não renovável: a sessão volta ao login
+                with registro["lock"]:
+                    sessao = registro["sessoes"].get(sessao_id)
+                    if sessao is not None and sessao["expires_at"] <= time.time():
+                        del registro["sessoes"][sessao_id]
+                continue
+
+            with registro["lock"]:
+                sessao = registro["sessoes"].get(sessao_id)
+                if sessao is not None:
+                    sessao.update(dados)
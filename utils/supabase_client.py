@@ -14,19 +14,25 @@ supabase: Client = get_supabase_client()
 """
 
 import streamlit as st
-from supabase import create_client, Client
 
 
-def get_supabase_client() -> Client:
-    """
-    Retorna instância do cliente Supabase utilizando credenciais
-    seguras armazenadas no .streamlit/secrets.toml
+def criar_cliente_auth():
     """
-    supabase_url = st.secrets["SUPABASE_URL"]
-    supabase_key = st.secrets["SUPABASE_KEY"]  # Pode ser ANON ou SERVICE KEY
-
-    return create_client(supabase_url, supabase_key)
+    Cria um cliente somente de autenticação (GoTrue), sem estado compartilhado
 
+    Usado pelo pool de utils/sessoes_auth.py: cada login/renovação empresta
+    um cliente exclusivo, então sessões simultâneas não disputam o estado de
+    um único cliente. A renovação automática do próprio cliente fica
+    desligada (o pool renova os tokens em segundo plano).
+    """
+    from supabase_auth import SyncGoTrueClient
 
-# Instância global
-supabase: Client = get_supabase_client()
+    supabase_url = st.secrets["SUPABASE_URL"]
+    supabase_key = st.secrets["SUPABASE_KEY"]
+
+    return SyncGoTrueClient(
+        url=f"{supabase_url}/auth/v1",
+        headers={"apikey": supabase_key, "Authorization": f"Bearer {supabase_key}"},
+        auto_refresh_token=False,
+        persist_session=False,
+    )